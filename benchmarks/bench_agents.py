@@ -0,0 +1,82 @@
+# pipenv run python -m benchmarks.bench_agents
+
+"""
+End-to-end SingleAgent / ClarifyAndScoreAgent futások a determinisztikus fake LLM-mel (nincs hálózat).
+A fake modell latency-je paraméterezhető, így az agent overhead és a hívásszám hatása külön látszik.
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+
+import yaml
+
+from benchmarks.common import measure, print_rows
+from note_interpreter.clarify_and_score_agent import ClarifyAndScoreAgent
+from note_interpreter.fake_llm import NOTES_HEADER, DeterministicFakeChatModel, FakeToolProvider
+from note_interpreter.llm_agent import SingleAgent
+
+NOTE_COUNTS = [1, 10, 100, 1_000]
+
+
+def write_resources(directory: str) -> dict:
+    """Minimal single_agent resource files (same shape as the test fixtures)."""
+    prompt_config = os.path.join(directory, "prompt_config.yaml")
+    with open(prompt_config, "w", encoding="utf-8") as f:
+        yaml.dump({"sections": [{"name": "goals"}, {"name": "input_context"}]}, f)
+    schema = os.path.join(directory, "notes_output_schema.yaml")
+    with open(schema, "w", encoding="utf-8") as f:
+        yaml.dump({"DataEntry": {"raw_text": {"type": "string", "description": "note"}}}, f)
+    parameters = os.path.join(directory, "agent_parameters.yaml")
+    with open(parameters, "w", encoding="utf-8") as f:
+        yaml.dump({
+            "max_clarification_rounds": {"value": 2, "description": "rounds"},
+            "temperature": {"value": 0.0, "description": "temperature"},
+        }, f)
+    return {"prompt_config_path": prompt_config, "schema_path": schema, "parameters_path": parameters}
+
+
+def make_notes(count: int):
+    return [f"note {i}: email John re demo" for i in range(count)]
+
+
+def run(max_notes: int = 1_000, repeat: int = 3, latency_s: float = 0.0) -> list:
+    rows = []
+    memory = ["User is working on NoteInterpreter."]
+    llm = DeterministicFakeChatModel(latency_s=latency_s)
+    clarify_agent = ClarifyAndScoreAgent(prompt="", llm=llm, tool_provider=FakeToolProvider())
+    with tempfile.TemporaryDirectory() as tmp:
+        resources = write_resources(tmp)
+        for count in [c for c in NOTE_COUNTS if c <= max_notes]:
+            notes = make_notes(count)
+            params = {"notes": count, "latency_s": latency_s}
+
+            def single_agent_run():
+                # Az agent stdout-ra is ír (user_print); ez nem része a mérésnek
+                with contextlib.redirect_stdout(io.StringIO()):
+                    SingleAgent(notes, memory, llm=llm, tool_provider=FakeToolProvider(), use_color=False, **resources).run()
+
+            rows.append(measure("agent.single_agent.run", single_agent_run, params, repeat=repeat, items=count))
+
+            clarify_agent.prompt = NOTES_HEADER + "  \n".join(notes) + "  \n\n"
+
+            def clarify_run():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    clarify_agent.run(notes, memory)
+
+            rows.append(measure("agent.clarify_and_score.run", clarify_run, params, repeat=repeat, items=count))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end agent runs with the fake LLM")
+    parser.add_argument("--max-notes", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake LLM latency per call (seconds)")
+    args = parser.parse_args()
+    print_rows(run(args.max_notes, args.repeat, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# pipenv run python -m benchmarks.bench_io [--max-rows 10000000]
+
+"""
+InputHandler.load_batch / iter_note_batches és OutputGenerator.write_notes_csv szintetikus CSV-ken
+(1k ... 10M sor). Offline fut; a nagy fájlok egy ideiglenes könyvtárba kerülnek.
+"""
+import argparse
+import os
+import tempfile
+
+from benchmarks.common import measure, print_rows
+from note_interpreter.io import InputHandler, OutputGenerator
+from note_interpreter.models import Note
+
+ROW_COUNTS = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def write_inputs(directory: str, rows: int):
+    notes_csv = os.path.join(directory, f"notes_{rows}.csv")
+    with open(notes_csv, "w", encoding="utf-8") as f:
+        for i in range(rows):
+            f.write(f"note {i}: email John re demo and continue plan\n")
+    memory_md = os.path.join(directory, "memory.md")
+    with open(memory_md, "w", encoding="utf-8") as f:
+        f.write("* User is working on NoteInterpreter.\n* User prefers concise notes.\n")
+    class_yaml = os.path.join(directory, "classification.yaml")
+    with open(class_yaml, "w", encoding="utf-8") as f:
+        f.write("entity_types: [task, idea, project]\nintents: ['@DO', '@PLAN']\n")
+    return notes_csv, memory_md, class_yaml
+
+
+def make_notes(rows: int):
+    return [
+        Note(raw_input=f"note {i}", interpreted_text=f"Note {i}", clarity_score=80,
+             metadata={"entity_type": "task", "intent": "@DO"})
+        for i in range(rows)
+    ]
+
+
+def run(max_rows: int = 100_000, repeat: int = 3) -> list:
+    rows_out = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in [r for r in ROW_COUNTS if r <= max_rows]:
+            # A nagy méreteknél egy mérés is elég
+            n = repeat if rows <= 100_000 else 1
+            notes_csv, memory_md, class_yaml = write_inputs(tmp, rows)
+            rows_out.append(measure("io.load_batch", lambda: InputHandler.load_batch(notes_csv, memory_md, class_yaml),
+                                    {"rows": rows}, repeat=n, items=rows))
+            rows_out.append(measure("io.iter_note_batches",
+                                    lambda: sum(len(b.notes) for b in InputHandler.iter_note_batches(notes_csv, memory_md, class_yaml, 1000)),
+                                    {"rows": rows, "chunk_size": 1000}, repeat=n, items=rows))
+            notes = make_notes(rows)
+            output_csv = os.path.join(tmp, f"out_{rows}.csv")
+            rows_out.append(measure("io.write_notes_csv", lambda: OutputGenerator.write_notes_csv(notes, output_csv),
+                                    {"rows": rows}, repeat=n, items=rows))
+            del notes
+            os.remove(notes_csv)
+    return rows_out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV load / write")
+    parser.add_argument("--max-rows", type=int, default=100_000, help="largest synthetic CSV (up to 10000000)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print_rows(run(args.max_rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# pipenv run python -m benchmarks.bench_output
+
+"""
+OutputFormatter.format (SingleAgent) és ClarifyAndScoreAgent._map_and_validate_output nagy payloadokon.
+"""
+import argparse
+
+from benchmarks.common import measure, print_rows
+from note_interpreter.clarify_and_score_agent import ClarifyAndScoreAgent
+from note_interpreter.fake_llm import DeterministicFakeChatModel, FakeToolProvider, interpret_note
+from note_interpreter.llm_agent import OutputFormatter
+
+PAYLOAD_SIZES = [100, 1_000, 10_000, 100_000]
+
+
+def finalize_payload(size: int) -> dict:
+    return {
+        "entries": [interpret_note(f"note {i}: email John re demo") for i in range(size)],
+        "new_memory_points": [f"* fact {i}" for i in range(min(size, 100))],
+    }
+
+
+def clarify_payload(size: int) -> dict:
+    return {"notes": [
+        {"id": f"note_{i}", "raw_text": f"note {i}", "clarified_text": f"Note {i}", "clarity_score": 80,
+         "clarification_history": [], "new_questions": [], "long_term_memory": []}
+        for i in range(size)
+    ]}
+
+
+def run(max_size: int = 10_000, repeat: int = 3) -> list:
+    rows = []
+    agent = ClarifyAndScoreAgent(prompt="", llm=DeterministicFakeChatModel(), tool_provider=FakeToolProvider())
+    for size in [s for s in PAYLOAD_SIZES if s <= max_size]:
+        payload = finalize_payload(size)
+        rows.append(measure("output.OutputFormatter.format", lambda: OutputFormatter.format(payload),
+                            {"entries": size}, repeat=repeat, items=size))
+        payload = clarify_payload(size)
+        rows.append(measure("output.map_and_validate_output", lambda: agent._map_and_validate_output(payload),
+                            {"entries": size}, repeat=repeat, items=size))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark output formatting / validation")
+    parser.add_argument("--max-size", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print_rows(run(args.max_size, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
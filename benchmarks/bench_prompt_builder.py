@@ -0,0 +1,109 @@
+# pipenv run python -m benchmarks.bench_prompt_builder
+
+"""
+PromptBuilder.build (config újraolvasás + str.replace kulcsonként) vs. PromptBuilder.compile(...).render
+(egyszer parse-olt, előre feldarabolt sablon). Offline, LLM nélkül fut.
+"""
+import argparse
+import os
+import tempfile
+import timeit
+
+import yaml
+
+from benchmarks.common import measure
+from note_interpreter.prompt_builder import PromptBuilder
+
+REGISTRY_SECTIONS = [
+    "intro", "goals", "output_schema_and_meanings", "classification", "scoring_guidelines",
+    "parameter_explanations", "output_validation_rules", "tool_json_schema", "tool_behavior_summary",
+    "context_usage", "clarification_protocol", "memory_update", "memory_point_examples",
+    "example_output", "input_context", "finalization_protocol",
+]
+
+
+def write_fixture(directory: str, custom_sections: int = 10) -> str:
+    schema_file = os.path.join(directory, "notes_output_schema.yaml")
+    with open(schema_file, "w", encoding="utf-8") as f:
+        yaml.dump({"DataEntry": {
+            "raw_text": {"type": "string", "description": "Original note"},
+            "interpreted_text": {"type": "string", "description": "Interpreted note"},
+            "entity_type": {"type": "string", "description": "Entity type"},
+            "intent": {"type": "string", "description": "Intent"},
+            "clarity_score": {"type": "integer", "description": "0-100"},
+        }}, f)
+    sections = []
+    for name in REGISTRY_SECTIONS:
+        section = {"name": name, "enabled": True}
+        if name == "output_schema_and_meanings":
+            section["params"] = {"schema_file": schema_file}
+        sections.append(section)
+    for i in range(custom_sections):
+        sections.append({
+            "name": f"custom_{i}",
+            "custom_text": "Agent {agent_name} rule %d: keep {threshold} in mind. " % i * 20,
+        })
+    config_path = os.path.join(directory, "prompt_config.yaml")
+    with open(config_path, "w", encoding="utf-8") as f:
+        yaml.dump({"sections": sections}, f)
+    return config_path
+
+
+def make_context(num_notes: int, num_memory: int) -> dict:
+    return {
+        "agent_name": "BenchAgent",
+        "agent_description": "Benchmark agent",
+        "threshold": 80,
+        "notes": [f"note {i}: continue plan and email John re demo" for i in range(num_notes)],
+        "memory": [f"User fact number {i} about projects and habits." for i in range(num_memory)],
+        "classification_config": {"entity_types": ["task", "idea", "project"], "intents": ["@DO", "@PLAN"]},
+        "scoring_metrics": {"clarity_score": {"range": "0-100", "description": "clarity", "clarification_trigger": "below"}},
+        "parameters": {"clarity_score_threshold": {"value": 70, "description": "threshold"}},
+        "extra_context": {"clarification_qas": []},
+    }
+
+
+def run(sizes, number: int) -> list:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = write_fixture(tmp)
+        for num_notes, num_memory in sizes:
+            context = make_context(num_notes, num_memory)
+            assert PromptBuilder.build(context, config_path) == PromptBuilder.compile(config_path).render(context)
+            build_s = timeit.timeit(lambda: PromptBuilder.build(context, config_path), number=number) / number
+            compiled_s = timeit.timeit(lambda: PromptBuilder.compile(config_path).render(context), number=number) / number
+            results.append({
+                "notes": num_notes,
+                "memory": num_memory,
+                "build_ms": build_s * 1000,
+                "compiled_ms": compiled_s * 1000,
+                "speedup": build_s / compiled_s if compiled_s else float("inf"),
+            })
+    return results
+
+
+def measure_rows(sizes, repeat: int = 3, number: int = 50) -> list:
+    """Same comparison as run(), as benchmarks.common result rows (for run_all / JSON output)."""
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = write_fixture(tmp)
+        for num_notes, num_memory in sizes:
+            context = make_context(num_notes, num_memory)
+            params = {"notes": num_notes, "memory": num_memory}
+            rows.append(measure("prompt.build", lambda: PromptBuilder.build(context, config_path), params, repeat, number))
+            rows.append(measure("prompt.compiled_render", lambda: PromptBuilder.compile(config_path).render(context), params, repeat, number))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PromptBuilder.build vs compiled prompts")
+    parser.add_argument("--number", type=int, default=200, help="iterations per measurement")
+    args = parser.parse_args()
+    sizes = [(1, 5), (10, 50), (100, 500)]
+    print(f"{'notes':>6} {'memory':>7} {'build ms':>10} {'compiled ms':>12} {'speedup':>8}")
+    for row in run(sizes, args.number):
+        print(f"{row['notes']:>6} {row['memory']:>7} {row['build_ms']:>10.3f} {row['compiled_ms']:>12.3f} {row['speedup']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Közös segédek a benchmarkokhoz: időmérés, JSON eredményfájl, összehasonlítás egy korábbi futással.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+def measure(name: str, fn: Callable[[], Any], params: Optional[Dict[str, Any]] = None, repeat: int = 3,
+            number: int = 1, items: Optional[int] = None, setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """
+    Run fn `number` times per sample, `repeat` samples (setup() before each sample, untimed).
+    Returns one result row: median/min seconds per call and, if items is given, items per second.
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number)
+    median = statistics.median(samples)
+    row = {"name": name, "params": params or {}, "median_s": median, "min_s": min(samples), "repeat": repeat, "number": number}
+    if items:
+        row["items_per_s"] = items / median if median else float("inf")
+    return row
+
+
+def result_key(row: Dict[str, Any]) -> str:
+    return row["name"] + json.dumps(row["params"], sort_keys=True)
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip()
+    except Exception:
+        commit = ""
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_commit": commit,
+    }
+
+
+def write_results(rows: List[Dict[str, Any]], path: str) -> str:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": rows}, f, indent=2)
+    return path
+
+
+def compare(baseline_path: str, rows: List[Dict[str, Any]], threshold: float = 0.2) -> List[Dict[str, Any]]:
+    """Rows that got slower than the baseline by more than threshold (0.2 = 20%), by median time."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {result_key(row): row for row in json.load(f)["results"]}
+    regressions = []
+    for row in rows:
+        old = baseline.get(result_key(row))
+        if old and old["median_s"] and row["median_s"] > old["median_s"] * (1 + threshold):
+            regressions.append({**row, "baseline_median_s": old["median_s"], "ratio": row["median_s"] / old["median_s"]})
+    return regressions
+
+
+def print_rows(rows: List[Dict[str, Any]]) -> None:
+    for row in rows:
+        params = " ".join(f"{k}={v}" for k, v in row["params"].items())
+        rate = f"  {row['items_per_s']:,.0f} items/s" if "items_per_s" in row else ""
+        print(f"{row['name']:<32} {params:<28} {row['median_s'] * 1000:>12.3f} ms{rate}")
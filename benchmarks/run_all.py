@@ -0,0 +1,57 @@
+# pipenv run python -m benchmarks.run_all [--quick] [--compare benchmarks/results/<baseline>.json]
+
+"""
+Az összes offline benchmark egy futásban; az eredmény JSON-be kerül (benchmarks/results/<timestamp>.json),
+így két commit összehasonlítható. --compare esetén nem-nulla exit code, ha valami a küszöbnél jobban lassult.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from benchmarks import bench_agents, bench_io, bench_output, bench_prompt_builder
+from benchmarks.common import compare, print_rows, write_results
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def run_suites(max_rows: int, max_notes: int, repeat: int, latency_s: float) -> list:
+    rows = []
+    rows += bench_prompt_builder.measure_rows([(1, 5), (10, 50), (100, 500), (1_000, 5_000)], repeat=repeat, number=20)
+    rows += bench_io.run(max_rows=max_rows, repeat=repeat)
+    rows += bench_output.run(max_size=min(max_rows, 100_000), repeat=repeat)
+    rows += bench_agents.run(max_notes=max_notes, repeat=repeat, latency_s=latency_s)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run all offline benchmarks and write JSON results")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="baseline result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown vs baseline (0.2 = 20%%)")
+    parser.add_argument("--max-rows", type=int, default=100_000, help="largest synthetic CSV (up to 10000000)")
+    parser.add_argument("--max-notes", type=int, default=1_000, help="largest end-to-end agent run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake LLM latency per call (seconds)")
+    parser.add_argument("--quick", action="store_true", help="small sizes, one sample (smoke run)")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.max_rows, args.max_notes, args.repeat = 1_000, 10, 1
+    rows = run_suites(args.max_rows, args.max_notes, args.repeat, args.latency)
+    print_rows(rows)
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d_%H%M%S") + ".json")
+    print(f"\nResults written to {write_results(rows, output)}")
+
+    if args.compare:
+        regressions = compare(args.compare, rows, args.threshold)
+        for row in regressions:
+            print(f"[REGRESSION] {row['name']} {row['params']}: {row['baseline_median_s'] * 1000:.3f} ms -> "
+                  f"{row['median_s'] * 1000:.3f} ms ({row['ratio']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions above {args.threshold:.0%} vs {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@
 
 
 from pydantic import BaseModel, Field
-from typing import Generic, TypeVar, Dict, List, Optional, Any, Union
+from typing import Callable, Generic, TypeVar, Dict, List, Optional, Any, Union
 import logging
 from dataclasses import dataclass
 from langchain_core.language_models.chat_models import BaseChatModel
@@ -12,16 +12,60 @@ from langchain_openai import ChatOpenAI
 from datetime import datetime
 from abc import ABC, abstractmethod
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import yaml
 from note_interpreter.user_output import user_print, CYAN, YELLOW, MAGENTA, BLUE, GREEN, RED, WHITE, BOLD
+from note_interpreter.llm_cache import ResponseCache, make_cache_key
+from note_interpreter.clarification import ClarificationBroker, ConsoleClarificationBroker, PendingClarification
+from note_interpreter.history import HistoryManager
+from note_interpreter.log import lazy_json
+from note_interpreter.resources import FrozenDict, freeze, thaw
+from note_interpreter.snapshots import append_delta, read_snapshot, write_snapshot
+from note_interpreter.metrics import metrics, usage_counts
 import json
 
 StateType = TypeVar('StateType', bound=BaseModel)
 ResponseType = TypeVar('ResponseType', bound=BaseModel)
 
 
+class ContextSnapshot:
+    """
+    Immutable, versioned view of a BaseSharedContext. Values are frozen (FrozenDict / FrozenList);
+    to_dict() returns a mutable deep copy.
+    """
+    __slots__ = ("version", "fields")
+
+    def __init__(self, version: int, fields: FrozenDict):
+        self.version = version
+        self.fields = fields
+
+    def __getitem__(self, key: str) -> Any:
+        return self.fields[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.fields
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.fields.get(key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return thaw(self.fields)
+
+    def __repr__(self) -> str:
+        return f"ContextSnapshot(version={self.version}, fields={list(self.fields)})"
+
+
 class BaseSharedContext(BaseModel):
-    """Shared context model for managing shared data."""
+    """
+    Shared context model for managing shared data.
+    Versioned copy-on-write store: every write publishes a new immutable ContextSnapshot (version + 1), so
+    readers call snapshot() and get a consistent view without locking. Tools running in parallel update it
+    with compare_and_swap() / update().
+    Attributes stay plain, mutable values as before (ctx.notes.append(...) still works); only the snapshots are
+    frozen. An in-place change is published (and saved by save_delta) once the field is written back with
+    update_fields().
+    """
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
     class Config:
@@ -30,24 +74,71 @@ class BaseSharedContext(BaseModel):
 
     def __init__(self, **data):
         super().__init__(**data)
+        # A lock csak az írók publikálását sorosítja; olvasáshoz nem kell
         self._lock = threading.Lock()
         self._dynamic_fields = {}
         self._export_path = None
+        # save_delta() óta változott mezők
+        self._dirty = set()
+        self._snapshot = ContextSnapshot(0, freeze(self.model_dump()))
+
+    def snapshot(self) -> ContextSnapshot:
+        """Current snapshot (a single attribute read: consistent and lock-free)."""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def _publish(self, changes: Dict[str, Any]) -> ContextSnapshot:
+        # Caller holds self._lock. Unchanged values are shared with the previous snapshot.
+        # Az attribútumok a (módosítható) átadott értékek maradnak, csak a snapshot fagyasztott
+        frozen = {key: freeze(value) for key, value in changes.items()}
+        snapshot = ContextSnapshot(self._snapshot.version + 1, FrozenDict({**self._snapshot.fields, **frozen}))
+        for key, value in changes.items():
+            setattr(self, key, value)
+        self._dynamic_fields = {**self._dynamic_fields, **changes}
+        self._dirty.update(frozen)
+        self._snapshot = snapshot
+        return snapshot
+
+    def compare_and_swap(self, expected_version: int, **fields) -> bool:
+        """Publish fields only if nobody else wrote since expected_version; False on conflict."""
+        with self._lock:
+            if self._snapshot.version != expected_version:
+                return False
+            self._publish(fields)
+            return True
 
-    def update_fields(self, debug: bool = False, **fields) -> None:
-        """Update or add fields to the shared context"""
+    def update(self, fn: Callable[[ContextSnapshot], Dict[str, Any]], max_retries: int = 100) -> ContextSnapshot:
+        """
+        Optimistic read-modify-write: fn computes the changed fields from a snapshot (outside any lock), and they
+        are published with compare_and_swap. On conflict fn is re-run on the newer snapshot.
+        Használat:
+            ctx.update(lambda snap: {"scores": {**snap.get("scores", {}), note_id: 80}})
+        """
+        for _ in range(max_retries):
+            snapshot = self._snapshot
+            changes = fn(snapshot)
+            with self._lock:
+                if self._snapshot.version == snapshot.version:
+                    return self._publish(changes)
+        raise RuntimeError(f"Shared context update did not succeed after {max_retries} attempts")
+
+    def update_fields(self, debug: bool = False, **fields) -> ContextSnapshot:
+        """Update or add fields to the shared context (last writer wins); returns the new snapshot"""
         with self._lock:
-            for key, value in fields.items():
-                setattr(self, key, value)
-                self._dynamic_fields[key] = value
-            
-            # Mindig megjelenő informatív üzenet
-            self.printer(f"\n✓ Shared context updated with fields: {', '.join(fields.keys())}")
-            
-            # Debug információk csak debug módban
-            if debug:
-                self.logger.debug(f"[DEBUG] Updated fields: {fields}")
-                self.logger.debug(f"[DEBUG] Current dynamic fields: {self._dynamic_fields}")
+            snapshot = self._publish(fields)
+
+        # Mindig megjelenő informatív üzenet
+        user_print(f"\n✓ Shared context updated with fields: {', '.join(fields.keys())}")
+
+        # Debug információk csak debug módban
+        if debug:
+            logger = logging.getLogger("note_interpreter")
+            logger.debug("[DEBUG] Updated fields: %s", fields)
+            logger.debug("[DEBUG] Current dynamic fields: %s", self._dynamic_fields)
+        return snapshot
 
     def save_context(self, system_prompt_name: str, use_case: str, llm: Any, description: str) -> str:
         """Save shared context to a YAML file"""
@@ -60,11 +151,12 @@ class BaseSharedContext(BaseModel):
             'timestamp': datetime.now().isoformat(),
             'type': 'shared_context'
         }
-        self.metadata.update(metadata)
+        with self._lock:
+            self._publish({'metadata': {**self.metadata, **metadata}})
         
         # Prepare hierarchical structure
         yaml_data = {
-            'metadata': self.metadata,
+            'metadata': thaw(self.metadata),
             'content': {
                 k: v for k, v in self.model_dump().items() 
                 if k not in {'metadata', 'model_computed_fields', 'model_config', 'model_extra', 'model_fields', 'model_fields_set'}
@@ -89,7 +181,7 @@ class BaseSharedContext(BaseModel):
         with open(filename, 'w', encoding='utf-8') as f:
             # Write metadata first
             f.write("metadata:\n")
-            for line in yaml.dump(self.metadata, default_flow_style=False).splitlines():
+            for line in yaml.dump(yaml_data['metadata'], default_flow_style=False).splitlines():
                 f.write("  " + line + "\n")
             # Then write content
             f.write("content:\n")
@@ -99,6 +191,50 @@ class BaseSharedContext(BaseModel):
         self._export_path = filename
         return filename
 
+    def save_snapshot(self, path: str) -> str:
+        """
+        Save the current snapshot in the fast format: compact JSON, or msgpack for .msgpack paths.
+        Starts a new delta log; use save_context() for the human-readable YAML export.
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            self._dirty = set()
+        content = snapshot.to_dict()
+        metadata = content.pop('metadata', {})
+        write_snapshot(path, snapshot.version, metadata, content)
+        self._export_path = path
+        return path
+
+    def save_delta(self, path: str) -> int:
+        """
+        Append only the fields changed since the last save_snapshot()/save_delta() to the snapshot's delta log
+        (<path>.delta). Returns the number of fields written.
+        """
+        with self._lock:
+            snapshot = self._snapshot
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return 0
+        try:
+            append_delta(path, snapshot.version, {key: thaw(snapshot.fields[key]) for key in dirty})
+        except Exception:
+            with self._lock:
+                self._dirty |= dirty
+            raise
+        return len(dirty)
+
+    @classmethod
+    def load_snapshot(cls, path: str) -> 'BaseSharedContext':
+        """Load a save_snapshot() file with its delta log replayed (version numbers continue where they were)."""
+        version, metadata, content = read_snapshot(path)
+        instance = cls(metadata=metadata)
+        with instance._lock:
+            snapshot = instance._publish(content)
+            instance._snapshot = ContextSnapshot(version, snapshot.fields)
+            instance._dirty = set()
+        instance._export_path = path
+        return instance
+
     def get_export_path(self) -> str:
         """Returns the path where the context was last exported"""
         if not self._export_path:
@@ -146,9 +282,8 @@ class BaseSharedContext(BaseModel):
             
             # Add content fields as dynamic fields
             content = data.get('content', {})
-            instance._dynamic_fields = content
-            for key, value in content.items():
-                setattr(instance, key, value)
+            with instance._lock:
+                instance._publish(content)
             
             if debug:
                 logging.getLogger("note_interpreter").debug(f"[DEBUG] Loaded context with dynamic fields: {instance._dynamic_fields}")
@@ -198,6 +333,30 @@ class ToolDefinition:
     # todo delete this
 
 
+def tool_set_key(tools: List[ToolDefinition]) -> str:
+    """Content key of a tool set (names, descriptions, schemas; order matters for binding)."""
+    return json.dumps([(t.name, t.description, t.schema) for t in tools], sort_keys=True, default=str)
+
+
+# Az llm saját __dict__-jében: (llm, {(provider, tool_set_key): bound llm}); a kötések az llm-mel együtt szűnnek meg
+_BOUND_TOOLS_ATTR = "_note_interpreter_bound_tools"
+_bound_llm_lock = threading.Lock()
+
+
+def _bound_tools(llm: Any) -> Optional[Dict[tuple, Any]]:
+    """The llm's own binding cache (None if the llm has no __dict__ to keep it in)."""
+    try:
+        attrs = vars(llm)
+    except TypeError:
+        return None
+    entry = attrs.get(_BOUND_TOOLS_ATTR)
+    # Másolat (pl. model_copy) örökli a __dict__-et: saját kötéseket kap
+    if entry is None or entry[0] is not llm:
+        entry = (llm, {})
+        attrs[_BOUND_TOOLS_ATTR] = entry
+    return entry[1]
+
+
 class ToolProvider(ABC):
     @abstractmethod
     def prepare_tool_call(self, tool: ToolDefinition) -> Dict:
@@ -205,13 +364,26 @@ class ToolProvider(ABC):
         pass
     
     def bind_tools(self, llm: Any, tools: List[ToolDefinition]) -> Any:
-        """Common bind logic with provider-specific parts"""
+        """
+        Common bind logic with provider-specific parts.
+        Binding is done once per (llm, provider, tool set): later agents on the same llm reuse the bound model
+        (and with it the client's HTTP connections and the converted tool schemas). The bound models are kept
+        on the llm object itself, so they are freed together with it.
+        """
+        key = (type(self).__name__, tool_set_key(tools))
+        with _bound_llm_lock:
+            cache = _bound_tools(llm)
+            if cache is not None and key in cache:
+                return cache[key]
         # 1. Provider-specific tool definitions
         tool_dicts = [self.prepare_tool_call(tool) for tool in tools]
         
         # 2. Provider-specific binding
         bound_llm = self._bind_to_llm(llm, tool_dicts)
-        return bound_llm
+        if cache is None:
+            return bound_llm
+        with _bound_llm_lock:
+            return cache.setdefault(key, bound_llm)
     
     @abstractmethod
     def _bind_to_llm(self, llm: Any, tool_dicts: List[Dict]) -> Any:
@@ -246,6 +418,25 @@ class AnthropicToolProvider(ToolProvider):
         return llm.bind(tools=tool_dicts)
 
 
+# (llm osztály, ToolProvider factory) párok; az első isinstance találat nyer
+_tool_providers: List[tuple] = [
+    (ChatAnthropic, AnthropicToolProvider),
+    (ChatOpenAI, OpenAIToolProvider),
+]
+
+
+def register_tool_provider(llm_type: type, provider_factory: Callable[[], 'ToolProvider']) -> None:
+    """Default ToolProvider for an LLM class (used when AgentCore gets no explicit tool_provider)."""
+    _tool_providers.insert(0, (llm_type, provider_factory))
+
+
+def tool_provider_for(llm: Any) -> 'ToolProvider':
+    for llm_type, provider_factory in _tool_providers:
+        if isinstance(llm, llm_type):
+            return provider_factory()
+    raise ValueError(f"No default tool provider for LLM type: {type(llm)}")
+
+
 class AgentState(BaseModel):
     """Base state model for agents"""
     conversation_history: List[Dict] = Field(default_factory=list)
@@ -269,6 +460,8 @@ class AgentCore(Generic[StateType, ResponseType]):
     Core agent implementation with interactive capabilities.
     :param logger: Logger instance to use for logging (default: standard logging.getLogger(__name__))
     :param printer: User-facing output function (default: user_print)
+    :param response_cache: Optional ResponseCache; identical LLM calls are answered from it
+    :param history_manager: Optional HistoryManager; bounds the conversation history sent to the LLM
     """
     def __init__(
         self,
@@ -281,11 +474,15 @@ class AgentCore(Generic[StateType, ResponseType]):
         should_initiate: bool = True,
         debug_mode: bool = False,
         logger=None,
-        printer=None
+        printer=None,
+        response_cache: Optional['ResponseCache'] = None,
+        history_manager: Optional['HistoryManager'] = None
     ):
         self.debug_mode = debug_mode
         self.llm = llm
         self.tools = tools
+        # name -> ToolDefinition, so tool dispatch is a dict lookup
+        self.tool_index = {tool.name: tool for tool in tools or []}
         self.shared_context = shared_context or {}
         self.context_usage = context_usage or {}
         self.printer = printer or user_print
@@ -304,166 +501,304 @@ class AgentCore(Generic[StateType, ResponseType]):
         # Tool provider inicializálás
         self.tool_provider = tool_provider or self._get_default_tool_provider()
         self.bound_llm = self.tool_provider.bind_tools(self.llm, tools) if tools else self.llm
+        self.response_cache = response_cache
+        self.history_manager = history_manager
         
         self.logger = logger or logging.getLogger(__name__)
         
         # State inicializálás
+        self.reset()
+        
+        # Kezdeti beszélgetés
+        if should_initiate:
+            self.initiate()
+
+    def reset(self, system_prompt: Optional[str] = None, shared_context: Optional[Any] = None) -> None:
+        """
+        Start a new run: clear the per-run state (history, tool outputs) and optionally swap the system prompt
+        and shared context. The llm, the bound tools and the tool index are kept.
+        """
+        if system_prompt is not None:
+            self.system_prompt = system_prompt
+        if shared_context is not None:
+            self.shared_context = shared_context
         self.state = AgentState()
         self.state.conversation_history.append({
             "role": "system",
             "content": self.system_prompt
         })
-        
-        # Kezdeti beszélgetés
-        if should_initiate:
-            try:
-                response = self.handle_user_message("Hello")
-                self.state.conversation_history.append({
-                    "role": "assistant",
-                    "content": response["display_message"],
-                    "timestamp": datetime.now().isoformat()
-                })
-                self.print_agent_message(response["display_message"])
-            except Exception as e:
-                self.logger.error(f"Initialization error: {str(e)}")
-                self.print_agent_message("Error during initialization. Please try again.")
+        if self.history_manager is not None:
+            self.history_manager.reset()
 
-    
-    def handle_user_message(self, message: str) -> Dict:
-        """Process a user message and return structured response"""
+    def initiate(self) -> None:
+        """Send the greeting message and print the agent's opening reply."""
         try:
-            # User message logging
-            self._add_to_conversation_history({
-                "role": "user",
-                "content": message,
-                "timestamp": datetime.now().isoformat()
-            })
+            response = self.handle_user_message("Hello")
+            self._record_greeting(response)
+        except Exception as e:
+            self.logger.error(f"Initialization error: {str(e)}")
+            self.print_agent_message("Error during initialization. Please try again.")
 
-            # --- LOG the full conversation history before LLM call ---
-            try:
-                self.logger.debug("[DEBUG] Conversation history sent to LLM:\n" + json.dumps(self.state.conversation_history, indent=2, ensure_ascii=False))
-            except Exception as e:
-                self.logger.debug(f"[DEBUG] Could not serialize conversation history: {e}")
+    async def ainitiate(self) -> None:
+        """Async counterpart of initiate(), for agents created with should_initiate=False."""
+        try:
+            response = await self.ahandle_user_message("Hello")
+            self._record_greeting(response)
+        except Exception as e:
+            self.logger.error(f"Initialization error: {str(e)}")
+            self.print_agent_message("Error during initialization. Please try again.")
 
-            # LLM response processing
-            llm_response = self.bound_llm.invoke(self.state.conversation_history)
-            response_data = self._extract_llm_response(llm_response)
+    def _record_greeting(self, response: Dict) -> None:
+        self.state.conversation_history.append({
+            "role": "assistant",
+            "content": response["display_message"],
+            "timestamp": datetime.now().isoformat()
+        })
+        self.print_agent_message(response["display_message"])
 
-            # Check if a tool was used
-            if response_data.get('tool_used'):
-                # Process tool usage and capture the result
-                tool_result = self.execute_tool_function(response_data)
+    def handle_user_message(self, message: str) -> Dict:
+        """Process a user message and return structured response"""
+        try:
+            self._record_user_message(message)
+            response_data = self._invoke_llm(self._messages_for_llm())
+            return self._process_llm_response(response_data)
+        except Exception as e:
+            return self._handle_message_error(e)
+
+    async def ahandle_user_message(self, message: str) -> Dict:
+        """Async version of handle_user_message, awaiting bound_llm.ainvoke instead of blocking."""
+        try:
+            self._record_user_message(message)
+            response_data = await self._ainvoke_llm(self._messages_for_llm())
+            return self._process_llm_response(response_data)
+        except Exception as e:
+            return self._handle_message_error(e)
+
+    def _record_user_message(self, message: str) -> None:
+        # User message logging
+        self._add_to_conversation_history({
+            "role": "user",
+            "content": message,
+            "timestamp": datetime.now().isoformat()
+        })
 
-                # Record complete tool usage including the result
+        # --- LOG the full conversation history before LLM call (serialized only if the record is emitted) ---
+        self.logger.debug("[DEBUG] Conversation history sent to LLM:\n%s", lazy_json(list(self.state.conversation_history)))
+
+    def _messages_for_llm(self) -> List[Dict]:
+        """Conversation history as sent to the LLM (bounded by the history manager, if any)."""
+        if self.history_manager is None:
+            return self.state.conversation_history
+        return self.history_manager.view(self.state.conversation_history)
+
+    def _process_llm_response(self, response_data: Dict) -> Dict:
+        """Run the tool (if any), record the assistant turn and build the structured response."""
+        # Check if a tool was used
+        if response_data.get('tool_used'):
+            # Run every tool call of the response (concurrently if there are several), results in call order
+            tool_calls = response_data.get('tool_calls') or [{'name': response_data['tool_name'], 'args': response_data['tool_args']}]
+            results = self.execute_tool_calls(tool_calls)
+            tool_result = results[0]
+
+            # Record complete tool usage including the result
+            for call, result in zip(tool_calls, results):
                 self.state.tool_outputs.append({
-                    "tool_name": response_data['tool_name'],
-                    "tool_args": response_data['tool_args'],
-                    "result": tool_result,  # Use the result from process_tool_usage
+                    "tool_name": call['name'],
+                    "tool_args": call['args'],
+                    "result": result,
                     "timestamp": datetime.now().isoformat()
                 })
 
-                # Create history entry for tool usage
-                history_entry = {
-                    "role": "assistant",
-                    "type": MessageType.TOOL_CALL,
-                    "content": response_data['message'],
-                    "timestamp": datetime.now().isoformat(),
-                    "tool_name": response_data['tool_name'],
-                    "tool_args": response_data['tool_args'],
-                    "tool_result": tool_result  # Store the result from process_tool_usage
-                }
-            else:
-                # Create history entry for regular conversation
-                history_entry = {
-                    "role": "assistant",
-                    "type": MessageType.CONVERSATION,
-                    "content": response_data['message'],
-                    "timestamp": datetime.now().isoformat()
-                }
-
-            self._add_to_conversation_history(history_entry)
-
-            # Return structured response
-            return {
-                "type": MessageType.TOOL_CALL if response_data['tool_used'] else MessageType.CONVERSATION,
-                "display_message": response_data['message'],
-                "tool_details": {
-                    "name": response_data['tool_name'],
-                    "args": response_data['tool_args']
-                } if response_data['tool_used'] else None
+            # Create history entry for tool usage
+            history_entry = {
+                "role": "assistant",
+                "type": MessageType.TOOL_CALL,
+                "content": response_data['message'],
+                "timestamp": datetime.now().isoformat(),
+                "tool_name": response_data['tool_name'],
+                "tool_args": response_data['tool_args'],
+                "tool_result": tool_result  # Store the result from process_tool_usage
             }
-
-        except Exception as e:
-            error_msg = f"Error processing message: {str(e)}"
-            self.logger.error(error_msg)
-            self._add_to_conversation_history({
-                "role": "system",
-                "type": MessageType.ERROR,
-                "content": error_msg,
+            if len(tool_calls) > 1:
+                history_entry["tool_calls"] = [
+                    {"name": call['name'], "args": call['args'], "result": result}
+                    for call, result in zip(tool_calls, results)
+                ]
+        else:
+            # Create history entry for regular conversation
+            history_entry = {
+                "role": "assistant",
+                "type": MessageType.CONVERSATION,
+                "content": response_data['message'],
                 "timestamp": datetime.now().isoformat()
-            })
-            return {
-                "type": MessageType.ERROR,
-                "display_message": f"An error occurred: {str(e)}",
-                "error_details": error_msg
             }
 
-    
+        self._add_to_conversation_history(history_entry)
+
+        # Return structured response
+        return self._build_response(response_data)
+
+    def _build_response(self, response_data: Dict) -> Dict:
+        response = {
+            "type": MessageType.TOOL_CALL if response_data['tool_used'] else MessageType.CONVERSATION,
+            "display_message": response_data['message'],
+            "tool_details": {
+                "name": response_data['tool_name'],
+                "args": response_data['tool_args']
+            } if response_data['tool_used'] else None
+        }
+        if response_data.get('tool_calls') and len(response_data['tool_calls']) > 1:
+            # All parallel tool calls; tool_details stays the first one
+            response["all_tool_details"] = [{"name": c['name'], "args": c['args']} for c in response_data['tool_calls']]
+        return response
+
+    def _handle_message_error(self, e: Exception) -> Dict:
+        error_msg = f"Error processing message: {str(e)}"
+        self.logger.error(error_msg)
+        self._add_to_conversation_history({
+            "role": "system",
+            "type": MessageType.ERROR,
+            "content": error_msg,
+            "timestamp": datetime.now().isoformat()
+        })
+        return {
+            "type": MessageType.ERROR,
+            "display_message": f"An error occurred: {str(e)}",
+            "error_details": error_msg
+        }
 
     def execute_tool_function(self, response_data: Dict) -> Any:
         """Execute a tool function with given arguments and shared context."""
-        tool_name = response_data['tool_name']
-        tool_args = response_data['tool_args']
+        return self._run_tool(response_data['tool_name'], response_data['tool_args'])
 
-        tool_definition = next((tool for tool in self.tools if tool.name == tool_name), None)
+    def _run_tool(self, tool_name: str, tool_args: Optional[Dict]) -> Any:
+        tool_definition = self.tool_index.get(tool_name)
         if tool_definition and tool_definition.function:
             # Egyszerűen meghívjuk a függvényt a tool_args-szal és shared_context-tel
-            result = tool_definition.function(
-                **tool_args,
-                shared_context=self.shared_context
-            )
-            return result
-
+            with metrics.timer("tool_execute"):
+                return tool_definition.function(
+                    **(tool_args or {}),
+                    shared_context=self.shared_context
+                )
         return None
 
+    def execute_tool_calls(self, tool_calls: List[Dict]) -> List[Any]:
+        """
+        Execute several tool calls ({'name', 'args'}) and return their results in call order.
+        Independent calls run concurrently on a thread pool; a single call runs inline.
+        """
+        if len(tool_calls) == 1:
+            return [self._run_tool(tool_calls[0]['name'], tool_calls[0]['args'])]
+        with ThreadPoolExecutor(max_workers=len(tool_calls)) as pool:
+            futures = [pool.submit(self._run_tool, call['name'], call['args']) for call in tool_calls]
+            return [future.result() for future in futures]
 
 
-    def run_interactive_session(self) -> List[Dict]:
-        """Run an interactive session with the agent"""
+    def run_interactive_session(self, broker: Optional[ClarificationBroker] = None, session_id: Optional[str] = None) -> Union[List[Dict], PendingClarification]:
+        """
+        Run an interactive session with the agent. Every user turn goes through the broker (default: console
+        input()); with a headless broker the session suspends and returns the PendingClarification for the next
+        turn, continue it with resume_interactive_session(). Returns the conversation history on 'exit'.
+        """
+        return self._session_loop(broker or ConsoleClarificationBroker(), session_id, None)
+
+    def _session_loop(self, broker: ClarificationBroker, session_id: Optional[str], last_message: Optional[str]) -> Union[List[Dict], PendingClarification]:
         while True:
-            user_input = input("\033[92mUser: \033[0m")
-            if user_input.lower() == 'exit':
+            # Az állapot a kérdéssel együtt mentődik, így egy új AgentCore is folytathatja a sessiont
+            state = {"agent_state": json.loads(json.dumps(self.state.model_dump(), default=str))}
+            pending = broker.submit([str(last_message)] if last_message else [], state=state, batch_id=session_id,
+                                    prompt="\033[92mUser: \033[0m")
+            if not pending.answered:
+                return pending
+            broker.resolve(pending.request_id)
+            if pending.answer.lower() == 'exit':
                 break
-            
-            try:
-                response = self.handle_user_message(user_input)
-                
-                if response["type"] == MessageType.ERROR:
-                    self.print_agent_message(f"Error: {response['display_message']}")
-                elif response["type"] == MessageType.TOOL_CALL:
-                    self.print_agent_message(f"Using {response['tool_details']['name']} tool...")
-                    self.print_agent_message(response["display_message"])
-                    
-                    # Record tool usage in state
-                    self.state.tool_outputs.append({
-                        "tool_name": response['tool_details']['name'],
-                        "tool_args": response['tool_details']['args'],
-                        "timestamp": datetime.now().isoformat()
-                    })
-                else:
-                    self.print_agent_message(response["display_message"])
-                    
-            except Exception as e:
-                error_details = f"Session error: {str(e)}"
-                self.logger.error(error_details)
-                self.print_agent_message(
-                    "I encountered an error processing your message.\n"
-                    f"Details: {error_details}\n"
-                    "Please try again or rephrase your request."
-                )
-        
+            last_message = self._session_turn(pending.answer)
+
         return self.state.conversation_history
 
+    def resume_interactive_session(self, broker: ClarificationBroker, request_id: str) -> Union[List[Dict], PendingClarification]:
+        """Continue a suspended session: restore the stored state, handle the answered turn, then keep going."""
+        pending = broker.get(request_id)
+        if not pending.answered:
+            raise ValueError(f"Clarification request {request_id} has not been answered yet")
+        self.state = AgentState(**pending.state["agent_state"])
+        broker.resolve(request_id)
+        if pending.answer.lower() == 'exit':
+            return self.state.conversation_history
+        return self._session_loop(broker, pending.batch_id, self._session_turn(pending.answer))
+
+    def _session_turn(self, user_input: str) -> Optional[str]:
+        """One user turn of the interactive session; returns the agent's reply text."""
+        try:
+            response = self.handle_user_message(user_input)
+
+            if response["type"] == MessageType.ERROR:
+                self.print_agent_message(f"Error: {response['display_message']}")
+            elif response["type"] == MessageType.TOOL_CALL:
+                self.print_agent_message(f"Using {response['tool_details']['name']} tool...")
+                self.print_agent_message(response["display_message"])
+
+                # Record tool usage in state
+                self.state.tool_outputs.append({
+                    "tool_name": response['tool_details']['name'],
+                    "tool_args": response['tool_details']['args'],
+                    "timestamp": datetime.now().isoformat()
+                })
+            else:
+                self.print_agent_message(response["display_message"])
+            return response["display_message"]
+
+        except Exception as e:
+            error_details = f"Session error: {str(e)}"
+            self.logger.error(error_details)
+            self.print_agent_message(
+                "I encountered an error processing your message.\n"
+                f"Details: {error_details}\n"
+                "Please try again or rephrase your request."
+            )
+            return None
+
+    def _invoke_llm(self, messages: List[Any]) -> Dict:
+        """Invoke the bound LLM (through the response cache, if configured) and extract the response."""
+        key = self._cache_key(messages)
+        if key is not None:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return cached
+        with metrics.timer("llm_invoke") as m:
+            response = self.bound_llm.invoke(messages)
+            m.update(usage_counts(response))
+        response_data = self._extract_llm_response(response)
+        if key is not None:
+            self.response_cache.set(key, response_data)
+        return response_data
+
+    async def _ainvoke_llm(self, messages: List[Any]) -> Dict:
+        key = self._cache_key(messages)
+        if key is not None:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return cached
+        with metrics.timer("llm_invoke") as m:
+            response = await self.bound_llm.ainvoke(messages)
+            m.update(usage_counts(response))
+        response_data = self._extract_llm_response(response)
+        if key is not None:
+            self.response_cache.set(key, response_data)
+        return response_data
+
+    def _cache_key(self, messages: List[Any]) -> Optional[str]:
+        """Response cache key for this call, or None if caching does not apply."""
+        if self.response_cache is None:
+            return None
+        temperature = getattr(self.llm, 'temperature', None)
+        if not self.response_cache.is_cacheable(temperature):
+            return None
+        model = getattr(self.llm, 'model_name', None) or getattr(self.llm, 'model', None) or type(self.llm).__name__
+        tool_schemas = [self.tool_provider.prepare_tool_call(tool) for tool in self.tools] if self.tools else []
+        return make_cache_key(messages, model, temperature, tool_schemas)
+
     def _extract_llm_response(self, response: Any) -> Dict:
         """Extract structured response from LLM output"""
         try:
@@ -472,6 +807,10 @@ class AgentCore(Generic[StateType, ResponseType]):
                     'tool_used': True,
                     'tool_name': response.tool_calls[0].get('name'),
                     'tool_args': response.tool_calls[0].get('args', {}),
+                    'tool_calls': [
+                        {'name': call.get('name'), 'args': call.get('args', {}), 'id': call.get('id')}
+                        for call in response.tool_calls
+                    ],
                     'message': response.content if hasattr(response, 'content') else "Using tool to analyze..."
                 }
                 return tool_result
@@ -488,28 +827,20 @@ class AgentCore(Generic[StateType, ResponseType]):
 
     def _add_to_conversation_history(self, message: Dict):
         """Helper method to add messages to conversation history"""
+        if self.history_manager is not None:
+            message = self.history_manager.prepare_entry(message)
         self.state.conversation_history.append(message)
         if self.debug_mode:
-            self.logger.debug(f"[DEBUG] Adding to history: {message}")
+            self.logger.debug("[DEBUG] Adding to history: %s", message)
 
     def get_state(self) -> AgentState:
         """Get current state"""
-        # Return a deep copy of the state
-        return AgentState(
-            conversation_history=self.state.conversation_history.copy(),
-            tool_outputs=self.state.tool_outputs.copy(),
-            errors=self.state.errors.copy(),
-            metadata=self.state.metadata.copy()
-        )
+        # Return a deep copy of the state (tool functions may still be writing to the live one)
+        return self.state.model_copy(deep=True)
 
     def _get_default_tool_provider(self) -> "ToolProvider":
-        """Get default tool provider based on LLM type"""
-        if isinstance(self.llm, ChatAnthropic):
-            return AnthropicToolProvider()
-        elif isinstance(self.llm, ChatOpenAI):
-            return OpenAIToolProvider()
-        else:
-            raise ValueError(f"No default tool provider for LLM type: {type(self.llm)}")
+        """Get default tool provider based on LLM type (see register_tool_provider)"""
+        return tool_provider_for(self.llm)
 
     def _format_response_for_display(self, response_data: Dict) -> str:
         """Format the response data into a human-readable string"""
@@ -562,24 +893,65 @@ class AgentCore(Generic[StateType, ResponseType]):
         Directly invokes the LLM with the provided messages list and returns the structured response.
         """
         try:
-            # Log the messages being sent
-            if self.debug_mode:
-                self.logger.debug("[DEBUG] Zero-shot messages sent to LLM:\n" + json.dumps(messages, indent=2, ensure_ascii=False))
-            llm_response = self.bound_llm.invoke(messages)
-            response_data = self._extract_llm_response(llm_response)
-            return {
-                "type": MessageType.TOOL_CALL if response_data['tool_used'] else MessageType.CONVERSATION,
-                "display_message": response_data['message'],
-                "tool_details": {
-                    "name": response_data['tool_name'],
-                    "args": response_data['tool_args']
-                } if response_data['tool_used'] else None
-            }
+            self._log_zero_shot_messages(messages)
+            return self._build_response(self._invoke_llm(messages))
         except Exception as e:
-            error_msg = f"Error processing message: {str(e)}"
-            self.logger.error(error_msg)
-            return {
-                "type": MessageType.ERROR,
-                "display_message": f"An error occurred: {str(e)}",
-                "error_details": error_msg
-            }
\ No newline at end of file
+            return self._zero_shot_error(e)
+
+    async def ainvoke_with_message_list(self, messages: List[Dict]) -> Dict:
+        """
+        Async version of invoke_with_message_list (stateless, zero-shot), built on bound_llm.ainvoke.
+        """
+        try:
+            self._log_zero_shot_messages(messages)
+            return self._build_response(await self._ainvoke_llm(messages))
+        except Exception as e:
+            return self._zero_shot_error(e)
+
+    def _log_zero_shot_messages(self, messages: List[Dict]) -> None:
+        # Log the messages being sent
+        if self.debug_mode:
+            self.logger.debug("[DEBUG] Zero-shot messages sent to LLM:\n%s", lazy_json(list(messages)))
+
+    def _zero_shot_error(self, e: Exception) -> Dict:
+        error_msg = f"Error processing message: {str(e)}"
+        self.logger.error(error_msg)
+        return {
+            "type": MessageType.ERROR,
+            "display_message": f"An error occurred: {str(e)}",
+            "error_details": error_msg
+        }
+
+
+class AgentPool:
+    """
+    Pool of reusable AgentCore instances built by `factory`. acquire() hands out an idle agent (or builds a new
+    one) after reset(), and takes it back afterwards; at most max_idle agents are kept.
+
+    Használat:
+        pool = AgentPool(lambda: AgentCore(llm, tools, prompt, should_initiate=False))
+        with pool.acquire(shared_context=ctx) as agent:
+            agent.handle_user_message("Proceed")
+    """
+    def __init__(self, factory: Callable[[], AgentCore], max_idle: int = 4):
+        self.factory = factory
+        self.max_idle = max_idle
+        self.created = 0
+        self._idle: List[AgentCore] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, system_prompt: Optional[str] = None, shared_context: Optional[Any] = None):
+        with self._lock:
+            agent = self._idle.pop() if self._idle else None
+        if agent is None:
+            agent = self.factory()
+            with self._lock:
+                self.created += 1
+        agent.reset(system_prompt, shared_context)
+        try:
+            yield agent
+        finally:
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(agent)
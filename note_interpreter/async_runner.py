@@ -0,0 +1,50 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable, List
+
+from note_interpreter.log import log
+from note_interpreter.models import NoteBatch
+
+BatchWorker = Callable[[NoteBatch], Awaitable[Any]]
+
+
+class AsyncBatchRunner:
+    """
+    Runs an async worker over many NoteBatch objects concurrently.
+    - The worker is any `async def worker(batch) -> result` (pl. ClarifyAndScoreAgent.arun köré írt wrapper).
+    - At most `max_concurrency` batches are in flight at once (asyncio.Semaphore).
+    - Results come back in input order; a failing batch yields its exception instead of stopping the others.
+
+    Használat:
+        runner = AsyncBatchRunner(clarify_and_score_worker(agent), max_concurrency=8)
+        results = runner.run(batches)
+    """
+    def __init__(self, worker: BatchWorker, max_concurrency: int = 4):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.worker = worker
+        self.max_concurrency = max_concurrency
+
+    async def arun(self, batches: Iterable[NoteBatch]) -> List[Any]:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_one(index: int, batch: NoteBatch) -> Any:
+            async with semaphore:
+                try:
+                    return await self.worker(batch)
+                except Exception as e:
+                    log.error(f"[AsyncBatchRunner] Batch {index} failed: {e}")
+                    return e
+
+        return await asyncio.gather(*(run_one(i, b) for i, b in enumerate(batches)))
+
+    def run(self, batches: Iterable[NoteBatch]) -> List[Any]:
+        """Blocking entry point for callers without an event loop."""
+        return asyncio.run(self.arun(batches))
+
+
+def clarify_and_score_worker(agent) -> BatchWorker:
+    """Adapts a ClarifyAndScoreAgent to the NoteBatch -> result worker signature."""
+    async def worker(batch: NoteBatch) -> List[dict]:
+        notes = [note.raw_input for note in batch.notes]
+        return await agent.arun(notes, batch.user_memory)
+    return worker
@@ -0,0 +1,63 @@
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from note_interpreter.agent_core import ToolProvider
+
+# backend név -> factory(model, temperature, **options) -> (llm, tool_provider)
+BackendFactory = Callable[..., Tuple[Any, Optional[ToolProvider]]]
+
+DEFAULT_MODEL = "gpt-4.1-mini"
+BACKEND_ENV_VAR = "NOTE_INTERPRETER_LLM_BACKEND"
+
+_backends: Dict[str, BackendFactory] = {}
+
+
+def register_backend(name: str, factory: Optional[BackendFactory] = None):
+    """
+    Register an LLM backend; usable directly or as a decorator.
+    Használat:
+        @register_backend("local")
+        def local_backend(model, temperature, **options):
+            return MyChatModel(...), MyToolProvider()
+    """
+    def decorator(func: BackendFactory) -> BackendFactory:
+        _backends[name] = func
+        return func
+    return decorator(factory) if factory is not None else decorator
+
+
+def available_backends() -> List[str]:
+    return sorted(_backends)
+
+
+def default_backend() -> str:
+    """Backend used when none is given: $NOTE_INTERPRETER_LLM_BACKEND, or "openai"."""
+    return os.getenv(BACKEND_ENV_VAR, "openai")
+
+
+def create_llm(backend: Optional[str] = None, model: Optional[str] = None, temperature: float = 0.0,
+               **options) -> Tuple[Any, Optional[ToolProvider]]:
+    """LLM + matching tool provider (None -> AgentCore picks the registered default) for a backend name."""
+    backend = backend or default_backend()
+    if backend not in _backends:
+        raise ValueError(f"Unknown LLM backend: {backend} (available: {', '.join(available_backends())})")
+    return _backends[backend](model=model, temperature=temperature, **options)
+
+
+@register_backend("openai")
+def openai_backend(model: Optional[str] = None, temperature: float = 0.0, **options):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=model or DEFAULT_MODEL, openai_api_key=os.getenv("OPENAI_API_KEY"), temperature=temperature, **options), None
+
+
+@register_backend("anthropic")
+def anthropic_backend(model: Optional[str] = None, temperature: float = 0.0, **options):
+    from langchain_anthropic import ChatAnthropic
+    return ChatAnthropic(model=model or "claude-3-5-haiku-latest", temperature=temperature, **options), None
+
+
+@register_backend("fake")
+def fake_backend(model: Optional[str] = None, temperature: float = 0.0, **options):
+    """Offline deterministic model; options: latency_s, jitter_s, seed, ask_user_rounds, ask_user_threshold, script."""
+    from note_interpreter.fake_llm import DeterministicFakeChatModel, FakeToolProvider
+    return DeterministicFakeChatModel(temperature=temperature, **options), FakeToolProvider()
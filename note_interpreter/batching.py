@@ -0,0 +1,89 @@
+from typing import Any, Iterable, Iterator, List, Optional, Sequence
+
+from note_interpreter.log import log
+from note_interpreter.models import Note
+
+_encoder = None
+
+
+def _get_encoder():
+    """tiktoken encoder if available (langchain-openai pulls it in), otherwise None -> heuristic."""
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encoder = False
+    return _encoder or None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of text (tiktoken o200k_base, or ~4 characters per token without tiktoken)."""
+    if not text:
+        return 0
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+class TokenBudgetBatcher:
+    """
+    Packs notes into batches whose rendered prompt fits a token budget.
+    Cost of one batch = fixed_tokens (the prompt rendered without notes: static sections, user memory,
+    classification, parameters, section headers) + sum(note tokens + per_note_overhead + output_tokens_per_note). Notes keep their order; a note that alone exceeds the budget gets a batch
+    of its own (with a warning) instead of being dropped.
+
+    Használat:
+        batcher = TokenBudgetBatcher.for_prompt_config("resources/single_agent/prompt_config.yaml", 8000, context)
+        for notes in batcher.pack(all_notes):
+            ...
+    """
+    def __init__(self, max_prompt_tokens: int, fixed_tokens: int = 0, per_note_overhead: int = 4,
+                 output_tokens_per_note: int = 0, max_notes_per_batch: Optional[int] = None):
+        if max_prompt_tokens <= fixed_tokens:
+            raise ValueError(f"max_prompt_tokens ({max_prompt_tokens}) must exceed the fixed prompt cost ({fixed_tokens})")
+        self.max_prompt_tokens = max_prompt_tokens
+        self.fixed_tokens = fixed_tokens
+        self.per_note_overhead = per_note_overhead
+        self.output_tokens_per_note = output_tokens_per_note
+        self.max_notes_per_batch = max_notes_per_batch
+
+    @classmethod
+    def for_prompt(cls, static_prompt: str, max_prompt_tokens: int, memory: Sequence[str] = (), **kwargs) -> 'TokenBudgetBatcher':
+        memory_tokens = sum(estimate_tokens(m) + 2 for m in memory)
+        return cls(max_prompt_tokens, fixed_tokens=estimate_tokens(static_prompt) + memory_tokens, **kwargs)
+
+    @classmethod
+    def for_prompt_config(cls, config_path: str, max_prompt_tokens: int, context: dict, **kwargs) -> 'TokenBudgetBatcher':
+        """
+        Fixed cost of the compiled prompt rendered with the real context and no notes, so the context-dependent
+        sections (classification, parameters, memory, input headers) are counted too.
+        context: the prompt context (see llm_agent.build_prompt_context); its "notes" are ignored.
+        """
+        from note_interpreter.prompt_builder import PromptBuilder
+        prompt = PromptBuilder.compile(config_path).render({**context, "notes": []}, static_first=True)
+        return cls(max_prompt_tokens, fixed_tokens=estimate_tokens(prompt), **kwargs)
+
+    def note_cost(self, note: Any) -> int:
+        text = note.raw_input if isinstance(note, Note) else str(note)
+        return estimate_tokens(text) + self.per_note_overhead + self.output_tokens_per_note
+
+    def pack(self, notes: Iterable[Any]) -> Iterator[List[Any]]:
+        """Greedy, order-preserving packing of notes (Note objects or strings) into budget-sized lists."""
+        budget = self.max_prompt_tokens - self.fixed_tokens
+        batch: List[Any] = []
+        used = 0
+        for note in notes:
+            cost = self.note_cost(note)
+            full = self.max_notes_per_batch is not None and len(batch) >= self.max_notes_per_batch
+            if batch and (used + cost > budget or full):
+                yield batch
+                batch, used = [], 0
+            if cost > budget:
+                log.warning(f"[TokenBudgetBatcher] Note needs {cost} tokens, budget per batch is {budget}; sending it alone")
+            batch.append(note)
+            used += cost
+        if batch:
+            yield batch
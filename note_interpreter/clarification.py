@@ -0,0 +1,206 @@
+# Clarification broker: a kérdés-válasz kör nem blokkolja a folyamatot.
+# The agent submits its questions together with the state it needs to continue, gets a PendingClarification
+# handle back and returns; whoever has the answer (CLI, server endpoint, UI) calls broker.answer(), and the agent
+# is resumed from the stored state. The console broker keeps the old interactive input() behaviour.
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class PendingClarification(BaseModel):
+    """
+    Handle for one suspended clarification request: the questions, the answer (once given) and the
+    JSON-serialisable state the agent resumes from.
+    """
+    request_id: str = Field(..., description="Unique id of the request; pass it to answer() / resume().")
+    batch_id: Optional[str] = Field(None, description="Batch (or session) the request belongs to.")
+    questions: List[str] = Field(default_factory=list, description="Questions shown to the user.")
+    prompt: str = Field("", description="Short input prompt for interactive front-ends.")
+    state: Dict[str, Any] = Field(default_factory=dict, description="Agent state needed to resume.")
+    answer: Optional[str] = Field(None, description="The user's free-form answer; None while pending.")
+    created_at: str = Field(default_factory=lambda: datetime.now().isoformat())
+
+    @property
+    def answered(self) -> bool:
+        return self.answer is not None
+
+
+class ClarificationPending(Exception):
+    """Raised by helpers that cannot return a handle themselves (the answer is not there yet)."""
+    def __init__(self, pending: PendingClarification):
+        super().__init__(f"Waiting for clarification {pending.request_id}")
+        self.pending = pending
+
+    def __reduce__(self):
+        # Picklable with its handle, so it can cross a ProcessPoolExecutor boundary
+        return (ClarificationPending, (self.pending,))
+
+
+class ClarificationBroker(ABC):
+    """
+    Base class: request lifecycle on top of four storage hooks (_save, _load, _delete, _list).
+    Használat:
+        pending = broker.submit(["Which John?"], state={...}, batch_id="batch-7")
+        ...                                  # later, from another request / process
+        broker.answer(pending.request_id, "John Smith")
+        agent.resume(pending.request_id)
+    """
+
+    def submit(self, questions: List[str], state: Optional[Dict[str, Any]] = None, batch_id: Optional[str] = None,
+               prompt: str = "") -> PendingClarification:
+        pending = PendingClarification(request_id=uuid.uuid4().hex, batch_id=batch_id, questions=list(questions),
+                                       prompt=prompt, state=state or {})
+        self._save(pending)
+        return pending
+
+    def answer(self, request_id: str, response: str) -> PendingClarification:
+        pending = self.get(request_id)
+        pending.answer = response
+        self._save(pending)
+        return pending
+
+    def get(self, request_id: str) -> PendingClarification:
+        pending = self._load(request_id)
+        if pending is None:
+            raise ValueError(f"Unknown clarification request: {request_id}")
+        return pending
+
+    def get_answer(self, request_id: str) -> Optional[str]:
+        return self.get(request_id).answer
+
+    def requests(self, batch_id: Optional[str] = None) -> List[PendingClarification]:
+        """All open requests, answered or not (optionally only for one batch), oldest first."""
+        return self._list(batch_id)
+
+    def pending(self, batch_id: Optional[str] = None) -> List[PendingClarification]:
+        """Unanswered requests (optionally only for one batch), oldest first."""
+        return [p for p in self._list(batch_id) if not p.answered]
+
+    def resolve(self, request_id: str) -> None:
+        """Forget a request once the agent has resumed from it."""
+        self._delete(request_id)
+
+    # Storage hooks
+    @abstractmethod
+    def _save(self, pending: PendingClarification) -> None:
+        pass
+
+    @abstractmethod
+    def _load(self, request_id: str) -> Optional[PendingClarification]:
+        pass
+
+    @abstractmethod
+    def _delete(self, request_id: str) -> None:
+        pass
+
+    @abstractmethod
+    def _list(self, batch_id: Optional[str]) -> List[PendingClarification]:
+        """Requests of the batch (all batches if None), oldest first."""
+        pass
+
+
+class InMemoryClarificationBroker(ClarificationBroker):
+    """Process-local broker (tests, single-process servers)."""
+
+    def __init__(self):
+        self._requests: Dict[str, PendingClarification] = {}
+        self._lock = threading.Lock()
+
+    def _save(self, pending: PendingClarification) -> None:
+        with self._lock:
+            self._requests[pending.request_id] = pending.model_copy(deep=True)
+
+    def _load(self, request_id: str) -> Optional[PendingClarification]:
+        with self._lock:
+            pending = self._requests.get(request_id)
+        return pending.model_copy(deep=True) if pending is not None else None
+
+    def _delete(self, request_id: str) -> None:
+        with self._lock:
+            self._requests.pop(request_id, None)
+
+    def _list(self, batch_id: Optional[str]) -> List[PendingClarification]:
+        with self._lock:
+            requests = list(self._requests.values())
+        return [p.model_copy(deep=True) for p in requests if batch_id is None or p.batch_id == batch_id]
+
+
+class ConsoleClarificationBroker(InMemoryClarificationBroker):
+    """
+    Interactive default: answers every request on submit with input() (the pre-broker behaviour).
+    ask: optional replacement for input, called with the request.
+    """
+
+    def __init__(self, ask: Optional[Callable[[PendingClarification], str]] = None):
+        super().__init__()
+        self.ask = ask
+
+    def submit(self, questions: List[str], state: Optional[Dict[str, Any]] = None, batch_id: Optional[str] = None,
+               prompt: str = "") -> PendingClarification:
+        pending = super().submit(questions, state, batch_id, prompt)
+        response = self.ask(pending) if self.ask is not None else input(pending.prompt or "Your answer: ")
+        return self.answer(pending.request_id, response)
+
+
+class SQLiteClarificationBroker(ClarificationBroker):
+    """
+    Local persistent broker: one SQLite file, safe to share between worker processes and restarts.
+    A connection is opened per operation, so the broker itself is picklable.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS clarifications ("
+                "request_id TEXT PRIMARY KEY, batch_id TEXT, created_at TEXT, payload TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS clarifications_batch ON clarifications (batch_id)")
+
+    @contextmanager
+    def _connect(self):
+        # Egy tranzakció: commit a végén (rollback hibánál), a kapcsolat mindig lezárul
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _save(self, pending: PendingClarification) -> None:
+        payload = json.dumps(pending.model_dump(), ensure_ascii=False, default=str)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO clarifications (request_id, batch_id, created_at, payload) VALUES (?, ?, ?, ?)",
+                (pending.request_id, pending.batch_id, pending.created_at, payload),
+            )
+
+    def _load(self, request_id: str) -> Optional[PendingClarification]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT payload FROM clarifications WHERE request_id = ?", (request_id,)).fetchone()
+        return PendingClarification(**json.loads(row[0])) if row else None
+
+    def _delete(self, request_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM clarifications WHERE request_id = ?", (request_id,))
+
+    def _list(self, batch_id: Optional[str]) -> List[PendingClarification]:
+        with self._connect() as conn:
+            if batch_id is None:
+                rows = conn.execute("SELECT payload FROM clarifications ORDER BY created_at").fetchall()
+            else:
+                rows = conn.execute("SELECT payload FROM clarifications WHERE batch_id = ? ORDER BY created_at",
+                                    (batch_id,)).fetchall()
+        return [PendingClarification(**json.loads(row[0])) for row in rows]
@@ -1,10 +1,12 @@
-from note_interpreter.agent_core import AgentCore, BaseSharedContext, ToolDefinition
+from note_interpreter.agent_core import AgentCore, AgentPool, BaseSharedContext, ToolDefinition, ToolProvider
 from typing import List, Dict, Any, Optional
 import os
 import json
-from langchain_openai import ChatOpenAI
+from note_interpreter.backends import create_llm
+from note_interpreter.batching import TokenBudgetBatcher
 from note_interpreter.prompt_builder import PromptBuilder
-from note_interpreter.log import log
+from note_interpreter.log import log, lazy_json
+from note_interpreter.metrics import metrics
 import logging
 
 # Helper: default tool definition (példa)
@@ -55,28 +57,69 @@ class ClarifyAndScoreAgent:
     Context-driven agent wrapper, master plan architektúra szerint.
     Minden context explicit paraméterként megy át, nincs implicit state.
     The prompt must be built using PromptBuilder and passed in at instantiation.
+    AgentCore instances (with their bound llm) are pooled and reused across runs; pool_size idle ones are kept.
     """
-    def __init__(self, prompt: str, tools: Optional[List[ToolDefinition]] = None, config: Optional[Dict[str, Any]] = None, prompt_version: Optional[str] = None, debug_mode: bool = False):
+    def __init__(self, prompt: str, tools: Optional[List[ToolDefinition]] = None, config: Optional[Dict[str, Any]] = None, prompt_version: Optional[str] = None, debug_mode: bool = False, llm: Optional[Any] = None, tool_provider: Optional[ToolProvider] = None, pool_size: int = 4):
         self.config = config or {}
         self.prompt_version = prompt_version
         self.debug_mode = debug_mode
-        # LLM példányosítás (configból vagy default)
-        model = self.config.get("model", "gpt-4.1-mini")
-        temperature = self.config.get("temperature", 0.0)
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        self.llm = ChatOpenAI(model=model, openai_api_key=openai_api_key, temperature=temperature)
+        # LLM példányosítás (configból a backend registry-n át, vagy default)
+        if llm is None:
+            llm, backend_tool_provider = create_llm(
+                self.config.get("backend"), self.config.get("model"), self.config.get("temperature", 0.0),
+                **self.config.get("backend_options", {})
+            )
+            tool_provider = tool_provider or backend_tool_provider
+        self.llm = llm
+        self.tool_provider = tool_provider
         # Toolok betöltése
         self.tools = tools if tools is not None else get_default_tools()
         # Prompt must be provided (built with PromptBuilder)
         self.prompt = prompt
+        self.agent_pool = AgentPool(self._new_agent_core, max_idle=pool_size)
 
     def run(self, notes: List[str], user_memory: List[str], clarification_history: Optional[List[Dict[str, Any]]] = None, pipeline_state: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         Fő belépési pont: minden context explicit paraméterként.
         Output: master plan szerinti NoteOutput lista (dict-ekkel)
         """
+        return self._run(notes, user_memory, clarification_history, pipeline_state)
+
+    def _run(self, notes, user_memory, clarification_history, pipeline_state, id_offset: int = 0) -> List[Dict[str, Any]]:
+        # id_offset: a batch első jegyzetének globális indexe (run_batched), a fallback id-khez
+        shared_context = self._create_shared_context(notes, user_memory, clarification_history, pipeline_state)
+        with self.agent_pool.acquire(shared_context=shared_context) as agent_core:
+            agent_core.initiate()
+            # Futtatás
+            output = agent_core.handle_user_message("Proceed")
+        return self._finish_run(output, id_offset)
+
+    async def arun(self, notes: List[str], user_memory: List[str], clarification_history: Optional[List[Dict[str, Any]]] = None, pipeline_state: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Async version of run(): the LLM round-trips are awaited, so many runs can share one event loop.
+        """
+        shared_context = self._create_shared_context(notes, user_memory, clarification_history, pipeline_state)
+        with self.agent_pool.acquire(shared_context=shared_context) as agent_core:
+            await agent_core.ainitiate()
+            output = await agent_core.ahandle_user_message("Proceed")
+        return self._finish_run(output)
+
+    def run_batched(self, notes: List[str], user_memory: List[str], max_prompt_tokens: int, clarification_history: Optional[List[Dict[str, Any]]] = None, pipeline_state: Optional[Dict[str, Any]] = None, **batcher_kwargs) -> List[Dict[str, Any]]:
+        """
+        run() over token-budget sized note batches (the fixed cost is this agent's prompt + user memory).
+        Results are concatenated in note order; fallback ids ("note_<n>") are numbered across all batches.
+        """
+        batcher = TokenBudgetBatcher.for_prompt(self.prompt, max_prompt_tokens, user_memory, **batcher_kwargs)
+        results = []
+        offset = 0
+        for batch in batcher.pack(notes):
+            results.extend(self._run(batch, user_memory, clarification_history, pipeline_state, id_offset=offset))
+            offset += len(batch)
+        return results
+
+    def _create_shared_context(self, notes, user_memory, clarification_history, pipeline_state) -> BaseSharedContext:
         # Shared context összeállítása
-        shared_context = BaseSharedContext(
+        return BaseSharedContext(
             notes=notes,
             user_memory=user_memory,
             clarification_history=clarification_history or [],
@@ -84,28 +127,29 @@ class ClarifyAndScoreAgent:
             config=self.config,
             prompt_version=self.prompt_version
         )
-        # AgentCore példányosítása
-        agent_core = AgentCore(
+
+    def _new_agent_core(self) -> AgentCore:
+        # AgentCore példányosítása (a kezdeti üzenetet a run/arun küldi el); a pool újrahasznosítja
+        return AgentCore(
             llm=self.llm,
             tools=self.tools,
             system_prompt=self.prompt,
-            shared_context=shared_context,
+            tool_provider=self.tool_provider,
+            should_initiate=False,
             debug_mode=self.debug_mode
         )
-        # Futtatás
-        output = agent_core.handle_user_message("Proceed")
-        # Log the raw output for debugging/inspection
-        import json as _json
-        try:
-            log.info("Raw agent_core output: " + _json.dumps(output, ensure_ascii=False, indent=2))
-        except Exception:
-            log.info(f"Raw agent_core output (non-serializable): {output}")
+
+    def _finish_run(self, output: Dict, id_offset: int = 0) -> List[Dict[str, Any]]:
+        # Log the raw output for debugging/inspection (serialized only if the record is emitted)
+        log.info("Raw agent_core output: %s", lazy_json(output))
         # Output validáció és mapping
-        return self._map_and_validate_output(output)
+        return self._map_and_validate_output(output, id_offset)
 
-    def _map_and_validate_output(self, output: Any) -> List[Dict[str, Any]]:
+    @metrics.instrument("output_validate")
+    def _map_and_validate_output(self, output: Any, id_offset: int = 0) -> List[Dict[str, Any]]:
         """
         Output validáció és mapping a master plan szerinti NoteOutput sémára.
+        id_offset: a hiányzó id-k (note_<n>) számozása ennyivel eltolva kezdődik.
         """
         # Elvárt mezők a master plan szerint
         required_fields = [
@@ -133,7 +177,7 @@ class ClarifyAndScoreAgent:
                     mapped[field] = "UNDEFINED"
             # id generálás fallback
             if mapped["id"] == "UNDEFINED":
-                mapped["id"] = f"note_{i+1}"
+                mapped["id"] = f"note_{id_offset + i + 1}"
             validated.append(mapped)
         if not validated:
             # Ha semmi nincs, dobjunk warningot
@@ -0,0 +1,154 @@
+# Columnar (Parquet / Arrow) output for interpreted notes.
+# pyarrow is an optional dependency: pip install pyarrow
+from typing import Iterable, List, Optional
+
+from note_interpreter.models import DataEntry, Note
+
+# Alacsony kardinalitású mezők: dictionary encoding
+DICTIONARY_COLUMNS = ['entity_type', 'intent']
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet output requires pyarrow: pip install pyarrow") from e
+    return pyarrow, pyarrow.parquet
+
+
+def notes_schema():
+    pa, _ = _require_pyarrow()
+    return pa.schema([
+        ('raw_input', pa.string()),
+        ('interpreted_text', pa.string()),
+        ('clarity_score', pa.int32()),
+        ('entity_type', pa.dictionary(pa.int32(), pa.string())),
+        ('intent', pa.dictionary(pa.int32(), pa.string())),
+    ])
+
+
+def entries_schema():
+    pa, _ = _require_pyarrow()
+    return pa.schema([
+        ('raw_text', pa.string()),
+        ('interpreted_text', pa.string()),
+        ('entity_type', pa.dictionary(pa.int32(), pa.string())),
+        ('intent', pa.dictionary(pa.int32(), pa.string())),
+        ('clarity_score', pa.int32()),
+    ])
+
+
+def _build_table(columns: dict, schema):
+    pa, _ = _require_pyarrow()
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def notes_to_table(notes: List[Note]):
+    """Build typed columns for a list of Note objects in one pass per column."""
+    return _build_table({
+        'raw_input': [n.raw_input for n in notes],
+        'interpreted_text': [n.interpreted_text for n in notes],
+        'clarity_score': [n.clarity_score for n in notes],
+        'entity_type': [n.metadata.get('entity_type', '') for n in notes],
+        'intent': [n.metadata.get('intent', '') for n in notes],
+    }, notes_schema())
+
+
+def entries_to_table(entries: List[DataEntry]):
+    return _build_table({
+        'raw_text': [e.raw_text for e in entries],
+        'interpreted_text': [e.interpreted_text for e in entries],
+        'entity_type': [e.entity_type for e in entries],
+        'intent': [e.intent for e in entries],
+        'clarity_score': [e.clarity_score for e in entries],
+    }, entries_schema())
+
+
+def write_notes_parquet(notes: List[Note], path: str) -> None:
+    _, pq = _require_pyarrow()
+    pq.write_table(notes_to_table(notes), path, use_dictionary=DICTIONARY_COLUMNS)
+
+
+def read_notes_parquet(path: str) -> List[Note]:
+    _, pq = _require_pyarrow()
+    table = pq.read_table(path, read_dictionary=DICTIONARY_COLUMNS)
+    columns = {name: table.column(name).to_pylist() for name in table.column_names}
+    return [
+        Note(
+            raw_input=raw_input,
+            interpreted_text=interpreted_text,
+            clarity_score=clarity_score,
+            metadata={'entity_type': entity_type, 'intent': intent}
+        )
+        for raw_input, interpreted_text, clarity_score, entity_type, intent in zip(
+            columns['raw_input'], columns['interpreted_text'], columns['clarity_score'],
+            columns['entity_type'], columns['intent']
+        )
+    ]
+
+
+def write_entries_parquet(entries: List[DataEntry], path: str) -> None:
+    _, pq = _require_pyarrow()
+    pq.write_table(entries_to_table(entries), path, use_dictionary=DICTIONARY_COLUMNS)
+
+
+def read_entries_parquet(path: str) -> List[DataEntry]:
+    _, pq = _require_pyarrow()
+    table = pq.read_table(path, read_dictionary=DICTIONARY_COLUMNS)
+    return [DataEntry(**row) for row in table.to_pylist()]
+
+
+class ParquetNoteWriter:
+    """
+    Streaming Parquet counterpart of io.StreamingNoteWriter: each write_batch() call becomes one row group.
+    Parquet files cannot be appended to after close, so resume is not supported.
+    """
+    def __init__(self, path: str, flush_every: int = 1, resume: bool = False, **_ignored):
+        if resume:
+            raise ValueError("resume is only supported for CSV output")
+        _, pq = _require_pyarrow()
+        self.path = path
+        self.flush_every = flush_every
+        self.committed_offset = 0
+        self._writer = pq.ParquetWriter(path, notes_schema(), use_dictionary=DICTIONARY_COLUMNS)
+        self._buffer: List[Note] = []
+        self._pending_notes = 0
+        self._pending_batches = 0
+
+    def write_batch(self, notes: Iterable[Note], consumed: Optional[int] = None, suspended: Optional[dict] = None) -> None:
+        # suspended: elfogadjuk az interfész miatt; resume és sor-újraírás nincs, így nem tároljuk
+        notes = list(notes)
+        self._buffer.extend(notes)
+        self._pending_notes += len(notes) if consumed is None else consumed
+        self._pending_batches += 1
+        if self._pending_batches >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._writer.write_table(notes_to_table(self._buffer))
+        self.committed_offset += self._pending_notes
+        self._buffer = []
+        self._pending_notes = 0
+        self._pending_batches = 0
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+from note_interpreter.agent_core import ToolDefinition, ToolProvider, register_tool_provider
+
+NOTES_HEADER = "### Current Notes:\n"
+
+# A hívásszámlálók / rng védelme (modul szintű, hogy a modell picklable maradjon)
+_state_lock = threading.Lock()
+
+# Egyszerű szabályok az entity_type / intent becsléshez
+ACTION_VERBS = ("buy", "call", "email", "send", "write", "draft", "continue", "finish", "fix", "book", "pay")
+
+
+def extract_notes_from_prompt(prompt: str) -> List[str]:
+    """Recover the notes listed by the input_context prompt section."""
+    start = prompt.find(NOTES_HEADER)
+    if start == -1:
+        return []
+    body = prompt[start + len(NOTES_HEADER):]
+    end = body.find("\n\n")
+    if end != -1:
+        body = body[:end]
+    if body.strip() == "(none)":
+        return []
+    return [line.rstrip() for line in body.split("  \n") if line.strip()]
+
+
+def interpret_note(note: str) -> Dict[str, Any]:
+    """Deterministic, rule-based stand-in for the LLM interpretation of one note."""
+    text = note.strip()
+    first_word = text.split(" ", 1)[0].lower() if text else ""
+    if text.endswith("?"):
+        entity_type, intent = "question", "@THINK"
+    elif first_word in ACTION_VERBS:
+        entity_type, intent = "task", "@DO"
+    else:
+        entity_type, intent = "note", "@REFLECT"
+    digest = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+    return {
+        "raw_text": note,
+        "interpreted_text": text[:1].upper() + text[1:] if text else text,
+        "entity_type": entity_type,
+        "intent": intent,
+        "clarity_score": 50 + digest % 51,
+    }
+
+
+def _tool_call(name: str, args: Dict[str, Any], call_id: str) -> Dict[str, Any]:
+    return {"name": name, "args": args, "id": call_id}
+
+
+class DeterministicFakeChatModel(BaseChatModel):
+    """
+    Offline chat model for benchmarks, load tests and tests: reads the notes from the system prompt and answers
+    with tool calls, no network. Same input (and seed) -> same output.
+    - Rule-based (default): ask_user_rounds times an `ask_user` call about the notes whose interpret_note()
+      clarity_score is below ask_user_threshold, then a `finalize_notes` call. Rounds are counted per note set.
+    - Scripted: `script` is a list of responses used in call order (cycling), each
+      {"tool": name, "args": {...}} or {"content": "plain text"}.
+    - latency_s / jitter_s: injected delay per call (uniform jitter, seeded); async calls await it.
+    """
+    model_name: str = "fake-deterministic"
+    temperature: float = 0.0
+    latency_s: float = 0.0
+    jitter_s: float = 0.0
+    seed: int = 0
+    ask_user_rounds: int = 0
+    ask_user_threshold: int = 70
+    script: Optional[List[Dict[str, Any]]] = None
+    _rng: Any = PrivateAttr(default=None)
+    _calls: int = PrivateAttr(default=0)
+    _rounds: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    def _next_delay(self) -> float:
+        if not self.latency_s and not self.jitter_s:
+            return 0.0
+        with _state_lock:
+            if self._rng is None:
+                self._rng = random.Random(self.seed)
+            jitter = self._rng.uniform(-self.jitter_s, self.jitter_s) if self.jitter_s else 0.0
+        return max(0.0, self.latency_s + jitter)
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        with _state_lock:
+            call_index = self._calls
+            self._calls += 1
+        if self.script:
+            return self._scripted(self.script[call_index % len(self.script)], call_index)
+        prompt = "\n".join(str(m.content) for m in messages if m.type == "system")
+        notes = extract_notes_from_prompt(prompt)
+        interpreted = [interpret_note(n) for n in notes]
+        if self.ask_user_rounds:
+            unclear = [e["raw_text"] for e in interpreted if e["clarity_score"] < self.ask_user_threshold]
+            key = hashlib.sha256("\n".join(notes).encode("utf-8")).hexdigest()
+            with _state_lock:
+                rounds = self._rounds.get(key, 0)
+                ask = bool(unclear) and rounds < self.ask_user_rounds
+                if ask:
+                    self._rounds[key] = rounds + 1
+            if ask:
+                questions = [f"What do you mean by '{note}'?" for note in unclear]
+                return AIMessage(content="", tool_calls=[_tool_call("ask_user", {"questions": questions}, f"call_ask_user_{call_index}")])
+        return AIMessage(content="", tool_calls=[_tool_call(
+            "finalize_notes", {"entries": interpreted, "new_memory_points": []}, "call_finalize_notes"
+        )])
+
+    @staticmethod
+    def _scripted(step: Dict[str, Any], call_index: int) -> AIMessage:
+        if "tool" in step:
+            return AIMessage(content=step.get("content", ""), tool_calls=[
+                _tool_call(step["tool"], step.get("args", {}), f"call_{step['tool']}_{call_index}")
+            ])
+        return AIMessage(content=step.get("content", ""))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        delay = self._next_delay()
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        delay = self._next_delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-deterministic"
+
+
+class FakeToolProvider(ToolProvider):
+    """Tool provider for the fake chat models: the schemas are kept, the model itself is used unbound."""
+    def prepare_tool_call(self, tool: ToolDefinition) -> Dict:
+        return {"name": tool.name, "description": tool.description, "parameters": tool.schema}
+
+    def _bind_to_llm(self, llm: Any, tool_dicts: List[Dict]) -> Any:
+        return llm
+
+
+register_tool_provider(DeterministicFakeChatModel, FakeToolProvider)
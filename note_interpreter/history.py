@@ -0,0 +1,142 @@
+import json
+import os
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from note_interpreter.batching import estimate_tokens
+
+# (előző összefoglaló vagy None, újonnan kieső üzenetek) -> új összefoglaló
+Summarizer = Callable[[Optional[str], List[Dict]], str]
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+class ToolResultStore:
+    """
+    Out-of-band storage for large tool results; the conversation history only keeps a reference.
+    In memory by default, or one JSON file per result if a directory is given.
+    """
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._results: Dict[str, Any] = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def put(self, result: Any) -> str:
+        ref = uuid.uuid4().hex
+        if self.directory:
+            with open(os.path.join(self.directory, f"{ref}.json"), "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, default=str)
+        else:
+            self._results[ref] = result
+        return ref
+
+    def get(self, ref: str) -> Any:
+        if self.directory:
+            with open(os.path.join(self.directory, f"{ref}.json"), encoding="utf-8") as f:
+                return json.load(f)
+        return self._results[ref]
+
+
+def message_tokens(message: Dict) -> int:
+    """Estimated prompt tokens of one history entry (content + tool args/result)."""
+    tokens = estimate_tokens(str(message.get("content") or "")) + 4
+    for key in ("tool_args", "tool_result"):
+        if message.get(key) is not None:
+            tokens += estimate_tokens(json.dumps(message[key], ensure_ascii=False, default=str))
+    return tokens
+
+
+def llm_summarizer(llm: Any, max_words: int = 150) -> Summarizer:
+    """Summarizer that asks a chat model to fold the dropped turns into the running summary."""
+    def summarize(previous: Optional[str], dropped: List[Dict]) -> str:
+        turns = "\n".join(f"{m.get('role')}: {m.get('content')}" for m in dropped)
+        prompt = (
+            f"Update the running summary of a conversation in at most {max_words} words. "
+            f"Keep facts, decisions and open questions.\n\nCurrent summary:\n{previous or '(none)'}\n\nNew turns:\n{turns}"
+        )
+        return str(llm.invoke([{"role": "user", "content": prompt}]).content)
+    return summarize
+
+
+class HistoryManager:
+    """
+    Decides what part of AgentCore's conversation history is sent to the LLM.
+    - max_messages: sliding window over the non-system messages.
+    - max_tokens: oldest messages are dropped until the estimate fits; the leading system prompt is always kept.
+    - summarizer: dropped messages are folded (incrementally) into one summary message instead of being lost.
+    - Tool results larger than max_inline_tool_result_chars are moved to a ToolResultStore when recorded.
+    The full history stays in AgentState; only the view sent to the LLM is bounded.
+
+    Használat:
+        manager = HistoryManager(max_messages=20, max_tokens=6000, summarizer=llm_summarizer(llm))
+        agent = AgentCore(llm, tools, system_prompt, history_manager=manager)
+    """
+    def __init__(self, max_messages: Optional[int] = None, max_tokens: Optional[int] = None,
+                 summarizer: Optional[Summarizer] = None, tool_result_store: Optional[ToolResultStore] = None,
+                 max_inline_tool_result_chars: int = 2000):
+        if max_messages is not None and max_messages < 1:
+            raise ValueError("max_messages must be at least 1")
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        self.tool_results = tool_result_store or ToolResultStore()
+        self.max_inline_tool_result_chars = max_inline_tool_result_chars
+        # Az összefoglaló inkrementális: ennyi üzenet (a system prompt utáni indexig) van már benne
+        self._summary: Optional[str] = None
+        self._cut = 0
+
+    def prepare_entry(self, entry: Dict) -> Dict:
+        """Called when an entry is recorded: large tool results are stored out of band and referenced."""
+        result = entry.get("tool_result")
+        if result is None or "tool_result_ref" in entry:
+            return entry
+        serialized = json.dumps(result, ensure_ascii=False, default=str)
+        if len(serialized) <= self.max_inline_tool_result_chars:
+            return entry
+        ref = self.tool_results.put(result)
+        return {
+            **entry,
+            "tool_result": f"[tool result stored out of band: ref={ref}, {len(serialized)} chars] "
+                           f"{serialized[:200]}...",
+            "tool_result_ref": ref,
+        }
+
+    def resolve_tool_result(self, entry: Dict) -> Any:
+        """Full tool result of a history entry (loaded from the store if it was referenced)."""
+        if "tool_result_ref" in entry:
+            return self.tool_results.get(entry["tool_result_ref"])
+        return entry.get("tool_result")
+
+    def reset(self) -> None:
+        self._summary = None
+        self._cut = 0
+
+    def view(self, history: List[Dict]) -> List[Dict]:
+        """Messages to send to the LLM for the given full history."""
+        head = 1 if history and history[0].get("role") == "system" else 0
+        system, rest = history[:head], history[head:]
+        if self._cut > len(rest):
+            # Új (rövidebb) history: elölről kezdjük
+            self.reset()
+        cut = self._cut
+        if self.max_messages is not None:
+            cut = max(cut, len(rest) - self.max_messages)
+        if self.max_tokens is not None:
+            costs = [message_tokens(m) for m in rest]
+            budget = self.max_tokens - sum(message_tokens(m) for m in system)
+            summary_tokens = estimate_tokens(self._summary) + 4 if self._summary else 0
+            used = sum(costs[cut:]) + summary_tokens
+            # Az utolsó üzenetet (az aktuális kérdést) mindig elküldjük
+            while cut < len(rest) - 1 and used > budget:
+                used -= costs[cut]
+                cut += 1
+        if cut > self._cut:
+            if self.summarizer is not None:
+                self._summary = self.summarizer(self._summary, rest[self._cut:cut])
+            self._cut = cut
+        messages = list(system)
+        if self._summary:
+            messages.append({"role": "system", "content": SUMMARY_PREFIX + self._summary})
+        messages.extend(rest[self._cut:])
+        return messages
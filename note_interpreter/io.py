@@ -1,18 +1,27 @@
 import csv
-import yaml
-from typing import List
+import json
+import os
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
 from note_interpreter.models import Note, NoteBatch
+from note_interpreter.resources import resource_loader
 
 class InputHandler:
     @staticmethod
     def read_notes_csv(path: str) -> List[Note]:
-        notes = []
+        return list(InputHandler.iter_notes_csv(path))
+
+    @staticmethod
+    def iter_notes_csv(path: str, skip: int = 0) -> Iterator[Note]:
+        """Yield notes one by one instead of materializing the whole file. The first `skip` notes are passed over."""
         with open(path, newline='', encoding='utf-8') as csvfile:
             reader = csv.reader(csvfile)
             for row in reader:
                 if row and row[0].strip():
-                    notes.append(Note(raw_input=row[0].strip()))
-        return notes
+                    if skip:
+                        skip -= 1
+                        continue
+                    yield Note(raw_input=row[0].strip())
 
     @staticmethod
     def read_user_memory_md(path: str) -> List[str]:
@@ -26,8 +35,7 @@ class InputHandler:
 
     @staticmethod
     def read_classification_yaml(path: str) -> dict:
-        with open(path, encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return resource_loader.load(path)
 
     @staticmethod
     def load_batch(notes_csv: str, memory_md: str, class_yaml: str) -> NoteBatch:
@@ -36,33 +44,225 @@ class InputHandler:
         config = InputHandler.read_classification_yaml(class_yaml)
         return NoteBatch(notes=notes, user_memory=memory, classification_config=config)
 
+    @staticmethod
+    def iter_note_batches(notes_csv: str, memory_md: str, class_yaml: str, chunk_size: int = 1000, skip: int = 0,
+                          batcher=None) -> Iterator[NoteBatch]:
+        """
+        Stream the notes CSV as fixed-size NoteBatch chunks (the last one may be smaller).
+        Memory and classification config are read once and shared by every chunk;
+        peak memory is bounded by chunk_size, not by the file size.
+        skip: number of leading notes to pass over (e.g. already committed ones when resuming).
+        batcher: optional batching.TokenBudgetBatcher; chunks are then sized by prompt tokens instead of chunk_size.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        memory = InputHandler.read_user_memory_md(memory_md)
+        config = InputHandler.read_classification_yaml(class_yaml)
+        notes = InputHandler.iter_notes_csv(notes_csv, skip=skip)
+        if batcher is not None:
+            for chunk in batcher.pack(notes):
+                yield NoteBatch(notes=chunk, user_memory=memory, classification_config=config)
+            return
+        while True:
+            chunk = list(islice(notes, chunk_size))
+            if not chunk:
+                return
+            yield NoteBatch(notes=chunk, user_memory=memory, classification_config=config)
+
 class OutputGenerator:
+    # For MVP1, just write raw_input and placeholder columns
+    FIELDNAMES = ['raw_input', 'interpreted_text', 'clarity_score', 'entity_type', 'intent']
+
+    @staticmethod
+    def note_to_row(note: Note) -> dict:
+        return {
+            'raw_input': note.raw_input,
+            'interpreted_text': note.interpreted_text,
+            'clarity_score': note.clarity_score,
+            'entity_type': note.metadata.get('entity_type', ''),
+            'intent': note.metadata.get('intent', '')
+        }
+
     @staticmethod
     def write_notes_csv(notes: List[Note], path: str):
-        # For MVP1, just write raw_input and placeholder columns
-        fieldnames = ['raw_input', 'interpreted_text', 'clarity_score', 'entity_type', 'intent']
         with open(path, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.DictWriter(csvfile, fieldnames=OutputGenerator.FIELDNAMES)
             writer.writeheader()
-            for note in notes:
-                row = {
-                    'raw_input': note.raw_input,
-                    'interpreted_text': note.interpreted_text,
-                    'clarity_score': note.clarity_score,
-                    'entity_type': note.metadata.get('entity_type', ''),
-                    'intent': note.metadata.get('intent', '')
-                }
+            writer.writerows(OutputGenerator.note_to_row(note) for note in notes)
+
+class StreamingNoteWriter:
+    """
+    Incremental CSV writer for long runs.
+    - write_batch() appends the rows of one processed batch.
+    - Every `flush_every` batches the file is flushed (and fsync-ed), then a small JSON checkpoint is written
+      atomically with the number of committed input notes and the committed file size.
+    - resume=True continues from the checkpoint: the output is truncated back to the last committed size
+      (dropping rows of a half-written batch) and new rows are appended.
+    - write_batch(..., suspended={...}) marks a batch whose rows were written unresolved (e.g. waiting for a
+      clarification answer). The checkpoint keeps these shards in `suspended` (first row, row count, request id),
+      and rewrite_suspended() later replaces their rows in place once they are resolved.
+
+    Használat:
+        with StreamingNoteWriter("out.csv", resume=True) as writer:
+            for batch in InputHandler.iter_note_batches(..., skip=writer.committed_offset):
+                writer.write_batch(process(batch).notes)
+    """
+    def __init__(self, path: str, checkpoint_path: Optional[str] = None, flush_every: int = 1, resume: bool = False, fsync: bool = True):
+        if flush_every < 1:
+            raise ValueError("flush_every must be at least 1")
+        self.path = path
+        self.checkpoint_path = checkpoint_path or f"{path}.checkpoint.json"
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self.committed_offset = 0
+        # Kiírt adatsorok száma (fejléc nélkül) és a függő (feloldatlanul kiírt) shardok
+        self.committed_rows = 0
+        self.suspended: List[dict] = []
+        self._pending_notes = 0
+        self._pending_rows = 0
+        self._pending_batches = 0
+        checkpoint = self.read_checkpoint(self.checkpoint_path) if resume else None
+        if checkpoint and checkpoint.get('rewrite'):
+            self._finish_rewrite(checkpoint)
+        if checkpoint and os.path.exists(path):
+            self.committed_offset = checkpoint['offset']
+            self.committed_rows = checkpoint.get('rows', checkpoint['offset'])
+            self.suspended = checkpoint.get('suspended', [])
+            with open(path, 'r+b') as f:
+                f.truncate(checkpoint['bytes'])
+            self._file = open(path, 'a', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, fieldnames=OutputGenerator.FIELDNAMES)
+        else:
+            self._file = open(path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.DictWriter(self._file, fieldnames=OutputGenerator.FIELDNAMES)
+            self._writer.writeheader()
+            self.flush()
+
+    @staticmethod
+    def read_checkpoint(checkpoint_path: str) -> Optional[dict]:
+        if not os.path.exists(checkpoint_path):
+            return None
+        with open(checkpoint_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def write_batch(self, notes: List[Note], consumed: Optional[int] = None, suspended: Optional[dict] = None) -> None:
+        """
+        Append the rows of one processed batch.
+        consumed: number of input notes this batch covers (defaults to len(notes)); the checkpoint offset counts
+        input notes, so resuming skips exactly what was already processed.
+        suspended: the batch is written unresolved; the dict (at least a "request_id") is kept in the checkpoint
+        together with the batch's row range, for rewrite_suspended().
+        """
+        notes = list(notes)
+        if suspended is not None:
+            self.suspended.append({**suspended, 'row': self.committed_rows + self._pending_rows, 'count': len(notes)})
+        self._writer.writerows(OutputGenerator.note_to_row(note) for note in notes)
+        self._pending_notes += len(notes) if consumed is None else consumed
+        self._pending_rows += len(notes)
+        self._pending_batches += 1
+        if self._pending_batches >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Make the rows written so far durable and record them in the checkpoint."""
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.committed_offset += self._pending_notes
+        self.committed_rows += self._pending_rows
+        self._pending_notes = 0
+        self._pending_rows = 0
+        self._pending_batches = 0
+        self._write_checkpoint(os.fstat(self._file.fileno()).st_size)
+
+    def _write_checkpoint(self, size: int, rewrite: Optional[str] = None) -> None:
+        checkpoint = {
+            'output': os.path.abspath(self.path),
+            'offset': self.committed_offset,
+            'bytes': size,
+            'rows': self.committed_rows,
+            'suspended': self.suspended,
+        }
+        if rewrite:
+            checkpoint['rewrite'] = rewrite
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _finish_rewrite(self, checkpoint: dict) -> None:
+        # Félbeszakadt rewrite_suspended(): a checkpoint már az új fájlt írja le, a csere még hiányozhat
+        if os.path.exists(checkpoint['rewrite']):
+            os.replace(checkpoint['rewrite'], self.path)
+
+    def rewrite_suspended(self, resolved: Dict[str, List[Note]]) -> None:
+        """
+        Replace the unresolved rows of suspended shards with their resolved notes (request_id -> notes, one note
+        per row of the shard) and drop them from the checkpoint. The output is rewritten into a temporary file and
+        swapped in; the checkpoint records the swap first, so a crash in between is finished on the next resume.
+        """
+        self.flush()
+        replace = {entry['row']: entry for entry in self.suspended if entry['request_id'] in resolved}
+        if not replace:
+            return
+        tmp_path = f"{self.path}.rewrite"
+        self._file.close()
+        with open(self.path, newline='', encoding='utf-8') as src, open(tmp_path, 'w', newline='', encoding='utf-8') as dst:
+            writer = csv.DictWriter(dst, fieldnames=OutputGenerator.FIELDNAMES)
+            writer.writeheader()
+            skip = 0
+            for row_index, row in enumerate(csv.DictReader(src)):
+                entry = replace.get(row_index)
+                if entry is not None:
+                    writer.writerows(OutputGenerator.note_to_row(note) for note in resolved[entry['request_id']])
+                    skip = entry['count']
+                if skip:
+                    skip -= 1
+                    continue
                 writer.writerow(row)
+            dst.flush()
+            if self.fsync:
+                os.fsync(dst.fileno())
+            size = os.fstat(dst.fileno()).st_size
+        # A feloldott shardok kikerülnek; a későbbi shardok sorai eltolódnak, ha a sorszám változott
+        shift, remaining = 0, []
+        for entry in self.suspended:
+            if entry['row'] in replace:
+                shift += len(resolved[entry['request_id']]) - entry['count']
+            else:
+                remaining.append({**entry, 'row': entry['row'] + shift})
+        self.committed_rows += shift
+        self.suspended = remaining
+        self._write_checkpoint(size, rewrite=tmp_path)
+        os.replace(tmp_path, self.path)
+        self._write_checkpoint(size)
+        self._file = open(self.path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=OutputGenerator.FIELDNAMES)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
 
 def load_notes_from_csv(path: str) -> list:
     """Load notes from a CSV file (one note per line)."""
-    notes = []
+    return list(iter_notes_from_csv(path))
+
+def iter_notes_from_csv(path: str) -> Iterator[str]:
+    """Generator version of load_notes_from_csv."""
     with open(path, newline='', encoding='utf-8') as csvfile:
         reader = csv.reader(csvfile)
         for row in reader:
             if row:
-                notes.append(row[0])
-    return notes
+                yield row[0]
 
 def load_user_memory_from_md(path: str) -> list:
     """Load user memory from a Markdown file (one bullet point per line)."""
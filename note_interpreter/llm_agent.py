@@ -1,4 +1,4 @@
-from typing import List, Optional, Tuple, Dict, Callable, Any
+from typing import List, Optional, Tuple, Dict, Callable, Any, Union
 from note_interpreter.models import LLMOutput, DataEntry
 import os
 from dotenv import load_dotenv
@@ -6,11 +6,19 @@ load_dotenv()
 from pydantic import BaseModel, Field
 import json
 from note_interpreter.agent_core import AgentCore, ToolDefinition, OpenAIToolProvider
-from langchain_openai import ChatOpenAI
+from note_interpreter.backends import create_llm
+from note_interpreter.batching import TokenBudgetBatcher
+from note_interpreter.clarification import ClarificationBroker, ClarificationPending, ConsoleClarificationBroker, PendingClarification
+from note_interpreter.prompt_builder import PromptBuilder
+from note_interpreter.resources import resource_loader
+from note_interpreter.run_state import RunState, RunStateStore
 import yaml
 import datetime
+from collections import Counter
 from note_interpreter.colors import RESET, BOLD, CYAN, YELLOW, MAGENTA, BLUE, GREEN, RED, WHITE, BANNER_COLORS
-from note_interpreter.log import log
+from note_interpreter.log import log, lazy_json
+from note_interpreter.memory_store import MemoryStore, tokenize
+from note_interpreter.metrics import metrics
 from note_interpreter.user_output import user_print
 
 class MemoryManager:
@@ -22,18 +30,27 @@ class MemoryManager:
             lines = [line.strip() for line in f if line.strip() and not line.startswith('#')]
         return lines
 
-# Loader for classification YAML
+# Loaders for resource YAMLs (shared, mtime-checked, read-only; see note_interpreter.resources)
 def load_classification_from_yaml(path: str) -> dict:
-    with open(path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+    return resource_loader.load(path)
 
 def load_schema_from_yaml(path: str) -> dict:
-    with open(path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+    return resource_loader.load(path)
 
 def load_parameters_from_yaml(path: str) -> dict:
-    with open(path, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f)
+    return resource_loader.load(path)
+
+def build_prompt_context(notes: List[str], memory: List[str], classification_config: dict, schema: dict, parameters: dict, extra_context: Optional[dict] = None) -> dict:
+    """Context for the SingleAgent prompt config (also used to size token-budget batches without an agent)."""
+    return {
+        "memory": memory,
+        "notes": notes,
+        "classification_config": classification_config,
+        "schema": schema,
+        "parameters": parameters,
+        "scoring_metrics": schema.get('scoring_metrics', {}),
+        "extra_context": extra_context or {},
+    }
 
 class ClarificationManager:
     """Handles clarification logic for the agent."""
@@ -46,17 +63,37 @@ class ClarificationManager:
         return agent_response.get('questions', [])
 
     @staticmethod
-    def update_clarification_qas(clarification_qas: List[Tuple[str, str]], questions: List[str]) -> List[Tuple[str, str]]:
+    def update_clarification_qas(clarification_qas: List[Tuple[str, str]], questions: List[str], broker: Optional[ClarificationBroker] = None, batch_id: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        Ask the questions one by one through the broker (default: console input()).
+        With a headless broker it raises ClarificationPending at the first unanswered question; once that is
+        answered, continue with resume_clarification_qas(broker, request_id).
+        """
+        broker = broker or ConsoleClarificationBroker()
         answers = []
-        for q in questions:
+        for i, q in enumerate(questions):
             user_print(q, color=YELLOW)
-            a = input(f"Your answer to '{q}': ")
-            answers.append((q, a))
+            state = {"clarification_qas": [list(qa) for qa in clarification_qas + answers], "remaining": questions[i + 1:]}
+            pending = broker.submit([q], state=state, batch_id=batch_id, prompt=f"Your answer to '{q}': ")
+            if not pending.answered:
+                raise ClarificationPending(pending)
+            broker.resolve(pending.request_id)
+            answers.append((q, pending.answer))
         return clarification_qas + answers
 
+    @staticmethod
+    def resume_clarification_qas(broker: ClarificationBroker, request_id: str) -> List[Tuple[str, str]]:
+        pending = broker.get(request_id)
+        if not pending.answered:
+            raise ValueError(f"Clarification request {request_id} has not been answered yet")
+        broker.resolve(request_id)
+        clarification_qas = [tuple(qa) for qa in pending.state["clarification_qas"]] + [(pending.questions[0], pending.answer)]
+        return ClarificationManager.update_clarification_qas(clarification_qas, pending.state["remaining"], broker, pending.batch_id)
+
 class OutputFormatter:
     """Validates and formats the final output."""
     @staticmethod
+    @metrics.instrument("output_format")
     def format(agent_response: dict, original_notes: list = None) -> LLMOutput:
         entries = []
         for idx, e in enumerate(agent_response.get('entries', [])):
@@ -68,8 +105,6 @@ class OutputFormatter:
         return LLMOutput(entries=entries, new_memory_points=new_memory_points)
 
 class SingleAgent:
-    _schema = None
-    _parameters = None
     """
     Modular LLM agent using AgentCore for conversation and tool orchestration.
     Handles memory, prompt building, clarification loop, and structured output.
@@ -78,17 +113,13 @@ class SingleAgent:
     If temperature=0.0, output is deterministic (recommended for tests).
     Loads output schema, agent parameters, and scoring metrics from YAML for consistency.
     """
-    def __init__(self, notes: List[str], user_memory: List[str], classification_config: dict = None, max_clarification_rounds: int = None, debug_mode: bool = False, shared_context: Optional[dict] = None, temperature: float = None, use_color: bool = True):
+    def __init__(self, notes: List[str], user_memory: List[str], classification_config: dict = None, max_clarification_rounds: int = None, debug_mode: bool = False, shared_context: Optional[dict] = None, temperature: float = None, use_color: bool = True, prompt_config_path: str = "resources/single_agent/prompt_config.yaml", schema_path: str = "resources/single_agent/notes_output_schema.yaml", parameters_path: str = "resources/single_agent/agent_parameters.yaml", llm: Optional[Any] = None, tool_provider: Optional[Any] = None, backend: Optional[str] = None, model: Optional[str] = None, clarification_broker: Optional[ClarificationBroker] = None, batch_id: Optional[str] = None, run_state_store: Optional[RunStateStore] = None, selective: bool = False, clarity_threshold: Optional[int] = None, memory_store: Optional[MemoryStore] = None, memory_top_k: int = 20):
         self.notes = notes
         self.user_memory = user_memory
         self.classification_config = classification_config or {}
-        # Load schema and parameters if not already loaded
-        if not SingleAgent._schema:
-            SingleAgent._schema = load_schema_from_yaml("resources/single_agent/notes_output_schema.yaml")
-        if not SingleAgent._parameters:
-            SingleAgent._parameters = load_parameters_from_yaml("resources/single_agent/agent_parameters.yaml")
-        self.schema = SingleAgent._schema
-        self.parameters = SingleAgent._parameters
+        # Schema and parameters come from the shared resource cache (parsed once, reloaded on change)
+        self.schema = load_schema_from_yaml(schema_path)
+        self.parameters = load_parameters_from_yaml(parameters_path)
         # scoring_metrics is now always sourced from schema
         self.scoring_metrics = self.schema.get('scoring_metrics', {})
         # Use parameters for agent config
@@ -97,22 +128,37 @@ class SingleAgent:
         self.shared_context = shared_context or {}
         self.temperature = temperature if temperature is not None else self.parameters['temperature']['value']
         self.use_color = use_color
-        self.llm = ChatOpenAI(model="gpt-4.1-mini", openai_api_key=os.getenv("OPENAI_API_KEY"), temperature=self.temperature)
+        self.prompt_config_path = prompt_config_path
+        # Where clarification questions go: console input() by default, or a headless broker that suspends the run
+        self.clarification_broker = clarification_broker or ConsoleClarificationBroker()
+        self.batch_id = batch_id
+        # Persistent per-round state (keyed by batch_id): a restarted run continues from its last completed round
+        self.run_state_store = run_state_store
+        # Per-note mode: after the first finalize, notes at/above the threshold are frozen and later rounds resend
+        # only the unresolved notes (and their Q&A); see _select_unresolved / _merge_selection
+        self.selective = selective
+        self.clarity_threshold = clarity_threshold if clarity_threshold is not None else self.parameters.get('clarity_score_threshold', {}).get('value', 70)
+        self._selection: Optional[dict] = None
+        # Indexed user memory: the prompt gets the memory_top_k points most relevant to the notes, not the whole file
+        self.memory_store = memory_store
+        self.memory_top_k = memory_top_k
+        # llm / tool_provider can be injected; otherwise they come from the backend registry
+        # (backend=None -> $NOTE_INTERPRETER_LLM_BACKEND, or "openai")
+        if llm is None:
+            llm, backend_tool_provider = create_llm(backend, model, self.temperature)
+            tool_provider = tool_provider or backend_tool_provider
+        self.llm = llm
         self.tools = [
             self._get_finalize_notes_tool(),
             self._get_ask_user_tool()
         ]
+        # Zero-shot agent: the system prompt is rebuilt every round in run(), no greeting round-trip
         self.agent_core = AgentCore(
             llm=self.llm,
             tools=self.tools,
-            # system_prompt=SystemPromptBuilder.build(
-            #     self.user_memory,
-            #     self.notes,
-            #     classification_config=self.classification_config,
-            #     schema=self.schema,
-            #     parameters=self.parameters,
-            #     scoring_metrics=self.scoring_metrics
-            # ),
+            system_prompt="",
+            tool_provider=tool_provider,
+            should_initiate=False,
             shared_context=self.shared_context,
             debug_mode=self.debug_mode,
             logger=log,
@@ -163,32 +209,144 @@ class SingleAgent:
             function=ask_user
         )
 
-    def run(self) -> LLMOutput:
-        clarification_qas = []
-        tool_call_log = []  # Collect tool call logs for summary if needed
+    def build_system_prompt(self, extra_context: Optional[dict] = None) -> str:
+        """Render the system prompt for one round from the compiled prompt config (parsed once, cached on mtime)."""
+        context = build_prompt_context(self.notes, self.prompt_memory(), self.classification_config, self.schema, self.parameters, extra_context)
+        # Static sections first: every round (and every batch) shares the same prompt prefix
+        return PromptBuilder.compile(self.prompt_config_path).render(context, static_first=True)
+
+    def prompt_memory(self) -> List[str]:
+        """Memory points for the prompt: top-k relevant ones from the memory store, or the whole user_memory."""
+        if self.memory_store is None:
+            return self.user_memory
+        return self.memory_store.retrieve(self.notes, self.memory_top_k)
+
+    def make_batcher(self, max_prompt_tokens: int, **kwargs) -> TokenBudgetBatcher:
+        """Token budget batcher for this agent's prompt config, user memory and classification config."""
+        context = build_prompt_context([], self.prompt_memory(), self.classification_config, self.schema, self.parameters)
+        return TokenBudgetBatcher.for_prompt_config(self.prompt_config_path, max_prompt_tokens, context, **kwargs)
+
+    def run_batched(self, max_prompt_tokens: int, **batcher_kwargs) -> LLMOutput:
+        """
+        Like run(), but the notes are packed into batches that fit max_prompt_tokens and each batch gets its own
+        run. Entries come back in note order, new memory points are merged without duplicates.
+        """
+        all_notes = self.notes
+        entries, memory_points, tool_calls = [], [], []
         try:
-            for round_num in range(self.max_clarification_rounds):
-                # Build fresh system prompt with all context and Q&A
-                # system_prompt = SystemPromptBuilder.build(
-                #     self.user_memory,
-                #     self.notes,
-                #     classification_config=self.classification_config,
-                #     extra_context={"clarification_qas": clarification_qas},
-                #     schema=self.schema,
-                #     parameters=self.parameters,
-                #     scoring_metrics=self.scoring_metrics
-                # )
+            for notes in self.make_batcher(max_prompt_tokens, **batcher_kwargs).pack(all_notes):
+                self.notes = notes
+                output = self.run()
+                if isinstance(output, PendingClarification):
+                    # Batched runs need inline answers; a suspended batch cannot be merged
+                    raise ClarificationPending(output)
+                entries.extend(output.entries)
+                memory_points.extend(p for p in output.new_memory_points if p not in memory_points)
+                tool_calls.extend(output.tool_calls)
+        finally:
+            self.notes = all_notes
+        return LLMOutput(entries=entries, new_memory_points=memory_points, tool_calls=tool_calls)
+
+    def run(self) -> Union[LLMOutput, PendingClarification]:
+        """
+        Interpret the notes. With the default console broker clarification questions are answered inline and an
+        LLMOutput is returned; with a headless broker the run suspends at the first question and returns the
+        PendingClarification handle instead (continue with resume(request_id) once it is answered).
+        With a run_state_store and a batch_id, an earlier run of the same batch (same notes and prompt version)
+        is continued from its last completed round instead of starting over.
+        """
+        self._selection = None
+        if self._tracks_state():
+            state = self.run_state_store.load(self.batch_id)
+            if state is not None and state.matches(self.prompt_version, self.notes):
+                return self._continue_from_state(state)
+            self.run_state_store.start(self.batch_id, self.prompt_version, self.notes)
+        return self._run_rounds([], [], 0)
+
+    @property
+    def prompt_version(self) -> str:
+        return PromptBuilder.compile(self.prompt_config_path).version
+
+    def _tracks_state(self) -> bool:
+        return self.run_state_store is not None and self.batch_id is not None
+
+    def _record_round(self, round_num: int, tool: Optional[str], payload: Optional[dict] = None, questions: Optional[List[str]] = None, kind: Optional[str] = None, final: bool = False) -> None:
+        if self._tracks_state():
+            self.run_state_store.record_round(self.batch_id, round_num, tool, payload, questions, kind, final, self._selection)
+
+    def _continue_from_state(self, state: RunState) -> Union[LLMOutput, PendingClarification]:
+        log.info("[LLMAgent] Batch %s: continuing after round %d (%d Q&A)", self.batch_id, state.round + 1, len(state.clarification_qas))
+        clarification_qas = list(state.clarification_qas)
+        self._restore_selection(state.selection)
+        if state.finished:
+            # Az utolsó kör már lezárult: a tárolt finalize payloadból, LLM hívás nélkül
+            return OutputFormatter.format(state.last_payload or {}, original_notes=self.notes)
+        if state.awaiting_answer:
+            # The questions were asked but never answered: reuse the open broker request, or ask again
+            pending = next((p for p in self.clarification_broker.requests(self.batch_id) if p.state.get("round") == state.round), None)
+            if pending is None:
+                prompt = "Your answer: " if state.question_kind == "message" else "Your clarification response: "
+                pending = self._ask(state.questions, prompt, state.question_kind, state.round, clarification_qas, [])
+            if not pending.answered:
+                return pending
+            self._accept_answer(pending, clarification_qas)
+        return self._run_rounds(clarification_qas, [], state.round + 1)
+
+    def _accept_answer(self, pending: PendingClarification, clarification_qas: list) -> None:
+        self.clarification_broker.resolve(pending.request_id)
+        clarification_qas.append(self._clarification_entry(pending))
+        if self._tracks_state():
+            self.run_state_store.record_answer(self.batch_id, pending.state["round"], pending.answer)
+
+    def resume(self, request_id: str) -> Union[LLMOutput, PendingClarification]:
+        """Continue a suspended run from its clarification request (the notes and Q&A come from the stored state)."""
+        pending = self.clarification_broker.get(request_id)
+        if not pending.answered:
+            raise ValueError(f"Clarification request {request_id} has not been answered yet")
+        state = pending.state
+        self.notes = state["notes"]
+        self.user_memory = state["user_memory"]
+        self._restore_selection(state.get("selection"))
+        clarification_qas = list(state["clarification_qas"])
+        self._accept_answer(pending, clarification_qas)
+        return self._run_rounds(clarification_qas, state["tool_calls"], state["round"] + 1)
+
+    def _ask(self, questions: List[str], prompt: str, kind: str, round_num: int, clarification_qas: list,
+             tool_call_log: list) -> PendingClarification:
+        # A folytatáshoz szükséges állapot a kérdéssel együtt kerül a brokerbe
+        state = {
+            "kind": kind,
+            "round": round_num,
+            "notes": self.notes,
+            "user_memory": self.user_memory,
+            "clarification_qas": clarification_qas,
+            "tool_calls": tool_call_log,
+            "selection": self._selection,
+        }
+        return self.clarification_broker.submit(questions, state=state, batch_id=self.batch_id, prompt=prompt)
+
+    @staticmethod
+    def _clarification_entry(pending: PendingClarification) -> dict:
+        # Every round (ask_user questions or a plain-text message) is stored as one batch, the shape the
+        # input_context prompt section and RunStateStore expect: the questions and the single free-form response
+        return {"questions": pending.questions, "response": pending.answer}
+
+    def _run_rounds(self, clarification_qas: list, tool_call_log: list, start_round: int) -> Union[LLMOutput, PendingClarification]:
+        try:
+            for round_num in range(start_round, self.max_clarification_rounds):
+                # Build fresh system prompt with all context and Q&A (per-note mode: only the unresolved notes' Q&A)
+                system_prompt = self.build_system_prompt({"clarification_qas": self._relevant_qas(clarification_qas)})
                 # Zero-shot: only system + user message
                 conversation_history = [
-                    {"role": "system", "content": "Prompt must be built externally using PromptBuilder and passed in if needed."},
+                    {"role": "system", "content": system_prompt},
                     {"role": "user", "content": "Proceed"}
                 ]
                 if self.debug_mode:
-                    log.debug(f"\n-------- SYSTEM PROMPT (round {round_num+1}) --------\nPrompt must be built externally using PromptBuilder and passed in if needed.\n------------------------------------------\n")
+                    log.debug(f"\n-------- SYSTEM PROMPT (round {round_num+1}) --------\n{system_prompt}\n------------------------------------------\n")
                 # Pass zero-shot conversation to AgentCore
                 response = self.agent_core.invoke_with_message_list(conversation_history)
                 if self.debug_mode:
-                    log.debug(f"\n-------- LLM RESPONSE --------\n{str(response)}\n------------------------------\n")
+                    log.debug("\n-------- LLM RESPONSE --------\n%s\n------------------------------\n", response)
                 if response["type"] == "tool_call" and response["tool_details"]:
                     tool_name = response["tool_details"]["name"]
                     tool_output = response["display_message"]
@@ -197,9 +355,7 @@ class SingleAgent:
                             output_data = response["tool_details"]["args"]
                         else:
                             output_data = json.loads(tool_output) if isinstance(tool_output, str) else tool_output
-                        if self.debug_mode:
-                            log.debug(f"[TOOL INVOKED] {tool_name} with args: {json.dumps(output_data, ensure_ascii=False)}")
-                        log.info(f"[TOOL INVOKED] {tool_name} with args: {json.dumps(output_data, ensure_ascii=False)}")
+                        log.info("[TOOL INVOKED] %s with args: %s", tool_name, lazy_json(output_data, indent=None))
                         if tool_name == "ask_user":
                             questions = output_data.get("questions", [])
                             if questions:
@@ -207,73 +363,65 @@ class SingleAgent:
                                 for i, q in enumerate(questions, 1):
                                     user_print(f"{i}: {q}", color=YELLOW)
                                 user_print("\nPlease answer all questions in a single, free-form text. You may answer in any order or style; the agent will interpret your response.", color=YELLOW)
-                                user_input = input("Your clarification response: ")
-                                # Store the questions and the single free-form response
-                                clarification_context = {
-                                    "questions": questions,
-                                    "response": user_input
-                                }
-                                clarification_qas.append(clarification_context)
+                                self._record_round(round_num, tool_name, output_data, questions, "ask_user")
+                                pending = self._ask(questions, "Your clarification response: ", "ask_user", round_num, clarification_qas, tool_call_log)
+                                if not pending.answered:
+                                    return pending
+                                self._accept_answer(pending, clarification_qas)
+                            else:
+                                self._record_round(round_num, tool_name, output_data)
                             continue  # Next round with updated clarification context
                         elif tool_name == "finalize_notes":
                             user_print("\n[FINALIZE_NOTES] The agent is finalizing the output.", color=GREEN, bold=True)
                             final_output = OutputFormatter.format(output_data, original_notes=self.notes)
+                            if self.selective and round_num + 1 < self.max_clarification_rounds and self._select_unresolved(final_output, len(clarification_qas)):
+                                # Some notes are still unclear: next round with only those notes
+                                self._record_round(round_num, tool_name, output_data)
+                                continue
+                            final_output = self._merge_selection(final_output)
+                            self._record_round(round_num, tool_name, self._output_payload(final_output), final=True)
                             final_output.tool_calls = tool_call_log
                             if self.debug_mode:
-                                if hasattr(final_output, "model_dump_json"):
-                                    output_str = final_output.model_dump_json(indent=2)
-                                else:
-                                    try:
-                                        output_str = json.dumps(final_output, indent=2, ensure_ascii=False)
-                                    except Exception:
-                                        output_str = str(final_output)
-                                log.debug(f"\n-------- FINAL OUTPUT --------\n{output_str}\n------------------------------\n")
+                                self._log_final_output("FINAL OUTPUT", final_output)
                             return final_output
                     except Exception as e:
                         log.error(f"[LLMAgent] Failed to parse tool output: {e}. Raw output: {tool_output}")
+                        metrics.increment("llm_invoke", "retries")
                         continue
                 else:
                     user_print(f"[LLM MESSAGE] {response['display_message']}", color=BLUE)
-                    user_input = input("Your answer: ")
-                    clarification_qas.append((response["display_message"], user_input))
+                    self._record_round(round_num, None, questions=[response["display_message"]], kind="message")
+                    pending = self._ask([response["display_message"]], "Your answer: ", "message", round_num, clarification_qas, tool_call_log)
+                    if not pending.answered:
+                        return pending
+                    self._accept_answer(pending, clarification_qas)
                     continue
             log.warning("Maximum clarification rounds reached. Finalizing with placeholders if needed.")
             # Build a final system prompt with all Q&A and a note about max rounds
             final_note = f"You have reached the maximum of {self.max_clarification_rounds} clarification rounds. Please finalize your output, even if some fields are UNDEFINED. Number of clarification Q&A rounds: {len(clarification_qas)}."
-            # system_prompt = SystemPromptBuilder.build(
-            #     self.user_memory,
-            #     self.notes,
-            #     classification_config=self.classification_config,
-            #     extra_context={"clarification_qas": clarification_qas, "finalization_note": final_note},
-            #     schema=self.schema,
-            #     parameters=self.parameters,
-            #     scoring_metrics=self.scoring_metrics
-            # )
+            system_prompt = self.build_system_prompt({"clarification_qas": self._relevant_qas(clarification_qas), "finalization_note": final_note})
             conversation_history = [
-                {"role": "system", "content": "Prompt must be built externally using PromptBuilder and passed in if needed."},
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": "Proceed"}
             ]
             if self.debug_mode:
-                log.debug(f"\n-------- FINAL SYSTEM PROMPT (max rounds reached) --------\nPrompt must be built externally using PromptBuilder and passed in if needed.\n------------------------------------------\n")
+                log.debug(f"\n-------- FINAL SYSTEM PROMPT (max rounds reached) --------\n{system_prompt}\n------------------------------------------\n")
             response = self.agent_core.invoke_with_message_list(conversation_history)
             if self.debug_mode:
-                log.debug(f"\n-------- FINAL LLM RESPONSE (max rounds reached) --------\n{str(response)}\n------------------------------\n")
+                log.debug("\n-------- FINAL LLM RESPONSE (max rounds reached) --------\n%s\n------------------------------\n", response)
             if response["type"] == "tool_call" and response["tool_details"] and response["tool_details"]["name"] == "finalize_notes":
                 tool_output = response["display_message"]
                 try:
-                    output_data = json.loads(tool_output) if isinstance(tool_output, str) else tool_output
+                    if not tool_output and "args" in response["tool_details"]:
+                        output_data = response["tool_details"]["args"]
+                    else:
+                        output_data = json.loads(tool_output) if isinstance(tool_output, str) else tool_output
                     user_print("\n[FINALIZE_NOTES] The agent is finalizing the output after max clarification rounds.", color=GREEN, bold=True)
-                    final_output = OutputFormatter.format(output_data, original_notes=self.notes)
+                    final_output = self._merge_selection(OutputFormatter.format(output_data, original_notes=self.notes))
+                    self._record_round(self.max_clarification_rounds, "finalize_notes", self._output_payload(final_output), final=True)
                     final_output.tool_calls = tool_call_log
                     if self.debug_mode:
-                        if hasattr(final_output, "model_dump_json"):
-                            output_str = final_output.model_dump_json(indent=2)
-                        else:
-                            try:
-                                output_str = json.dumps(final_output, indent=2, ensure_ascii=False)
-                            except Exception:
-                                output_str = str(final_output)
-                        log.debug(f"\n-------- FINAL OUTPUT (AFTER MAX ROUNDS) --------\n{output_str}\n------------------------------------------\n")
+                        self._log_final_output("FINAL OUTPUT (AFTER MAX ROUNDS)", final_output)
                     return final_output
                 except Exception as e:
                     log.error(f"[LLMAgent] Failed to parse tool output after max rounds: {e}. Raw output: {tool_output}")
@@ -295,31 +443,103 @@ class SingleAgent:
             # Optionally include Q&A if any
             if clarification_qas:
                 output_dict["clarification_clarification_batches"] = clarification_qas
-            # Build LLMOutput object
-            final_output = LLMOutput(**output_dict)
+            # Build LLMOutput object (per-note mode: frozen notes keep their entries)
+            final_output = self._merge_selection(LLMOutput(**output_dict))
             if self.debug_mode:
-                if hasattr(final_output, "model_dump_json"):
-                    output_str = final_output.model_dump_json(indent=2)
-                else:
-                    try:
-                        output_str = json.dumps(final_output, indent=2, ensure_ascii=False)
-                    except Exception:
-                        output_str = str(final_output)
-                log.debug(f"\n-------- FINAL OUTPUT (FALLBACK) --------\n{output_str}\n------------------------------------------\n")
+                self._log_final_output("FINAL OUTPUT (FALLBACK)", final_output)
             return final_output
         finally:
             if self.debug_mode:
-                log_dir = "logs"
-                log_filename = os.path.join(log_dir, "llm_agent_debug.log")
-                import shutil
-                import datetime
-                timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
-                archive_filename = os.path.join(log_dir, f"llm_agent_debug_{timestamp}.log")
-                try:
-                    if os.path.exists(log_filename):
-                        shutil.copyfile(log_filename, archive_filename)
-                except Exception as e:
-                    pass
+                # The debug log is rotated by the Log handler (rotation="size"/"time"); just make sure it is on disk
+                log.flush()
+
+    def _select_unresolved(self, output: LLMOutput, qas_count: int) -> bool:
+        """
+        Per-note mode: store the entries of the current notes, freeze those at/above clarity_threshold and narrow
+        self.notes to the rest. Returns False when every note is resolved.
+        """
+        selection = self._selection or {"all_notes": list(self.notes), "active": list(range(len(self.notes))), "entries": {}, "memory_points": [], "qas_start": 0}
+        mapped = self._map_entries(selection, output.entries)
+        for idx, entry in mapped.items():
+            selection["entries"][str(idx)] = entry.model_dump()
+        selection["memory_points"] += [p for p in output.new_memory_points if p not in selection["memory_points"]]
+        unresolved = [idx for idx in selection["active"] if idx not in mapped or mapped[idx].clarity_score < self.clarity_threshold]
+        self._selection = selection
+        if not unresolved:
+            return False
+        log.info("[LLMAgent] %d of %d notes frozen, %d still need clarification", len(selection["all_notes"]) - len(unresolved), len(selection["all_notes"]), len(unresolved))
+        selection["active"] = unresolved
+        selection["qas_start"] = qas_count
+        self.notes = [selection["all_notes"][idx] for idx in unresolved]
+        return True
+
+    @staticmethod
+    def _map_entries(selection: dict, entries: List[DataEntry]) -> Dict[int, DataEntry]:
+        # Bejegyzés -> eredeti note index: raw_text alapján, különben sorrend szerint
+        active = selection["active"]
+        by_text = {selection["all_notes"][idx]: idx for idx in active}
+        mapped = {}
+        for position, entry in enumerate(entries):
+            idx = by_text.get(entry.raw_text)
+            if idx is None and position < len(active):
+                idx = active[position]
+            if idx is not None and idx not in mapped:
+                mapped[idx] = entry
+        return mapped
+
+    def _merge_selection(self, output: LLMOutput) -> LLMOutput:
+        """Reassemble the full output in the original note order (no-op outside per-note mode)."""
+        selection = self._selection
+        if selection is None:
+            return output
+        for idx, entry in self._map_entries(selection, output.entries).items():
+            selection["entries"][str(idx)] = entry.model_dump()
+        entries = [
+            DataEntry(**selection["entries"][str(idx)]) if str(idx) in selection["entries"]
+            else DataEntry(raw_text=note, interpreted_text="UNDEFINED", entity_type="UNDEFINED", intent="UNDEFINED", clarity_score=0)
+            for idx, note in enumerate(selection["all_notes"])
+        ]
+        memory_points = selection["memory_points"] + [p for p in output.new_memory_points if p not in selection["memory_points"]]
+        self.notes = selection["all_notes"]
+        self._selection = None
+        return LLMOutput(entries=entries, new_memory_points=memory_points, tool_calls=output.tool_calls)
+
+    def _restore_selection(self, selection: Optional[dict]) -> None:
+        self._selection = selection
+        if selection is not None:
+            self.notes = [selection["all_notes"][idx] for idx in selection["active"]]
+
+    def _relevant_qas(self, clarification_qas: list) -> list:
+        """
+        Per-note mode: Q&A asked since the last freeze, plus earlier Q&A that concerns an unresolved note, i.e.
+        whose questions and response contain at least half of the note's distinctive tokens (tokens found in
+        at most half of the batch's notes), so paraphrased questions and answers still match.
+        """
+        selection = self._selection
+        if selection is None:
+            return clarification_qas
+        start = selection["qas_start"]
+        all_notes = selection["all_notes"]
+        note_tokens = [set(tokenize(note)) for note in all_notes]
+        # Token -> hány note-ban szerepel; a gyakori tokenek (pl. "note") nem azonosítanak egy note-ot
+        frequency = Counter(token for tokens in note_tokens for token in tokens)
+        active_tokens = []
+        for idx in selection["active"]:
+            distinctive = {t for t in note_tokens[idx] if frequency[t] * 2 <= len(all_notes)}
+            active_tokens.append(distinctive or note_tokens[idx])
+        def concerns_active(qa: dict) -> bool:
+            text = set(tokenize(" ".join(qa.get("questions", [])) + " " + str(qa.get("response", ""))))
+            return any(tokens and len(tokens & text) * 2 >= len(tokens) for tokens in active_tokens)
+        return [qa for qa in clarification_qas[:start] if concerns_active(qa)] + clarification_qas[start:]
+
+    @staticmethod
+    def _output_payload(output: LLMOutput) -> dict:
+        return {"entries": [e.model_dump() for e in output.entries], "new_memory_points": output.new_memory_points}
+
+    @staticmethod
+    def _log_final_output(title: str, final_output: LLMOutput) -> None:
+        # A JSON-t csak akkor állítjuk elő, ha a debug rekord tényleg kiírásra kerül
+        log.debug(lambda: f"\n-------- {title} --------\n{final_output.model_dump_json(indent=2)}\n------------------------------\n")
 
     def _is_fallback_output(self, output: LLMOutput) -> bool:
         """Returns True if the output is a fallback/placeholder (e.g., UNDEFINED fields)."""
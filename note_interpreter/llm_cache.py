@@ -0,0 +1,219 @@
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+# Kulcsok, amelyek minden hívásnál változnak, de a választ nem befolyásolják
+VOLATILE_MESSAGE_KEYS = {"timestamp"}
+
+
+def normalize_messages(messages: List[Any]) -> List[Dict[str, Any]]:
+    """Turn a message list (dicts or langchain messages) into a stable, JSON-friendly form."""
+    normalized = []
+    for message in messages:
+        if isinstance(message, dict):
+            normalized.append({k: v for k, v in message.items() if k not in VOLATILE_MESSAGE_KEYS})
+        else:
+            normalized.append({
+                "role": getattr(message, "type", type(message).__name__),
+                "content": getattr(message, "content", str(message)),
+                "tool_calls": getattr(message, "tool_calls", None) or None,
+            })
+    return normalized
+
+
+def make_cache_key(messages: List[Any], model: Optional[str], temperature: Optional[float], tool_schemas: Optional[List[Dict]] = None) -> str:
+    """Stable sha256 over the normalized messages, model name, temperature and bound tool schemas."""
+    payload = {
+        "messages": normalize_messages(messages),
+        "model": model,
+        "temperature": temperature,
+        "tools": tool_schemas or [],
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Dict) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+
+class MemoryLRUCache(CacheBackend):
+    """In-process LRU tier (thread-safe)."""
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: Dict) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache(CacheBackend):
+    """
+    On-disk tier backed by a single SQLite file.
+    - ttl_seconds: entries older than this are treated as misses and purged (None = no expiry).
+    - max_entries: above this, the least recently used entries are evicted.
+    """
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None, max_entries: int = 100_000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+        self._conn.commit()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self._expired(created, now):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value: Dict) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False, default=str), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Content-addressed cache for structured LLM responses (the dict produced by AgentCore._extract_llm_response).
+    Two tiers: an in-memory LRU in front of an optional on-disk SQLiteCache; disk hits are promoted to memory.
+    By default only deterministic calls (temperature == 0) are cached.
+
+    Használat:
+        cache = ResponseCache(disk=SQLiteCache("cache/llm_responses.sqlite", ttl_seconds=7 * 24 * 3600))
+        agent = AgentCore(llm=llm, tools=tools, system_prompt=prompt, response_cache=cache)
+        cache.stats()  # {'hits': ..., 'memory_hits': ..., 'disk_hits': ..., 'misses': ...}
+    """
+    def __init__(self, memory: Optional[MemoryLRUCache] = None, disk: Optional[CacheBackend] = None, deterministic_only: bool = True):
+        self.memory = memory if memory is not None else MemoryLRUCache()
+        self.disk = disk
+        self.deterministic_only = deterministic_only
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def is_cacheable(self, temperature: Optional[float]) -> bool:
+        return not self.deterministic_only or temperature == 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return a private copy of the cached response (callers may mutate tool args)."""
+        value = self.memory.get(key)
+        if value is not None:
+            with self._lock:
+                self.memory_hits += 1
+            return copy.deepcopy(value)
+        if self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.set(key, copy.deepcopy(value))
+                with self._lock:
+                    self.disk_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Dict) -> None:
+        self.memory.set(key, copy.deepcopy(value))
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.memory_hits + self.disk_hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
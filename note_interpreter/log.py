@@ -1,8 +1,125 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
 import sys
 import os
 from datetime import datetime
 
+LEVELS = {"debug": logging.DEBUG, "info": logging.INFO, "warning": logging.WARNING, "error": logging.ERROR}
+
+
+class LazyMessage:
+    """
+    Log message rendered only when a handler formats the record: callables are called and structured
+    fields are appended as key=value at that point, never for filtered-out records.
+    """
+    __slots__ = ("msg", "fields", "_text")
+
+    def __init__(self, msg, fields=None):
+        self.msg = msg
+        self.fields = fields
+        self._text = None
+
+    def __str__(self):
+        # Több handler is formázhatja ugyanazt a rekordot: csak egyszer számoljuk ki
+        if self._text is None:
+            text = str(self.msg() if callable(self.msg) else self.msg)
+            if self.fields:
+                text += " | " + " ".join(f"{k}={_render_field(v)}" for k, v in self.fields.items())
+            self._text = text
+        return self._text
+
+
+class lazy_json:
+    """
+    Deferred json.dumps for log arguments: log.debug("history:\n%s", lazy_json(list(history))).
+    With the queued file handler the dump happens later on the writer thread, so pass a snapshot (a copy) of
+    objects that keep changing after the call.
+    """
+    __slots__ = ("obj", "indent")
+
+    def __init__(self, obj, indent=2):
+        self.obj = obj
+        self.indent = indent
+
+    def __str__(self):
+        try:
+            return json.dumps(self.obj, indent=self.indent, ensure_ascii=False, default=str)
+        except Exception as e:
+            return f"<not serializable: {e}> {self.obj!r}"
+
+
+_MUTABLE_TYPES = (list, dict, set, bytearray)
+
+
+def _has_mutable_args(record) -> bool:
+    args = record.args
+    if isinstance(args, _MUTABLE_TYPES):
+        return True
+    if args and any(isinstance(arg, _MUTABLE_TYPES) for arg in args):
+        return True
+    msg = record.msg
+    return isinstance(msg, LazyMessage) and bool(msg.fields) and any(
+        isinstance(value, _MUTABLE_TYPES) for value in msg.fields.values())
+
+
+def _render_field(value):
+    if callable(value):
+        value = value()
+    if isinstance(value, str):
+        return value
+    return str(lazy_json(value, indent=None))
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler over a bounded queue. overflow="block" waits for the writer thread,
+    overflow="drop" discards the record (counted in .dropped) so the caller never stalls.
+    Records are queued unformatted (same-process listener only): the message is built when it is written.
+    Records whose arguments (or structured fields) are bare lists/dicts/sets are rendered in prepare() instead,
+    because the caller may change them before the writer thread gets to the record.
+    """
+    def __init__(self, log_queue: queue.Queue, overflow: str = "block"):
+        if overflow not in ("block", "drop"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.dropped = 0
+
+    def prepare(self, record):
+        # A rekordot formázatlanul adjuk tovább: az üzenetet (args, exc_info) a writer szál formázza ki,
+        # kivéve ha módosítható argumentuma van: azt most kell lefényképezni
+        if not _has_mutable_args(record):
+            return record
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def make_file_handler(log_file, rotation=None, max_bytes=10 * 1024 * 1024, backup_count=5, when="midnight"):
+    """Plain, size-rotated (rotation="size") or time-rotated (rotation="time") file handler."""
+    if rotation is None:
+        return logging.FileHandler(log_file, mode='w', encoding='utf-8')
+    if rotation == "size":
+        return logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    if rotation == "time":
+        return logging.handlers.TimedRotatingFileHandler(log_file, when=when, backupCount=backup_count, encoding='utf-8')
+    raise ValueError(f"Unknown rotation: {rotation}")
+
+
 class Log:
     _instance = None
     _initialized = False
@@ -12,10 +129,19 @@ class Log:
             cls._instance = super(Log, cls).__new__(cls)
         return cls._instance
 
-    def __init__(self, level="basic", log_file=None, use_color=True, to_console=False):
+    def __init__(self, level="basic", log_file=None, use_color=True, to_console=False, use_queue=False,
+                 rotation=None, max_bytes=10 * 1024 * 1024, backup_count=5, when="midnight",
+                 queue_size=10000, overflow="block"):
+        """
+        use_queue: the file is written by a background QueueListener thread; callers only enqueue records.
+        rotation: None, "size" (max_bytes / backup_count) or "time" (when / backup_count).
+        queue_size / overflow: bounded queue, "block" or "drop" when full. Call flush() before shutdown.
+        """
         if Log._initialized:
             return
         self.level = level
+        self.queue_handler = None
+        self.listener = None
         self.logger = logging.getLogger("note_interpreter")
         self.logger.setLevel(logging.DEBUG if level == "debug" else logging.INFO)
         self.logger.handlers = []
@@ -31,21 +157,57 @@ class Log:
                 log_dir = "logs"
                 os.makedirs(log_dir, exist_ok=True)
                 log_file = os.path.join(log_dir, f"llm_agent_debug_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.log")
-            file_handler = logging.FileHandler(log_file, mode='w', encoding='utf-8')
+            file_handler = make_file_handler(log_file, rotation, max_bytes, backup_count, when)
             file_handler.setFormatter(logging.Formatter(fmt))
-            self.logger.addHandler(file_handler)
+            if use_queue:
+                # Háttérszál írja a fájlt; a hívó szál csak sorba tesz
+                self.queue_handler = BoundedQueueHandler(queue.Queue(maxsize=queue_size), overflow=overflow)
+                self.listener = logging.handlers.QueueListener(self.queue_handler.queue, file_handler)
+                self.listener.start()
+                atexit.register(self.flush)
+                self.logger.addHandler(self.queue_handler)
+            else:
+                self.logger.addHandler(file_handler)
         Log._initialized = True
 
-    def debug(self, msg):
-        self.logger.debug(msg)
-    def info(self, msg):
-        self.logger.info(msg)
-    def warning(self, msg):
-        self.logger.warning(msg)
-    def error(self, msg):
-        self.logger.error(msg)
+    def flush(self):
+        """Wait until the background writer has written every queued record, then flush all file handlers."""
+        if self.listener is not None:
+            self.queue_handler.queue.join()
+        handlers = list(self.logger.handlers) + (list(self.listener.handlers) if self.listener else [])
+        for handler in handlers:
+            handler.flush()
+
+    def isEnabledFor(self, level) -> bool:
+        """Guard for expensive log-only work; level is a logging constant or a name ("debug", "info", ...)."""
+        return self.logger.isEnabledFor(LEVELS.get(level, level) if isinstance(level, str) else level)
+
+    def _log(self, level, msg, args, fields):
+        # Szűrt szinten semmit nem számolunk ki; különben a formázás is csak kiíráskor történik
+        if not self.logger.isEnabledFor(level):
+            return
+        exc_info = fields.pop("exc_info", None)
+        if callable(msg) or fields:
+            msg = LazyMessage(msg, fields)
+        self.logger.log(level, msg, *args, exc_info=exc_info, extra={"fields": fields}, stacklevel=3)
+
+    # msg lehet callable is; *args %-formázás (lustán), **fields strukturált mezők
+    def debug(self, msg, *args, **fields):
+        self._log(logging.DEBUG, msg, args, fields)
+    def info(self, msg, *args, **fields):
+        self._log(logging.INFO, msg, args, fields)
+    def warning(self, msg, *args, **fields):
+        self._log(logging.WARNING, msg, args, fields)
+    def error(self, msg, *args, **fields):
+        self._log(logging.ERROR, msg, args, fields)
 
     def reset(self):
+        if getattr(self, "listener", None) is not None:
+            self.listener.stop()
+            for handler in self.listener.handlers:
+                handler.close()
+            atexit.unregister(self.flush)
+            self.listener = None
         for handler in self.logger.handlers[:]:
             self.logger.removeHandler(handler)
         Log._initialized = False
@@ -0,0 +1,340 @@
+# Indexed, deduplicated user memory with local relevance retrieval (BM25, no network).
+# The Markdown memory file stays the source of truth ("* " bullet lines, as InputHandler.read_user_memory_md reads
+# it); next to it an append-only JSON-lines index keeps the tokenized points, so loading does not re-parse the
+# whole history and appends only write the new points. The index is rebuilt when the Markdown file was changed
+# by someone else (its size or mtime no longer matches the index).
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def point_text(line: str) -> str:
+    """The memory point without its Markdown bullet."""
+    line = line.strip()
+    return line[2:].strip() if line.startswith("* ") else line
+
+
+def point_hash(line: str) -> str:
+    """Hash of the normalized point (case, whitespace and punctuation insensitive) for exact-duplicate checks."""
+    return hashlib.sha1(" ".join(tokenize(point_text(line))).encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive inter-process lock for path (held on <path>.lock; fcntl on POSIX, msvcrt on Windows)."""
+    with open(path + ".lock", "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def append_lines(path: str, lines: List[str], fsync: bool = True) -> int:
+    """Append lines with a single write (after a newline if the file does not end with one); returns the new size."""
+    with open(path, "ab+") as f:
+        prefix = b""
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                prefix = b"\n"
+        f.write(prefix + "".join(line + "\n" for line in lines).encode("utf-8"))
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+        return f.tell()
+
+
+class MemoryStore:
+    """
+    User memory store: dedup on append, top-k retrieval for the current notes.
+    Every read-modify-write of the memory file and its index happens under the file lock, so several
+    processes (each with its own store) can add points to the same memory.
+    Használat:
+        store = MemoryStore("docs/examples/example_user_memory.md")
+        store.add(output.new_memory_points)            # exact and near duplicates are skipped
+        memory = store.retrieve(notes, k=20)           # constant-size memory section for the prompt
+    """
+
+    def __init__(self, path: str, index_path: Optional[str] = None, near_duplicate_threshold: float = 0.8,
+                 k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.index_path = index_path or path + ".index.jsonl"
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.k1 = k1
+        self.b = b
+        self._reset()
+        with file_lock(self.path):
+            self._sync()
+
+    # --- index ---
+    def _reset(self) -> None:
+        self._lines: List[str] = []
+        self._lengths: List[int] = []
+        self._token_sets: List[Set[str]] = []
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._hashes: Set[str] = set()
+        self._total_length = 0
+        # Meddig olvastuk az indexet, és az akkori Markdown (méret, mtime_ns)
+        self._index_offset = 0
+        self._index_inode: Optional[int] = None
+        self._indexed_md: Optional[Tuple[int, Optional[int]]] = None
+
+    def _index_point(self, line: str, tokens: List[str]) -> None:
+        doc_id = len(self._lines)
+        self._lines.append(line)
+        self._lengths.append(len(tokens))
+        self._token_sets.append(set(tokens))
+        self._total_length += len(tokens)
+        self._hashes.add(point_hash(line))
+        for token, count in Counter(tokens).items():
+            self._postings.setdefault(token, {})[doc_id] = count
+
+    def _md_signature(self) -> Tuple[int, Optional[int]]:
+        """(size, mtime_ns) of the Markdown file, as the index records store it; (0, None) if it is missing."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return 0, None
+        return stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def _signature_fields(signature: Tuple[int, Optional[int]]) -> dict:
+        return {"md_size": signature[0], "md_mtime_ns": signature[1]}
+
+    def _sync(self) -> None:
+        """
+        Bring the in-memory index up to date; the caller holds the file lock. Reads only the index records
+        appended since the last sync (points added by other stores), and rebuilds the index from the Markdown
+        file if that was changed outside a store (its size or mtime no longer matches the last index record).
+        """
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            stat = None
+        if stat is None or stat.st_ino != self._index_inode or stat.st_size < self._index_offset:
+            # New or replaced (rebuilt) index: read it from the start
+            self._reset()
+        if stat is not None:
+            with open(self.index_path, "rb") as f:
+                f.seek(self._index_offset)
+                data = f.read()
+            if data and not data.endswith(b"\n"):
+                # Csonka sor: az index érvénytelen, újraépítjük
+                self._rebuild()
+                return
+            try:
+                records = [json.loads(line) for line in data.splitlines()]
+            except json.JSONDecodeError:
+                self._rebuild()
+                return
+            for record in records:
+                if "text" in record:
+                    self._index_point(record["text"], record["tokens"])
+                self._indexed_md = (record["md_size"], record.get("md_mtime_ns"))
+            self._index_offset += len(data)
+            self._index_inode = stat.st_ino
+        if self._indexed_md != self._md_signature():
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Re-index the Markdown file (skipping exact duplicates) and rewrite the index atomically."""
+        self._reset()
+        records = []
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line.startswith("* ") and point_hash(line) not in self._hashes:
+                        tokens = tokenize(point_text(line))
+                        self._index_point(line, tokens)
+                        records.append({"text": line, "tokens": tokens})
+        signature = self._md_signature()
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            # Pontok nélkül egy méret-rekord, hogy a következő betöltés ne építse újra
+            for record in records or [{}]:
+                f.write(json.dumps({**record, **self._signature_fields(signature)}, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.index_path)
+        stat = os.stat(self.index_path)
+        self._index_offset = stat.st_size
+        self._index_inode = stat.st_ino
+        self._indexed_md = signature
+
+    # --- dedup ---
+    def is_duplicate(self, point: str) -> bool:
+        """Exact duplicate (normalized hash) or near duplicate (token Jaccard >= near_duplicate_threshold)."""
+        if point_hash(point) in self._hashes:
+            return True
+        tokens = set(tokenize(point_text(point)))
+        if not tokens or self.near_duplicate_threshold >= 1:
+            return False
+        # Egy közeli duplikátumnak a ritkább tokenek közül legalább egyet tartalmaznia kell
+        rarest = sorted(tokens, key=lambda t: len(self._postings.get(t, ())))
+        # (J >= t esetén legfeljebb n * (1 - t) / t token hiányozhat)
+        needed = int(len(tokens) * (1 - self.near_duplicate_threshold) / self.near_duplicate_threshold) + 1
+        candidates = set()
+        for token in rarest[:needed]:
+            candidates.update(self._postings.get(token, ()))
+        for doc_id in candidates:
+            other = self._token_sets[doc_id]
+            if len(tokens & other) / len(tokens | other) >= self.near_duplicate_threshold:
+                return True
+        return False
+
+    def add(self, points: Iterable[str], fsync: bool = False) -> List[str]:
+        """
+        Append the new (non-duplicate) points to the Markdown file and the index; returns the added lines.
+        Points are stored as "* " bullets. Under the lock the store first catches up with the points other
+        processes added, so duplicates are checked against the whole file and the index stays complete.
+        """
+        with file_lock(self.path):
+            self._sync()
+            added = []
+            for point in points:
+                text = point_text(point)
+                if not text:
+                    continue
+                line = f"* {text}"
+                if self.is_duplicate(line):
+                    continue
+                self._index_point(line, tokenize(text))
+                added.append(line)
+            if added:
+                append_lines(self.path, added, fsync=fsync)
+                signature = self._md_signature()
+                records = [json.dumps({"text": line, "tokens": tokenize(point_text(line)), **self._signature_fields(signature)},
+                                      ensure_ascii=False)
+                           for line in added]
+                self._index_offset = append_lines(self.index_path, records, fsync=False)
+                self._index_inode = os.stat(self.index_path).st_ino
+                self._indexed_md = signature
+        return added
+
+    # --- retrieval ---
+    @property
+    def points(self) -> List[str]:
+        return list(self._lines)
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def scores(self, query: Union[str, List[str]]) -> Dict[int, float]:
+        """BM25 score per point id for the query (a text or a list of notes); points without overlap are omitted."""
+        text = query if isinstance(query, str) else "\n".join(query)
+        n = len(self._lines)
+        if not n:
+            return {}
+        avg_length = self._total_length / n or 1.0
+        scores: Dict[int, float] = {}
+        for token in set(tokenize(text)):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = tf + self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return scores
+
+    def retrieve(self, query: Union[str, List[str]], k: int = 20, pad_recent: bool = True) -> List[str]:
+        """
+        Top-k points for the query, returned in file order (stable prompts). With pad_recent, fewer than k
+        matches are topped up with the most recent points, so the memory section keeps a constant size.
+        The store first catches up (under the lock) with points added by other stores or edits since the last call.
+        """
+        with file_lock(self.path):
+            self._sync()
+        scores = self.scores(query)
+        chosen = set(heapq.nlargest(k, scores, key=lambda doc_id: (scores[doc_id], doc_id)))
+        if pad_recent:
+            for doc_id in range(len(self._lines) - 1, -1, -1):
+                if len(chosen) >= k:
+                    break
+                chosen.add(doc_id)
+        return [self._lines[doc_id] for doc_id in sorted(chosen)]
+
+
+class MemoryWriter:
+    """
+    Buffered, multi-process safe writer for new memory points.
+    Points from many runs are buffered (duplicates within the buffer are dropped right away) and written by one
+    MemoryStore.add() per flush: one locked append (+ fsync) with exact and near-duplicate checks against the
+    whole file. The store reads only what other processes appended since the last flush, so a flush costs
+    O(new points), not O(file size).
+    Használat:
+        with MemoryWriter("memory.md", flush_every=50) as writer:
+            for output in outputs:
+                writer.add(output.new_memory_points)
+    """
+
+    def __init__(self, path: str, flush_every: int = 100, fsync: bool = True):
+        self.path = path
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self._buffer: List[str] = []
+        self._buffered: Set[str] = set()
+        self._store: Optional[MemoryStore] = None
+
+    def add(self, points: Iterable[str]) -> int:
+        """Buffer points (as "* " bullets); flushes when flush_every points are waiting. Returns the buffer size."""
+        for point in points:
+            text = point_text(point)
+            if not text:
+                continue
+            line = f"* {text}"
+            key = point_hash(line)
+            if key in self._buffered:
+                continue
+            self._buffered.add(key)
+            self._buffer.append(line)
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+        return len(self._buffer)
+
+    def flush(self) -> List[str]:
+        """Write the buffered points that are not in the file yet; returns the written lines."""
+        if not self._buffer:
+            return []
+        if self._store is None:
+            # Az index egyszer töltődik be, utána minden flush csak a többiek új rekordjait olvassa
+            self._store = MemoryStore(self.path)
+        new = self._store.add(self._buffer, fsync=self.fsync)
+        self._buffer.clear()
+        self._buffered.clear()
+        return new
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "MemoryWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,150 @@
+import functools
+import json
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+# Ennyi legutóbbi mérésből számolunk kvantilist stage-enként (a count/sum mindig teljes)
+DEFAULT_WINDOW = 10000
+QUANTILES = (0.5, 0.95)
+
+
+def quantile(values, q: float) -> float:
+    """Nearest-rank quantile of the values (0.0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+    return ordered[index]
+
+
+def usage_counts(response: Any) -> Dict[str, int]:
+    """prompt/completion token counts from a langchain message (usage_metadata or response_metadata)."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return {"prompt_tokens": usage.get("input_tokens", 0), "completion_tokens": usage.get("output_tokens", 0)}
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    if token_usage:
+        return {"prompt_tokens": token_usage.get("prompt_tokens", 0), "completion_tokens": token_usage.get("completion_tokens", 0)}
+    return {}
+
+
+class MetricsRegistry:
+    """
+    In-process, thread-safe registry of per-stage wall times and counters (tokens, retries, ...).
+    Reports count / sum / p50 / p95 per stage and exports Prometheus text or JSON lines.
+
+    Használat:
+        with metrics.timer("llm_invoke") as m:
+            response = llm.invoke(messages)
+            m.update(usage_counts(response))
+        print(metrics.to_prometheus())
+    """
+    def __init__(self, window: int = DEFAULT_WINDOW, enabled: bool = True):
+        self.window = window
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._durations: Dict[str, deque] = {}
+        self._count: Dict[str, int] = defaultdict(int)
+        self._sum: Dict[str, float] = defaultdict(float)
+        self._counters: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def observe(self, stage: str, seconds: float, **counters: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            if stage not in self._durations:
+                self._durations[stage] = deque(maxlen=self.window)
+            self._durations[stage].append(seconds)
+            self._count[stage] += 1
+            self._sum[stage] += seconds
+            for name, value in counters.items():
+                self._counters[stage][name] += value
+
+    def increment(self, stage: str, name: str, value: float = 1) -> None:
+        """Counter without a timing sample (e.g. retries)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[stage][name] += value
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[Dict[str, float]]:
+        """Times the block; counters put into the yielded dict are recorded with the sample."""
+        counters: Dict[str, float] = {}
+        started = time.perf_counter()
+        try:
+            yield counters
+        finally:
+            self.observe(stage, time.perf_counter() - started, **counters)
+
+    def instrument(self, stage: str):
+        """Decorator form of timer()."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self) -> None:
+        with self._lock:
+            self._durations.clear()
+            self._count.clear()
+            self._sum.clear()
+            self._counters.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """{stage: {count, sum_s, p50_s, p95_s, <counters>...}}"""
+        with self._lock:
+            stages = set(self._durations) | set(self._counters)
+            result = {}
+            for stage in sorted(stages):
+                durations = list(self._durations.get(stage, ()))
+                stats = {
+                    "count": self._count.get(stage, 0),
+                    "sum_s": self._sum.get(stage, 0.0),
+                    "p50_s": quantile(durations, 0.5),
+                    "p95_s": quantile(durations, 0.95),
+                }
+                stats.update(self._counters.get(stage, {}))
+                result[stage] = stats
+            return result
+
+    def to_prometheus(self, prefix: str = "note_interpreter") -> str:
+        """Prometheus text exposition: a summary metric for stage timings plus one counter per counter name."""
+        summary = self.summary()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Wall time per pipeline stage.",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        for stage, stats in summary.items():
+            if not stats["count"]:
+                continue
+            for q in QUANTILES:
+                lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="{q}"}} {stats[f"p{int(q * 100)}_s"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {stats["sum_s"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        counter_names = sorted({name for stats in summary.values() for name in stats if name not in ("count", "sum_s", "p50_s", "p95_s")})
+        for name in counter_names:
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            for stage, stats in summary.items():
+                if name in stats:
+                    lines.append(f'{prefix}_{name}_total{{stage="{stage}"}} {stats[name]:g}')
+        return "\n".join(lines) + "\n"
+
+    def to_json_lines(self, timestamp: Optional[float] = None) -> str:
+        """One JSON object per stage per line, e.g. to append to a metrics file after each run."""
+        timestamp = time.time() if timestamp is None else timestamp
+        return "".join(
+            json.dumps({"timestamp": timestamp, "stage": stage, **stats}) + "\n"
+            for stage, stats in self.summary().items()
+        )
+
+
+# Singleton registry for easy import
+metrics = MetricsRegistry()
@@ -0,0 +1,295 @@
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Union
+
+from note_interpreter.backends import create_llm
+from note_interpreter.batching import TokenBudgetBatcher
+from note_interpreter.clarification import (ClarificationBroker, ClarificationPending, InMemoryClarificationBroker,
+                                            PendingClarification)
+from note_interpreter.io import InputHandler, StreamingNoteWriter
+from note_interpreter.log import log
+from note_interpreter.memory_store import MemoryWriter
+from note_interpreter.models import LLMOutput, Note, NoteBatch
+from note_interpreter.run_state import notes_key
+
+# NoteBatch -> feldolgozott NoteBatch (vagy közvetlenül a Note lista)
+BatchProcessor = Callable[[NoteBatch], Union[NoteBatch, List[Note]]]
+
+
+def passthrough_batch(batch: NoteBatch) -> NoteBatch:
+    """MVP1 behaviour: notes are written out unchanged."""
+    return batch
+
+
+def apply_llm_output(batch: NoteBatch, output: LLMOutput) -> NoteBatch:
+    """Copy the interpreted entries back onto the batch's notes (entries are in note order)."""
+    for note, entry in zip(batch.notes, output.entries):
+        note.interpreted_text = entry.interpreted_text
+        note.clarity_score = entry.clarity_score
+        note.metadata = {**note.metadata, 'entity_type': entry.entity_type, 'intent': entry.intent}
+    return batch
+
+
+class AgentBatchProcessor:
+    """
+    Picklable BatchProcessor that runs a SingleAgent on each NoteBatch, so it can be shipped to worker
+    processes. The LLM client is created lazily, once per worker process, from the backend registry
+    (backend_options are passed to the backend factory, e.g. latency_s for "fake").
+    memory_path: if given, each batch's new_memory_points are appended to this Markdown memory file
+    (deduplicated, one locked append per batch, safe across worker processes).
+    clarification_broker: where clarification questions go. Workers have no console, so it must be headless;
+    use SQLiteClarificationBroker to answer and resume from another process. By default each worker keeps
+    its requests in memory. A batch that waits for an answer raises ClarificationPending (batch id:
+    "batch-<notes fingerprint>"), which PipelineRunner reports in stats.pending; once answered, resume()
+    continues it (PipelineRunner.run(resume=True) does this for the shards recorded in the checkpoint).
+    """
+    def __init__(self, backend: str = "openai", model: Optional[str] = None, temperature: float = 0.0,
+                 backend_options: Optional[dict] = None, memory_path: Optional[str] = None,
+                 clarification_broker: Optional[ClarificationBroker] = None, **agent_kwargs):
+        self.backend = backend
+        self.model = model
+        self.temperature = temperature
+        self.backend_options = backend_options or {}
+        self.memory_path = memory_path
+        self.clarification_broker = clarification_broker
+        self.agent_kwargs = agent_kwargs
+        self._llm = None
+        self._memory_writer = None
+        self._broker = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_llm'] = None
+        state['_memory_writer'] = None
+        state['_broker'] = None
+        return state
+
+    def _agent(self, notes: List[str], user_memory: List[str], classification_config: dict, batch_id: str):
+        from note_interpreter.llm_agent import SingleAgent
+        if self._llm is None:
+            self._llm = create_llm(self.backend, self.model, self.temperature, **self.backend_options)
+        llm, tool_provider = self._llm
+        return SingleAgent(
+            notes,
+            user_memory,
+            classification_config=classification_config,
+            temperature=self.temperature,
+            llm=llm,
+            tool_provider=tool_provider,
+            clarification_broker=self.broker,
+            batch_id=batch_id,
+            **self.agent_kwargs
+        )
+
+    @property
+    def broker(self) -> ClarificationBroker:
+        if self._broker is None:
+            self._broker = self.clarification_broker or InMemoryClarificationBroker()
+        return self._broker
+
+    def __call__(self, batch: NoteBatch) -> NoteBatch:
+        notes = [note.raw_input for note in batch.notes]
+        agent = self._agent(notes, batch.user_memory, batch.classification_config, f"batch-{notes_key(notes)}")
+        return self._finish(batch, agent.run())
+
+    def resume(self, request_id: str, classification_config: Optional[dict] = None) -> NoteBatch:
+        """
+        Continue a shard suspended on request_id and return its processed NoteBatch.
+        Raises ClarificationPending while the request has no answer yet (or the shard asks a new question), and
+        ValueError if the broker does not know the request (e.g. an in-memory broker of an earlier run).
+        """
+        pending = self.broker.get(request_id)
+        if not pending.answered:
+            raise ClarificationPending(pending)
+        notes = pending.state["notes"]
+        batch = NoteBatch(notes=[Note(raw_input=note) for note in notes], user_memory=pending.state["user_memory"],
+                          classification_config=classification_config or {})
+        agent = self._agent([], [], batch.classification_config, pending.batch_id)
+        return self._finish(batch, agent.resume(request_id))
+
+    def _finish(self, batch: NoteBatch, output: Union[LLMOutput, PendingClarification]) -> NoteBatch:
+        if isinstance(output, PendingClarification):
+            raise ClarificationPending(output)
+        if self.memory_path and output.new_memory_points:
+            # Workerenként egy writer; a batch végén flush, mert a worker folyamat atexit nélkül állhat le
+            if self._memory_writer is None:
+                self._memory_writer = MemoryWriter(self.memory_path)
+            self._memory_writer.add(output.new_memory_points)
+            self._memory_writer.flush()
+        return apply_llm_output(batch, output)
+
+
+def open_note_writer(path: str, output_format: str = "csv", **kwargs):
+    """Streaming writer for the given output format (same write_batch/flush/close interface)."""
+    if output_format == "csv":
+        return StreamingNoteWriter(path, **kwargs)
+    if output_format == "parquet":
+        from note_interpreter.columnar import ParquetNoteWriter
+        return ParquetNoteWriter(path, **kwargs)
+    raise ValueError(f"Unknown output format: {output_format}")
+
+
+@dataclass
+class PipelineStats:
+    notes: int = 0
+    batches: int = 0
+    committed: int = 0
+    elapsed_s: float = 0.0
+    # Batches suspended on a clarification question (their notes are written unresolved)
+    pending: List[PendingClarification] = field(default_factory=list)
+    # Suspended batches of earlier runs whose rows were rewritten on resume
+    resumed: int = 0
+
+    @property
+    def notes_per_s(self) -> float:
+        return self.notes / self.elapsed_s if self.elapsed_s else 0.0
+
+
+class _InlineExecutor(Executor):
+    """Runs submitted work immediately in the calling thread (executor='serial')."""
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class PipelineRunner:
+    """
+    Sharded batch pipeline: the input CSV is streamed in NoteBatch shards of batch_size, the shards are fanned
+    out to a pool of workers, and the results are written back in input order as soon as they are ready.
+    - executor: "process" (ProcessPoolExecutor, processor must be picklable), "thread" or "serial".
+    - At most max_in_flight shards are queued or running at once, so memory stays bounded.
+    - progress(stats) is called after every written batch (e.g. to print throughput).
+    - batcher: optional TokenBudgetBatcher; shards are then packed up to a prompt token budget instead of
+      batch_size notes.
+    - A shard whose processor raises ClarificationPending does not stop the run: its notes are written
+      unresolved, the handle is collected in stats.pending, and the other shards keep running. The CSV
+      checkpoint records these shards; run(resume=True) first calls process_batch.resume(request_id, ...)
+      (if the processor has one, e.g. AgentBatchProcessor) for each of them and rewrites the rows of the
+      answered ones, in the calling process.
+
+    Használat:
+        runner = PipelineRunner(AgentBatchProcessor(backend="fake"), workers=8, batch_size=20)
+        stats = runner.run("notes.csv", "memory.md", "classification.yaml", "out.csv")
+    """
+    def __init__(self, process_batch: Optional[BatchProcessor] = None, workers: int = 4, batch_size: int = 100,
+                 executor: str = "process", max_in_flight: Optional[int] = None,
+                 progress: Optional[Callable[[PipelineStats], None]] = None,
+                 batcher: Optional[TokenBudgetBatcher] = None):
+        if executor not in ("process", "thread", "serial"):
+            raise ValueError(f"Unknown executor: {executor}")
+        self.process_batch = process_batch or passthrough_batch
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.executor = executor
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self.progress = progress
+        self.batcher = batcher
+
+    def _create_executor(self) -> Executor:
+        if self.executor == "process":
+            return ProcessPoolExecutor(max_workers=self.workers)
+        if self.executor == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers)
+        return _InlineExecutor()
+
+    def run(self, notes_csv: str, memory_md: str, class_yaml: str, output: str, output_format: str = "csv",
+            resume: bool = False, flush_every: int = 1, checkpoint_path: Optional[str] = None) -> PipelineStats:
+        stats = PipelineStats()
+        started = time.perf_counter()
+        with open_note_writer(output, output_format, checkpoint_path=checkpoint_path, flush_every=flush_every, resume=resume) as writer, \
+                self._create_executor() as pool:
+            start = writer.committed_offset
+            if start:
+                log.info(f"[pipeline] Resuming {output} after {start} committed notes")
+            if resume and writer.suspended:
+                self._resume_suspended(writer, class_yaml, stats)
+            pending = deque()
+
+            def write_oldest():
+                batch, future = pending.popleft()
+                batch_len = len(batch.notes)
+                suspended = None
+                try:
+                    result = future.result()
+                except ClarificationPending as e:
+                    # A shard várja a felhasználó válaszát: a többi shard fut tovább
+                    log.info(f"[pipeline] Batch {e.pending.batch_id} waits for clarification {e.pending.request_id}")
+                    stats.pending.append(e.pending)
+                    suspended = {'request_id': e.pending.request_id, 'batch_id': e.pending.batch_id}
+                    result = batch
+                notes = result.notes if isinstance(result, NoteBatch) else result
+                writer.write_batch(notes, consumed=batch_len, suspended=suspended)
+                stats.notes += batch_len
+                stats.batches += 1
+                stats.elapsed_s = time.perf_counter() - started
+                log.debug(f"[pipeline] Batch {stats.batches} written ({start + stats.notes} notes read so far)")
+                if self.progress:
+                    self.progress(stats)
+
+            for batch in InputHandler.iter_note_batches(notes_csv, memory_md, class_yaml, self.batch_size, skip=start,
+                                                         batcher=self.batcher):
+                pending.append((batch, pool.submit(self.process_batch, batch)))
+                # Sorrendtartó kiírás: a legrégebbi shardot írjuk ki, amint kész, vagy ha tele a sor
+                while pending and (len(pending) >= self.max_in_flight or pending[0][1].done()):
+                    write_oldest()
+            while pending:
+                write_oldest()
+        stats.committed = writer.committed_offset
+        stats.elapsed_s = time.perf_counter() - started
+        return stats
+
+    def _resume_suspended(self, writer: StreamingNoteWriter, class_yaml: str, stats: PipelineStats) -> None:
+        """Resume the suspended shards of earlier runs and rewrite the rows of those that are now resolved."""
+        resume_shard = getattr(self.process_batch, "resume", None)
+        if resume_shard is None:
+            return
+        config = InputHandler.read_classification_yaml(class_yaml)
+        resolved = {}
+        for entry in writer.suspended:
+            try:
+                result = resume_shard(entry['request_id'], classification_config=config)
+            except ClarificationPending as e:
+                # Még nincs válasz, vagy új kérdés jött: a shard sorai az (új) kéréssel várnak tovább
+                entry['request_id'] = e.pending.request_id
+                stats.pending.append(e.pending)
+                continue
+            except ValueError as e:
+                log.warning(f"[pipeline] Cannot resume batch {entry.get('batch_id')}: {e}")
+                continue
+            resolved[entry['request_id']] = result.notes if isinstance(result, NoteBatch) else result
+        writer.rewrite_suspended(resolved)
+        stats.resumed += len(resolved)
+        log.info(f"[pipeline] Rewrote {len(resolved)} resumed batches, {len(writer.suspended)} still suspended")
+
+
+def run_streaming_pipeline(
+    notes_csv: str,
+    memory_md: str,
+    class_yaml: str,
+    output_csv: str,
+    chunk_size: int = 1000,
+    process_batch: Optional[BatchProcessor] = None,
+    resume: bool = False,
+    flush_every: int = 1,
+    checkpoint_path: Optional[str] = None,
+    output_format: str = "csv"
+) -> int:
+    """
+    Chunked load -> process -> write loop, in the calling thread.
+    Notes are read from the CSV in NoteBatch chunks of chunk_size, each chunk is processed and its rows are
+    appended by a streaming writer, so memory use does not grow with the input.
+    Progress is checkpointed every `flush_every` batches; with resume=True the run continues after the last
+    committed note instead of starting over (CSV only).
+    output_format: "csv" or "parquet" (columnar, needs pyarrow).
+    Returns the number of input notes processed (including those committed by earlier runs).
+    """
+    runner = PipelineRunner(process_batch, batch_size=chunk_size, executor="serial", max_in_flight=1)
+    stats = runner.run(notes_csv, memory_md, class_yaml, output_csv, output_format=output_format,
+                       resume=resume, flush_every=flush_every, checkpoint_path=checkpoint_path)
+    return stats.committed
@@ -1,7 +1,117 @@
+import hashlib
+import os
+import re
 import yaml
 import json
 from note_interpreter.log import log
-from typing import List, Optional, Dict, Callable, Any
+from note_interpreter.metrics import metrics
+from note_interpreter.resources import resource_loader
+from typing import List, Optional, Dict, Callable, Any, Tuple
+
+# {key} placeholder a custom_text-ekben; csak azonosító lehet, így a szövegbe írt JSON ({"id": 1}) nem placeholder
+PLACEHOLDER_PATTERN = re.compile(r"\{([A-Za-z_]\w*)\}")
+
+
+class CompiledSection:
+    """
+    One section of a compiled prompt config.
+    custom_text is pre-split into (is_placeholder, text) segments; otherwise the section is rendered
+    by its registry function at render time.
+    Static sections (registered with static=True, or custom_text without placeholders) do not depend on
+    the context, so their text is rendered once and memoized.
+    """
+    __slots__ = ('name', 'separator', 'params', 'segments', 'static', '_static_text')
+
+    def __init__(self, name: str, separator: str, params: dict, custom_text: Optional[str], static: bool = False):
+        self.name = name
+        self.separator = separator
+        self.params = params
+        self.segments = CompiledSection.split_placeholders(custom_text) if custom_text else None
+        if self.segments is not None:
+            static = not any(is_placeholder for is_placeholder, _ in self.segments)
+        self.static = static
+        self._static_text = None
+
+    @staticmethod
+    def split_placeholders(text: str) -> List[Tuple[bool, str]]:
+        segments = []
+        pos = 0
+        for match in PLACEHOLDER_PATTERN.finditer(text):
+            if match.start() > pos:
+                segments.append((False, text[pos:match.start()]))
+            segments.append((True, match.group(1)))
+            pos = match.end()
+        if pos < len(text):
+            segments.append((False, text[pos:]))
+        return segments
+
+    def render(self, context: dict, serialized: dict) -> str:
+        if self.static:
+            if self._static_text is None:
+                self._static_text = self._render(context={}, serialized={})
+            return self._static_text
+        return self._render(context, serialized)
+
+    def _render(self, context: dict, serialized: dict) -> str:
+        if self.segments is not None:
+            parts = []
+            for is_placeholder, text in self.segments:
+                if not is_placeholder:
+                    parts.append(text)
+                elif text in context:
+                    if text not in serialized:
+                        serialized[text] = PromptBuilder.serialize_value(context[text])
+                    parts.append(serialized[text])
+                else:
+                    # Ismeretlen placeholder: változatlanul marad, mint fill_placeholders-nél
+                    parts.append("{" + text + "}")
+            return "".join(parts)
+        return PromptBuilder.render_registry_section(self.name, self.params, context)
+
+
+class CompiledPrompt:
+    """
+    Parsed and pre-split prompt config, produced by PromptBuilder.compile().
+    render(context) gives the same prompt as PromptBuilder.build(context, config_path), in one linear pass
+    and without touching the config file.
+    render(context, static_first=True) emits the memoized static prefix first and the context-dependent
+    sections after it, so consecutive prompts share a byte-identical prefix (provider-side prompt caching).
+    """
+    def __init__(self, sections: List[CompiledSection]):
+        self.sections = sections
+        self._static_prefix = None
+
+    @property
+    def static_prefix(self) -> str:
+        """All static sections (config order), rendered once per compiled config."""
+        if self._static_prefix is None:
+            self._static_prefix = self._join(self.sections, {}, static=True)
+        return self._static_prefix
+
+    @property
+    def version(self) -> str:
+        """Short hash of the static prefix and the section layout; changes whenever the prompt template does."""
+        layout = "|".join(f"{s.name}:{s.static}" for s in self.sections)
+        return hashlib.sha256((layout + "\n" + self.static_prefix).encode("utf-8")).hexdigest()[:12]
+
+    @metrics.instrument("prompt_render")
+    def render(self, context: dict, static_first: bool = False) -> str:
+        if not static_first:
+            return self._join(self.sections, context)
+        dynamic = self._join(self.sections, context, static=False)
+        return "\n\n".join([p for p in (self.static_prefix, dynamic) if p])
+
+    @staticmethod
+    def _join(sections: List[CompiledSection], context: dict, static: Optional[bool] = None) -> str:
+        serialized: Dict[str, str] = {}
+        prompt_parts = []
+        for section in sections:
+            if static is not None and section.static != static:
+                continue
+            prompt_parts.append(section.separator)
+            prompt_parts.append(section.render(context, serialized))
+        return "\n\n".join([p for p in prompt_parts if p])
+
 
 class PromptBuilder:
     """
@@ -24,6 +134,12 @@ class PromptBuilder:
         )
     """
     section_registry: Dict[str, Callable[[dict, dict], str]] = {}
+    # Szekció név -> nem függ a context-től (csak a params-tól)
+    section_static: Dict[str, bool] = {}
+    # Szekció név -> params -> a szekció által olvasott fájlok (ezek mtime-ja is a compile cache kulcs része)
+    section_files: Dict[str, Callable[[dict], List[str]]] = {}
+    # config_path -> ((path, mtime) a configra és a statikus szekciók fájljaira, CompiledPrompt)
+    _compiled_cache: Dict[str, Tuple[Tuple[Tuple[str, Optional[float]], ...], CompiledPrompt]] = {}
 
     SECTION_HEADER_MAP = {
         'intro': 'IDENTITY / ROLE',
@@ -50,9 +166,20 @@ class PromptBuilder:
     }
 
     @classmethod
-    def register_section(cls, name: str):
+    def register_section(cls, name: str, static: bool = False,
+                         files: Optional[Callable[[dict], List[str]]] = None):
+        """
+        static=True: the section only depends on its params, never on the context, so compiled
+        prompts render it once and can emit it as part of the shared static prefix.
+        files: params -> the files a static section reads; compiled prompts are recompiled when they change.
+        """
         def decorator(func):
             cls.section_registry[name] = func
+            cls.section_static[name] = static
+            if files:
+                cls.section_files[name] = files
+            else:
+                cls.section_files.pop(name, None)
             return func
         return decorator
 
@@ -74,18 +201,37 @@ class PromptBuilder:
             text = text.replace(f"{{{key}}}", cls.serialize_value(value))
         return text
 
+    @staticmethod
+    def load_config(config_path: str) -> dict:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            if config_path.endswith('.json'):
+                return json.load(f)
+            return yaml.safe_load(f)
+
+    @staticmethod
+    def section_separator(name: str) -> str:
+        # Separator: szekció neve nagybetűvel, szóköz helyett _
+        header = re.sub(r'_', ' ', name).upper()
+        return f"------------ {header} ------------"
+
+    @classmethod
+    def render_registry_section(cls, name: str, params: dict, context: dict) -> str:
+        func = cls.section_registry.get(name)
+        if func:
+            try:
+                return func(params, context)
+            except Exception as e:
+                return f"[ERROR in section '{name}']: {e}"
+        return f"[WARNING: section '{name}' not found in registry]"
+
     @classmethod
+    @metrics.instrument("prompt_build")
     def build(cls, context: dict, config_path: str) -> str:
         """
         context: dict, minden kulcsa placeholderként használható
         config_path: YAML vagy JSON file, amely a szekciókat írja le
         """
-        import re
-        with open(config_path, 'r', encoding='utf-8') as f:
-            if config_path.endswith('.json'):
-                config = json.load(f)
-            else:
-                config = yaml.safe_load(f)
+        config = cls.load_config(config_path)
         sections = config.get('sections', [])
         prompt_parts = []
         for section in sections:
@@ -94,25 +240,54 @@ class PromptBuilder:
             name = section['name']
             params = section.get('params', {})
             custom_text = section.get('custom_text')
-            # Separator: szekció neve nagybetűvel, szóköz helyett _
-            header = re.sub(r'_', ' ', name).upper()
-            separator = f"------------ {header} ------------"
-            prompt_parts.append(separator)
+            prompt_parts.append(cls.section_separator(name))
             if custom_text:
                 prompt_parts.append(cls.fill_placeholders(custom_text, context))
                 continue
-            func = cls.section_registry.get(name)
-            if func:
-                try:
-                    part = func(params, context)
-                    prompt_parts.append(part)
-                except Exception as e:
-                    prompt_parts.append(f"[ERROR in section '{name}']: {e}")
-            else:
-                prompt_parts.append(f"[WARNING: section '{name}' not found in registry]")
+            prompt_parts.append(cls.render_registry_section(name, params, context))
         prompt = "\n\n".join([p for p in prompt_parts if p])
         return prompt
 
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    @classmethod
+    def compile(cls, config_path: str) -> CompiledPrompt:
+        """
+        Parse config_path once and return a CompiledPrompt (cached on path + mtime, so edits are picked up;
+        the same holds for the files read by static sections, e.g. the output schema).
+        Használat:
+            prompt = PromptBuilder.compile("resources/single_agent/prompt_config.yaml").render(context)
+        """
+        key = os.path.abspath(config_path)
+        mtime = os.stat(key).st_mtime
+        cached = cls._compiled_cache.get(key)
+        if cached and all(cls._mtime(path) == file_mtime for path, file_mtime in cached[0]):
+            return cached[1]
+        config = cls.load_config(config_path)
+        compiled = CompiledPrompt([
+            CompiledSection(
+                name=section['name'],
+                separator=cls.section_separator(section['name']),
+                params=section.get('params', {}),
+                custom_text=section.get('custom_text'),
+                static=cls.section_static.get(section['name'], False)
+            )
+            for section in config.get('sections', [])
+            if section.get('enabled', True)
+        ])
+        sources = [(key, mtime)]
+        for section in compiled.sections:
+            files = cls.section_files.get(section.name)
+            if section.static and files:
+                sources.extend((os.path.abspath(path), cls._mtime(path)) for path in files(section.params))
+        cls._compiled_cache[key] = (tuple(sources), compiled)
+        return compiled
+
 # --- Példa szekció-regisztráció ---
 @PromptBuilder.register_section('intro')
 def intro_section(params, context):
@@ -124,7 +299,7 @@ def intro_section(params, context):
 
 # Példa szekciók (a teljes lista az llm_agent.py-ból átmásolandó):
 
-@PromptBuilder.register_section('goals')
+@PromptBuilder.register_section('goals', static=True)
 def goals_section(params, context):
     return ("## 🎯 Your Goals\n\n"
             "For each input note, your output must include:\n"
@@ -135,12 +310,13 @@ def goals_section(params, context):
             "3. You MUST use the tools – never respond in plain text.\n"
     )
 
-@PromptBuilder.register_section('output_schema_and_meanings')
+def _schema_file(params) -> str:
+    return params.get('schema_file', 'resources/single_agent/notes_output_schema.yaml')
+
+@PromptBuilder.register_section('output_schema_and_meanings', static=True, files=lambda params: [_schema_file(params)])
 def output_schema_and_meanings_section(params, context):
-    schema_file = params.get('schema_file', 'resources/single_agent/notes_output_schema.yaml')
-    import yaml as _yaml
-    with open(schema_file, 'r', encoding='utf-8') as f:
-        schema = _yaml.safe_load(f)
+    schema_file = _schema_file(params)
+    schema = resource_loader.load(schema_file)
     section = "## 📌 Structured Output Schema & Field Meanings\n\nEach entry must have the following fields:\n\n"
     for field, info in schema.get('DataEntry', {}).items():
         section += f"- `{field}` ({info.get('type','')}): {info.get('description','')}\n"
@@ -188,7 +364,7 @@ def parameter_explanations_section(params, context):
         section += f"- `{param}` = {info['value']} ({info['description']})\n"
     return section
 
-@PromptBuilder.register_section('output_validation_rules')
+@PromptBuilder.register_section('output_validation_rules', static=True)
 def output_validation_rules_section(params, context):
     return (
         "## 🔒 Output Validation Rules (Mandatory)\n\n"
@@ -199,7 +375,7 @@ def output_validation_rules_section(params, context):
         "- For `ask_user`, always include at least one question.\n"
     )
 
-@PromptBuilder.register_section('tool_json_schema')
+@PromptBuilder.register_section('tool_json_schema', static=True)
 def tool_json_schema_section(params, context):
     schema = [
         {
@@ -234,7 +410,7 @@ def tool_json_schema_section(params, context):
         "```json\n" + json.dumps(schema, indent=2) + "\n```\n"
     )
 
-@PromptBuilder.register_section('tool_behavior_summary')
+@PromptBuilder.register_section('tool_behavior_summary', static=True)
 def tool_behavior_summary_section(params, context):
     return (
         "## 🛠️ Tool Behavior Summary\n\n"
@@ -243,7 +419,7 @@ def tool_behavior_summary_section(params, context):
         "- Never respond in plain text or unstructured answers.\n"
     )
 
-@PromptBuilder.register_section('context_usage')
+@PromptBuilder.register_section('context_usage', static=True)
 def context_usage_section(params, context):
     return (
         "## 🧠 Context Usage\n\n"
@@ -252,7 +428,7 @@ def context_usage_section(params, context):
         "- Always aim for clarity and actionability.\n"
     )
 
-@PromptBuilder.register_section('clarification_protocol')
+@PromptBuilder.register_section('clarification_protocol', static=True)
 def clarification_protocol_section(params, context):
     return (
         "## 🔍 Clarification Protocol\n\n"
@@ -278,7 +454,7 @@ def clarification_protocol_section(params, context):
         "- If ambiguity persists, finalize output and use `UNDEFINED` or `MISSING_` flags.\n"
     )
 
-@PromptBuilder.register_section('memory_update')
+@PromptBuilder.register_section('memory_update', static=True)
 def memory_update_section(params, context):
     return (
         "## 🧠 Memory Update Rules\n\n"
@@ -291,7 +467,7 @@ def memory_update_section(params, context):
         "- Never rewrite or delete past memory – this log is append-only.\n"
     )
 
-@PromptBuilder.register_section('memory_point_examples')
+@PromptBuilder.register_section('memory_point_examples', static=True)
 def memory_point_examples_section(params, context):
     return (
         "## 📘 Memory Point Examples\n\n"
@@ -300,7 +476,7 @@ def memory_point_examples_section(params, context):
         "* Tamas uses the term 'LifeOS' to refer to his integrated personal operating system project.\n"
     )
 
-@PromptBuilder.register_section('example_output')
+@PromptBuilder.register_section('example_output', static=True)
 def example_output_section(params, context):
     return (
         "## 🧮 Example Entry Output (JSON)\n\n"
@@ -349,7 +525,7 @@ def input_context_section(params, context):
             section += f"  User response: {resp}\n"
     return section
 
-@PromptBuilder.register_section('finalization_protocol')
+@PromptBuilder.register_section('finalization_protocol', static=True)
 def finalization_protocol_section(params, context):
     return (
         "## 🛑 Finalization Protocol\n\n"
@@ -360,18 +536,18 @@ def finalization_protocol_section(params, context):
         "  - Still call the `finalize_notes` with all fields included.\n"
     )
 
-@PromptBuilder.register_section('communication_strategy')
+@PromptBuilder.register_section('communication_strategy', static=True)
 def communication_strategy_section(params, context):
     return params.get('custom_text', '')
 
-@PromptBuilder.register_section('constraints')
+@PromptBuilder.register_section('constraints', static=True)
 def constraints_section(params, context):
     return params.get('custom_text', '')
 
-@PromptBuilder.register_section('reasoning_style')
+@PromptBuilder.register_section('reasoning_style', static=True)
 def reasoning_style_section(params, context):
     return params.get('custom_text', '')
 
-@PromptBuilder.register_section('meta_behavior')
+@PromptBuilder.register_section('meta_behavior', static=True)
 def meta_behavior_section(params, context):
     return params.get('custom_text', '') 
\ No newline at end of file
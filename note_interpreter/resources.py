@@ -0,0 +1,103 @@
+import copy
+import json
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+import yaml
+
+
+def _immutable(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only (shared resource); use thaw() for a mutable copy")
+
+
+class FrozenDict(dict):
+    """Read-only dict handed out by the ResourceLoader. Compares equal to a plain dict."""
+    __setitem__ = __delitem__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+    __ior__ = _immutable
+
+    def __copy__(self):
+        return thaw(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    """Read-only list handed out by the ResourceLoader. Compares equal to a plain list."""
+    __setitem__ = __delitem__ = _immutable
+    append = extend = insert = pop = remove = clear = sort = reverse = _immutable
+    __iadd__ = __imul__ = _immutable
+
+    def __copy__(self):
+        return thaw(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert parsed YAML/JSON into FrozenDict/FrozenList."""
+    if isinstance(value, dict):
+        return FrozenDict({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Recursively convert frozen resources back into plain, mutable dicts/lists."""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    return copy.copy(value)
+
+
+class ResourceLoader:
+    """
+    Shared, mtime-checked cache for YAML/JSON resource files (schema, parameters, classification, ...).
+    - A file is parsed only when it is first requested or its mtime/size changed since the last load.
+    - The parsed object is frozen (FrozenDict/FrozenList) and shared by every caller, so nobody can
+      accidentally modify another caller's copy.
+
+    Használat:
+        from note_interpreter.resources import resource_loader
+        schema = resource_loader.load("resources/single_agent/notes_output_schema.yaml")
+    """
+    def __init__(self):
+        self._cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: str) -> Any:
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._cache.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+        with open(key, 'r', encoding='utf-8') as f:
+            data = json.load(f) if key.endswith('.json') else yaml.safe_load(f)
+        frozen = freeze(data)
+        with self._lock:
+            self._cache[key] = (signature, frozen)
+        return frozen
+
+    def invalidate(self, path: str = None) -> None:
+        """Drop one cached file (or everything if path is None)."""
+        with self._lock:
+            if path is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(os.path.abspath(path), None)
+
+
+# Singleton instance for easy import
+resource_loader = ResourceLoader()
@@ -0,0 +1,132 @@
+# Persistent per-batch run state for multi-round clarification runs.
+# Every LLM round and every answer is one appended JSON line in <directory>/<batch id>.jsonl; the batch id maps
+# straight to its file, and replaying the (short) log gives the last completed round, so a restarted process
+# continues there instead of paying for the earlier rounds again.
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+def notes_key(notes: List[str]) -> str:
+    """Short fingerprint of a note list (a batch id is only resumed for the same notes)."""
+    digest = hashlib.sha256()
+    for note in notes:
+        digest.update(note.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+@dataclass
+class RunState:
+    """Replayed state of one batch: the last completed round and everything needed to build the next prompt."""
+    batch_id: str
+    prompt_version: str
+    notes_key: str
+    round: int = -1
+    clarification_qas: List[Dict[str, Any]] = field(default_factory=list)
+    questions: List[str] = field(default_factory=list)
+    question_kind: Optional[str] = None
+    last_tool: Optional[str] = None
+    last_payload: Optional[Dict[str, Any]] = None
+    finished: bool = False
+    selection: Optional[Dict[str, Any]] = None
+
+    @property
+    def awaiting_answer(self) -> bool:
+        """Questions of the last round were asked but not answered yet."""
+        return bool(self.questions) and not self.finished
+
+    def matches(self, prompt_version: str, notes: List[str]) -> bool:
+        return self.prompt_version == prompt_version and self.notes_key == notes_key(notes)
+
+
+class RunStateStore:
+    """
+    Append-only run-state log, one JSON-lines file per batch id.
+    Használat:
+        store = RunStateStore("state/runs")
+        agent = SingleAgent(notes, memory, batch_id="batch-42", run_state_store=store)
+        agent.run()   # after a crash, the same call continues from the last completed round
+    """
+
+    def __init__(self, directory: str, fsync: bool = False):
+        self.directory = directory
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, batch_id: str) -> str:
+        # Fájlnévbarát név + rövid hash, hogy a különböző id-k ne ütközzenek
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", batch_id)[:80]
+        return os.path.join(self.directory, f"{safe}-{hashlib.sha1(batch_id.encode('utf-8')).hexdigest()[:8]}.jsonl")
+
+    def _append(self, batch_id: str, record: Dict[str, Any]) -> None:
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+        with open(self.path(batch_id), "ab+") as f:
+            # Csonka utolsó sor (leállás írás közben) után új sorban kezdünk
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def start(self, batch_id: str, prompt_version: str, notes: List[str]) -> None:
+        """Begin a new run for the batch (earlier records of the batch are superseded)."""
+        self._append(batch_id, {"type": "start", "prompt_version": prompt_version, "notes_key": notes_key(notes)})
+
+    def record_round(self, batch_id: str, round_num: int, tool: Optional[str], payload: Optional[Dict[str, Any]] = None,
+                     questions: Optional[List[str]] = None, kind: Optional[str] = None, final: bool = False,
+                     selection: Optional[Dict[str, Any]] = None) -> None:
+        """selection: per-note mode state (frozen entries, unresolved note indices) after this round."""
+        self._append(batch_id, {"type": "round", "round": round_num, "tool": tool, "payload": payload,
+                                "questions": questions or [], "kind": kind, "final": final, "selection": selection})
+
+    def record_answer(self, batch_id: str, round_num: int, answer: str) -> None:
+        self._append(batch_id, {"type": "answer", "round": round_num, "answer": answer})
+
+    def load(self, batch_id: str) -> Optional[RunState]:
+        """Replay the batch's log; None if the batch has no run."""
+        path = self.path(batch_id)
+        if not os.path.exists(path):
+            return None
+        state = None
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Csonka sor (írás közbeni leállás): kihagyjuk
+                    continue
+                state = self._apply(state, batch_id, record)
+        return state
+
+    @staticmethod
+    def _apply(state: Optional[RunState], batch_id: str, record: Dict[str, Any]) -> Optional[RunState]:
+        if record["type"] == "start":
+            return RunState(batch_id=batch_id, prompt_version=record["prompt_version"], notes_key=record["notes_key"])
+        if state is None:
+            return None
+        if record["type"] == "round":
+            state.round = record["round"]
+            state.last_tool = record["tool"]
+            state.last_payload = record["payload"]
+            state.questions = record["questions"]
+            state.question_kind = record["kind"]
+            state.finished = record["final"]
+            state.selection = record.get("selection")
+        elif record["type"] == "answer" and state.questions:
+            # Same shape as SingleAgent's Q&A entries (ask_user questions and plain-text messages alike)
+            state.clarification_qas.append({"questions": state.questions, "response": record["answer"]})
+            state.questions = []
+        return state
+
+    def clear(self, batch_id: str) -> None:
+        try:
+            os.remove(self.path(batch_id))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,123 @@
+# Fast shared-context snapshots: compact JSON (stdlib) or msgpack (optional: pip install msgpack).
+# A full snapshot is written atomically; delta records (changed fields only) are appended to <path>.delta
+# and replayed on load, so frequent checkpoints only pay for what changed.
+import json
+import os
+from typing import Any, Dict, Iterator, Tuple
+
+SCHEMA_VERSION = 1
+
+
+def snapshot_format(path: str) -> str:
+    """"msgpack" for .msgpack / .mpk files, "json" otherwise."""
+    return "msgpack" if os.path.splitext(path)[1] in (".msgpack", ".mpk") else "json"
+
+
+def delta_path(path: str) -> str:
+    return path + ".delta"
+
+
+def _require_msgpack():
+    try:
+        import msgpack
+    except ImportError as e:
+        raise ImportError("msgpack snapshots require msgpack: pip install msgpack") from e
+    return msgpack
+
+
+def _encode(record: Dict[str, Any], fmt: str) -> bytes:
+    if fmt == "msgpack":
+        return _require_msgpack().packb(record, use_bin_type=True, default=str)
+    return (json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str) + "\n").encode("utf-8")
+
+
+def _iter_records(path: str, fmt: str) -> Iterator[Dict[str, Any]]:
+    with open(path, "rb") as f:
+        if fmt == "msgpack":
+            yield from _require_msgpack().Unpacker(f, raw=False, strict_map_key=False)
+            return
+        for line in f:
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Csonka utolsó rekord (írás közbeni leállás): az addigi állapotot használjuk
+                    return
+                yield record
+
+
+def _check_schema(record: Dict[str, Any], path: str) -> None:
+    if record.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported snapshot schema version {record.get('schema_version')!r} in {path}")
+
+
+def write_snapshot(path: str, version: int, metadata: Dict[str, Any], content: Dict[str, Any]) -> None:
+    """Atomically write a full snapshot and start a new (empty) delta log for it."""
+    fmt = snapshot_format(path)
+    record = {"schema_version": SCHEMA_VERSION, "version": version, "metadata": metadata, "content": content}
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_encode(record, fmt))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if os.path.exists(delta_path(path)):
+        os.remove(delta_path(path))
+
+
+def _complete_length(f, fmt: str) -> int:
+    """Byte length of the complete records at the start of the open delta file (a torn last record excluded)."""
+    size = f.seek(0, os.SEEK_END)
+    if fmt == "msgpack":
+        f.seek(0)
+        unpacker = _require_msgpack().Unpacker(f, raw=False, strict_map_key=False)
+        end = 0
+        for _ in unpacker:
+            end = unpacker.tell()
+        return end
+    # JSON: az utolsó "\n" utáni rész csonka rekord
+    pos = size
+    while pos > 0:
+        step = min(pos, 4096)
+        pos -= step
+        f.seek(pos)
+        chunk = f.read(step)
+        if pos + step == size and chunk.endswith(b"\n"):
+            return size
+        newline = chunk.rfind(b"\n")
+        if newline != -1:
+            return pos + newline + 1
+    return 0
+
+
+def append_delta(path: str, version: int, changes: Dict[str, Any]) -> None:
+    """
+    Append one delta record (the fields changed since the previous save) to the snapshot's delta log.
+    A torn last record (crash during an earlier append) is cut off first, so replay does not stop before the new one.
+    """
+    fmt = snapshot_format(path)
+    record = {"schema_version": SCHEMA_VERSION, "version": version, "changes": changes}
+    with open(delta_path(path), "ab+") as f:
+        end = _complete_length(f, fmt)
+        if end < f.seek(0, os.SEEK_END):
+            f.truncate(end)
+        f.write(_encode(record, fmt))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_snapshot(path: str) -> Tuple[int, Dict[str, Any], Dict[str, Any]]:
+    """(version, metadata, content) of the snapshot with its delta log replayed."""
+    fmt = snapshot_format(path)
+    base = next(_iter_records(path, fmt))
+    _check_schema(base, path)
+    version, metadata, content = base["version"], base.get("metadata", {}), base.get("content", {})
+    if os.path.exists(delta_path(path)):
+        for record in _iter_records(delta_path(path), fmt):
+            _check_schema(record, delta_path(path))
+            changes = record["changes"]
+            if "metadata" in changes:
+                metadata = changes.pop("metadata")
+            content.update(changes)
+            version = record["version"]
+    return version, metadata, content
@@ -1,10 +1,96 @@
-from note_interpreter.io import InputHandler, OutputGenerator
+import argparse
+import sys
+from note_interpreter.backends import available_backends
+from note_interpreter.batching import TokenBudgetBatcher
+from note_interpreter.clarification import SQLiteClarificationBroker
+from note_interpreter.io import InputHandler
+from note_interpreter.llm_agent import build_prompt_context, load_parameters_from_yaml, load_schema_from_yaml
+from note_interpreter.memory_store import MemoryStore
+from note_interpreter.pipeline import AgentBatchProcessor, PipelineRunner, passthrough_batch
+
+
+def print_progress(stats):
+    print(f"\r{stats.batches} batches, {stats.notes} notes, {stats.notes_per_s:.1f} notes/s", end="", file=sys.stderr, flush=True)
+
 
 if __name__ == "__main__":
-    batch = InputHandler.load_batch(
-        "docs/examples/example_notes.csv",
-        "docs/examples/example_user_memory.md",
-        "docs/examples/example_classification.yaml"
+    parser = argparse.ArgumentParser(description="MVP1 note pipeline: notes CSV -> interpreted notes CSV")
+    parser.add_argument("--notes", default="docs/examples/example_notes.csv")
+    parser.add_argument("--memory", default="docs/examples/example_user_memory.md")
+    parser.add_argument("--classification", default="docs/examples/example_classification.yaml")
+    parser.add_argument("--output", default="output_notes.csv")
+    parser.add_argument("--batch-size", "--chunk-size", dest="batch_size", type=int, default=1000, help="notes per NoteBatch shard")
+    parser.add_argument("--max-prompt-tokens", type=int, default=None,
+                        help="pack shards by prompt token budget (full prompt without notes + the notes) instead of --batch-size")
+    parser.add_argument("--workers", type=int, default=4, help="number of parallel workers")
+    parser.add_argument("--executor", choices=["process", "thread", "serial"], default="process")
+    parser.add_argument("--llm", choices=["none"] + available_backends(), default="none",
+                        help="none: write notes unchanged (MVP1); fake: offline deterministic LLM; otherwise a real LLM backend")
+    parser.add_argument("--model", default=None, help="model name for the backend (default: the backend's own)")
+    parser.add_argument("--fake-latency", type=float, default=0.0, help="fake backend: injected latency per LLM call (s)")
+    parser.add_argument("--fake-jitter", type=float, default=0.0, help="fake backend: uniform latency jitter (s)")
+    parser.add_argument("--prompt-config", default="resources/single_agent/prompt_config.yaml")
+    parser.add_argument("--schema", default="resources/single_agent/notes_output_schema.yaml")
+    parser.add_argument("--parameters", default="resources/single_agent/agent_parameters.yaml")
+    parser.add_argument("--selective", action="store_true",
+                        help="per-note mode: clarification rounds resend only the notes still below the clarity threshold")
+    parser.add_argument("--memory-top-k", type=int, default=None,
+                        help="index the memory file and put only the K points most relevant to each batch into the prompt")
+    parser.add_argument("--update-memory", action="store_true",
+                        help="append the agents' new memory points to the --memory file (deduplicated, locked appends)")
+    parser.add_argument("--clarification-db", default=None,
+                        help="SQLite file for clarification questions; batches that ask are written unresolved, and "
+                             "--resume rewrites their rows once answered (default: questions are kept in worker memory only)")
+    parser.add_argument("--flush-every", type=int, default=1, help="flush + checkpoint after this many batches")
+    parser.add_argument("--resume", action="store_true", help="continue from <output>.checkpoint.json instead of starting over")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="output format (parquet needs pyarrow)")
+    parser.add_argument("--quiet", action="store_true", help="no per-batch progress line")
+    args = parser.parse_args()
+
+    if args.llm == "none":
+        processor = passthrough_batch
+    else:
+        processor = AgentBatchProcessor(
+            backend=args.llm,
+            model=args.model,
+            backend_options={"latency_s": args.fake_latency, "jitter_s": args.fake_jitter} if args.llm == "fake" else None,
+            prompt_config_path=args.prompt_config,
+            schema_path=args.schema,
+            parameters_path=args.parameters,
+            selective=args.selective,
+            memory_path=args.memory if args.update_memory else None,
+            clarification_broker=SQLiteClarificationBroker(args.clarification_db) if args.clarification_db else None,
+            **({"memory_store": MemoryStore(args.memory), "memory_top_k": args.memory_top_k} if args.memory_top_k else {}),
+        )
+    batcher = None
+    if args.max_prompt_tokens:
+        memory = InputHandler.read_user_memory_md(args.memory)
+        if args.memory_top_k:
+            memory = MemoryStore(args.memory).retrieve([], args.memory_top_k)
+        context = build_prompt_context(
+            [], memory, InputHandler.read_classification_yaml(args.classification),
+            load_schema_from_yaml(args.schema), load_parameters_from_yaml(args.parameters)
+        )
+        batcher = TokenBudgetBatcher.for_prompt_config(
+            args.prompt_config, args.max_prompt_tokens, context, max_notes_per_batch=args.batch_size
+        )
+    runner = PipelineRunner(
+        processor,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        executor=args.executor,
+        progress=None if args.quiet else print_progress,
+        batcher=batcher,
+    )
+    stats = runner.run(
+        args.notes, args.memory, args.classification, args.output,
+        output_format=args.format, resume=args.resume, flush_every=args.flush_every
     )
-    OutputGenerator.write_notes_csv(batch.notes, "output_notes.csv")
-    print("Pipeline run complete. Output written to output_notes.csv") 
\ No newline at end of file
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Pipeline run complete. {stats.notes} notes in {stats.batches} batches written to {args.output} "
+          f"in {stats.elapsed_s:.2f}s ({stats.notes_per_s:.1f} notes/s, {args.workers} {args.executor} workers)")
+    if stats.resumed:
+        print(f"{stats.resumed} answered batches from earlier runs were resumed and rewritten")
+    for pending in stats.pending:
+        print(f"Batch {pending.batch_id} waits for clarification {pending.request_id}: {' / '.join(pending.questions)}")
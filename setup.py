@@ -15,6 +15,10 @@ setup(
         "langchain-anthropic",
         "pyyaml",
     ],
+    extras_require={
+        "parquet": ["pyarrow"],
+        "msgpack": ["msgpack"],
+    },
     author="Tamas",
     description="An AI-powered note interpretation system",
     python_requires=">=3.8",
@@ -0,0 +1,79 @@
+import csv
+from typing import List
+
+import pytest
+import yaml
+from pydantic import Field
+
+from note_interpreter.agent_core import ToolProvider
+from note_interpreter.fake_llm import DeterministicFakeChatModel, FakeToolProvider
+from note_interpreter.llm_agent import SingleAgent
+
+# Ten notes; with ask_user_threshold=90 some of them are unclear for the rule-based fake model
+NOTES = [f"note {i}" for i in range(10)]
+
+
+class PassThroughToolProvider(ToolProvider):
+    """Tool provider for hand-written fake chat models: the model is used unbound."""
+    def prepare_tool_call(self, tool):
+        return {"name": tool.name}
+
+    def _bind_to_llm(self, llm, tool_dicts):
+        return llm
+
+
+class RecordingFakeModel(DeterministicFakeChatModel):
+    """DeterministicFakeChatModel that keeps the system prompt of every call."""
+    prompts: List[str] = Field(default_factory=list)
+
+    def _respond(self, messages):
+        self.prompts.append("\n".join(str(m.content) for m in messages if m.type == "system"))
+        return super()._respond(messages)
+
+
+def make_inputs(tmp_path, num_notes):
+    """notes.csv ("note 0".."note N-1"), memory.md and classification.yaml for pipeline runs."""
+    notes_csv = tmp_path / "notes.csv"
+    notes_csv.write_text("".join(f"note {i}\n" for i in range(num_notes)), encoding="utf-8")
+    memory_md = tmp_path / "memory.md"
+    memory_md.write_text("* memory one\n", encoding="utf-8")
+    class_yaml = tmp_path / "classification.yaml"
+    class_yaml.write_text(yaml.dump({"entity_types": ["task"], "intents": ["@DO"]}), encoding="utf-8")
+    return str(notes_csv), str(memory_md), str(class_yaml)
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def make_agent_resources(tmp_path):
+    """Minimal single_agent resource files (prompt config, schema, parameters) for offline agent runs."""
+    prompt_config = tmp_path / "prompt_config.yaml"
+    prompt_config.write_text(yaml.dump({"sections": [{"name": "goals"}, {"name": "input_context"}]}), encoding="utf-8")
+    schema = tmp_path / "notes_output_schema.yaml"
+    schema.write_text(yaml.dump({"DataEntry": {"raw_text": {"type": "string", "description": "note"}}}), encoding="utf-8")
+    parameters = tmp_path / "agent_parameters.yaml"
+    parameters.write_text(yaml.dump({
+        "max_clarification_rounds": {"value": 2, "description": "rounds"},
+        "temperature": {"value": 0.0, "description": "temperature"},
+    }), encoding="utf-8")
+    return {"prompt_config_path": str(prompt_config), "schema_path": str(schema), "parameters_path": str(parameters)}
+
+
+@pytest.fixture
+def agent_resources(tmp_path):
+    return make_agent_resources(tmp_path)
+
+
+@pytest.fixture
+def make_agent(agent_resources):
+    """
+    Factory for offline SingleAgents: NOTES, the fake model (one ask_user round about the notes below clarity 90)
+    and the tmp_path resources by default; any SingleAgent argument can be overridden.
+    """
+    def factory(notes=NOTES, user_memory=("memory",), llm=None, **kwargs):
+        llm = llm or DeterministicFakeChatModel(ask_user_rounds=1, ask_user_threshold=90)
+        return SingleAgent(list(notes), list(user_memory), llm=llm, tool_provider=FakeToolProvider(),
+                           **{**agent_resources, **kwargs})
+    return factory
@@ -0,0 +1,120 @@
+import gc
+import threading
+import time
+import weakref
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from note_interpreter.agent_core import AgentCore, ToolDefinition
+from note_interpreter.clarify_and_score_agent import ClarifyAndScoreAgent
+
+from tests.conftest import PassThroughToolProvider
+
+
+class ParallelToolCallModel(BaseChatModel):
+    """Always answers with one score_notes call per note plus a clarify_notes call."""
+    temperature: float = 0.0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        calls = [{"name": "score_notes", "args": {"note": f"n{i}"}, "id": f"call_{i}"} for i in range(3)]
+        calls.append({"name": "clarify_notes", "args": {"questions": ["why?"]}, "id": "call_q"})
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="", tool_calls=calls))])
+
+    @property
+    def _llm_type(self) -> str:
+        return "parallel-tool-calls"
+
+
+def make_agent():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def score_notes(note, shared_context=None):
+        with lock:
+            active.append(note)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(note)
+        return {"note": note, "clarity_score": 80}
+
+    def clarify_notes(questions, shared_context=None):
+        return {"asked": questions}
+
+    tools = [
+        ToolDefinition(name="score_notes", description="score", schema={"type": "object"}, function=score_notes),
+        ToolDefinition(name="clarify_notes", description="clarify", schema={"type": "object"}, function=clarify_notes),
+    ]
+    agent = AgentCore(llm=ParallelToolCallModel(), tools=tools, system_prompt="system",
+                      tool_provider=PassThroughToolProvider(), should_initiate=False)
+    return agent, peak
+
+
+def test_tool_index_built_once():
+    agent, _ = make_agent()
+    assert set(agent.tool_index) == {"score_notes", "clarify_notes"}
+    assert agent.execute_tool_function({"tool_name": "missing", "tool_args": {}}) is None
+
+
+def test_all_parallel_tool_calls_are_executed_in_order():
+    agent, peak = make_agent()
+    response = agent.handle_user_message("score these")
+    assert [d["name"] for d in response["all_tool_details"]] == ["score_notes"] * 3 + ["clarify_notes"]
+    assert response["tool_details"]["name"] == "score_notes"
+    results = [o["result"] for o in agent.state.tool_outputs]
+    assert results == [{"note": f"n{i}", "clarity_score": 80} for i in range(3)] + [{"asked": ["why?"]}]
+    assert max(peak) > 1
+    entry = agent.state.conversation_history[-1]
+    assert len(entry["tool_calls"]) == 4
+    assert entry["tool_result"] == results[0]
+
+
+class CountingToolProvider(PassThroughToolProvider):
+    binds = 0
+
+    def _bind_to_llm(self, llm, tool_dicts):
+        CountingToolProvider.binds += 1
+        return llm
+
+
+def test_tool_binding_is_cached_per_llm_and_tool_set():
+    CountingToolProvider.binds = 0
+    llm = ParallelToolCallModel()
+    other_llm = ParallelToolCallModel()
+    tools = [ToolDefinition(name="score_notes", description="score", schema={"type": "object"})]
+    for _ in range(3):
+        AgentCore(llm=llm, tools=tools, system_prompt="s", tool_provider=CountingToolProvider(), should_initiate=False)
+    assert CountingToolProvider.binds == 1
+    AgentCore(llm=other_llm, tools=tools, system_prompt="s", tool_provider=CountingToolProvider(), should_initiate=False)
+    more_tools = tools + [ToolDefinition(name="clarify_notes", description="clarify", schema={"type": "object"})]
+    AgentCore(llm=llm, tools=more_tools, system_prompt="s", tool_provider=CountingToolProvider(), should_initiate=False)
+    assert CountingToolProvider.binds == 3
+
+
+def test_tool_binding_cache_does_not_keep_the_llm_alive():
+    tools = [ToolDefinition(name="score_notes", description="score", schema={"type": "object"})]
+    llm = ParallelToolCallModel()
+    core = AgentCore(llm=llm, tools=tools, system_prompt="s", tool_provider=CountingToolProvider(), should_initiate=False)
+    # A copy of the model does not reuse the original's binding
+    CountingToolProvider.binds = 0
+    AgentCore(llm=llm.model_copy(), tools=tools, system_prompt="s", tool_provider=CountingToolProvider(),
+              should_initiate=False)
+    assert CountingToolProvider.binds == 1
+    ref = weakref.ref(llm)
+    del llm, core
+    gc.collect()
+    assert ref() is None
+
+
+def test_clarify_and_score_agent_reuses_pooled_agent_cores():
+    agent = ClarifyAndScoreAgent(prompt="sys", llm=ParallelToolCallModel(), tool_provider=PassThroughToolProvider(), tools=[])
+    for i in range(3):
+        agent.run([f"note {i}"], [])
+    assert agent.agent_pool.created == 1
+    with agent.agent_pool.acquire() as core:
+        assert len(core.state.conversation_history) == 1
+        assert core.shared_context.notes == ["note 2"]
@@ -0,0 +1,77 @@
+import asyncio
+from typing import Any, List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from note_interpreter.agent_core import AgentCore, MessageType
+from note_interpreter.async_runner import AsyncBatchRunner, clarify_and_score_worker
+from note_interpreter.clarify_and_score_agent import ClarifyAndScoreAgent
+from note_interpreter.models import Note, NoteBatch
+
+from tests.conftest import PassThroughToolProvider
+
+
+class FakeAsyncChatModel(BaseChatModel):
+    """Answers every call with a finalize_notes tool call and tracks peak concurrency."""
+    delay: float = 0.05
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+    def _response(self) -> AIMessage:
+        return AIMessage(content="", tool_calls=[{
+            "name": "finalize_notes",
+            "args": {"notes": [{"raw_text": "n", "clarified_text": "n", "clarity_score": 90, "clarification_history": []}], "clarification_qas": []},
+            "id": "call_1",
+        }])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._response())])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return ChatResult(generations=[ChatGeneration(message=self._response())])
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-async"
+
+
+def make_batches(count: int) -> List[NoteBatch]:
+    return [NoteBatch(notes=[Note(raw_input=f"note {i}")], user_memory=[]) for i in range(count)]
+
+
+def test_ainvoke_with_message_list_returns_tool_call():
+    core = AgentCore(llm=FakeAsyncChatModel(delay=0), tools=[], system_prompt="sys",
+                     tool_provider=PassThroughToolProvider(), should_initiate=False)
+    response = asyncio.run(core.ainvoke_with_message_list([{"role": "user", "content": "Proceed"}]))
+    assert response["type"] == MessageType.TOOL_CALL
+    assert response["tool_details"]["name"] == "finalize_notes"
+    # Stateless: only the system prompt is in the history
+    assert len(core.state.conversation_history) == 1
+
+
+def test_async_runner_respects_concurrency_limit():
+    llm = FakeAsyncChatModel()
+    agent = ClarifyAndScoreAgent(prompt="sys", llm=llm, tool_provider=PassThroughToolProvider())
+    runner = AsyncBatchRunner(clarify_and_score_worker(agent), max_concurrency=3)
+    results = runner.run(make_batches(9))
+    assert len(results) == 9
+    assert all(isinstance(r, list) for r in results)
+    assert llm.max_in_flight == 3
+
+
+def test_async_runner_keeps_order_and_isolates_failures():
+    async def worker(batch):
+        if batch.notes[0].raw_input == "note 1":
+            raise RuntimeError("boom")
+        return batch.notes[0].raw_input
+
+    results = AsyncBatchRunner(worker, max_concurrency=2).run(make_batches(3))
+    assert results[0] == "note 0"
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] == "note 2"
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import pytest
+
+from note_interpreter.agent_core import AgentCore
+from note_interpreter.backends import available_backends, create_llm, register_backend
+from note_interpreter.fake_llm import DeterministicFakeChatModel, FakeToolProvider, interpret_note
+from note_interpreter.llm_agent import SingleAgent
+
+
+def test_builtin_backends_and_unknown_name():
+    assert {"fake", "openai", "anthropic"} <= set(available_backends())
+    llm, provider = create_llm("fake", latency_s=0.0)
+    assert isinstance(llm, DeterministicFakeChatModel)
+    assert isinstance(provider, FakeToolProvider)
+    with pytest.raises(ValueError):
+        create_llm("no-such-backend")
+
+
+def test_register_custom_backend_and_env_default(monkeypatch):
+    @register_backend("test-local")
+    def local_backend(model=None, temperature=0.0, **options):
+        return DeterministicFakeChatModel(model_name=model or "local", **options), None
+
+    monkeypatch.setenv("NOTE_INTERPRETER_LLM_BACKEND", "test-local")
+    llm, provider = create_llm(model="tiny", seed=3)
+    assert llm.model_name == "tiny" and llm.seed == 3 and provider is None
+    # The fake model has a registered default tool provider
+    agent = AgentCore(llm=llm, tools=[], system_prompt="s", should_initiate=False)
+    assert isinstance(agent.tool_provider, FakeToolProvider)
+
+
+def test_scripted_responses_cycle():
+    llm = DeterministicFakeChatModel(script=[
+        {"tool": "ask_user", "args": {"questions": ["which John?"]}},
+        {"content": "thanks"},
+    ])
+    first, second, third = (llm.invoke("x") for _ in range(3))
+    assert first.tool_calls[0]["name"] == "ask_user"
+    assert second.content == "thanks" and not second.tool_calls
+    assert third.tool_calls[0]["args"] == {"questions": ["which John?"]}
+
+
+def test_rule_based_ask_user_then_finalize(agent_resources, monkeypatch):
+    notes = [f"note {i}" for i in range(10)]
+    unclear = [n for n in notes if interpret_note(n)["clarity_score"] < 90]
+    assert unclear
+    answers = []
+    monkeypatch.setattr("builtins.input", lambda prompt="": answers.append(prompt) or "it is about the demo")
+    llm = DeterministicFakeChatModel(ask_user_rounds=1, ask_user_threshold=90)
+    agent = SingleAgent(notes, [], llm=llm, tool_provider=FakeToolProvider(), **agent_resources)
+    output = agent.run()
+    assert len(answers) == 1
+    assert [e.raw_text for e in output.entries] == notes
+
+
+def test_latency_and_jitter_are_injected_and_awaited():
+    llm = DeterministicFakeChatModel(latency_s=0.05, jitter_s=0.02, seed=1)
+    started = time.perf_counter()
+    llm.invoke("x")
+    assert time.perf_counter() - started >= 0.03
+
+    async def run_many():
+        return await asyncio.gather(*(llm.ainvoke("x") for _ in range(10)))
+
+    started = time.perf_counter()
+    asyncio.run(run_many())
+    # 10 concurrent calls overlap instead of taking 10 x latency
+    assert time.perf_counter() - started < 0.3
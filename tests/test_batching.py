@@ -0,0 +1,102 @@
+import pytest
+import yaml
+
+from note_interpreter.agent_core import AgentCore
+from note_interpreter.batching import TokenBudgetBatcher, estimate_tokens
+from note_interpreter.clarify_and_score_agent import ClarifyAndScoreAgent
+from note_interpreter.fake_llm import DeterministicFakeChatModel, FakeToolProvider
+from note_interpreter.io import InputHandler
+from note_interpreter.llm_agent import SingleAgent
+from note_interpreter.models import Note
+from note_interpreter.pipeline import PipelineRunner
+
+from tests.conftest import make_inputs, read_rows
+
+
+def test_estimate_tokens_grows_with_text():
+    assert estimate_tokens("") == 0
+    assert 0 < estimate_tokens("buy milk") < estimate_tokens("buy milk " * 50)
+
+
+def test_pack_respects_budget_and_keeps_order():
+    notes = [f"note number {i} " + "word " * (i % 5) for i in range(40)]
+    batcher = TokenBudgetBatcher(200, fixed_tokens=50)
+    batches = list(batcher.pack(notes))
+    assert [n for b in batches for n in b] == notes
+    assert len(batches) > 1
+    for batch in batches:
+        assert sum(batcher.note_cost(n) for n in batch) <= 150
+
+
+def test_oversized_note_gets_its_own_batch():
+    batcher = TokenBudgetBatcher(60, fixed_tokens=10)
+    batches = list(batcher.pack(["short", "long " * 200, "short again"]))
+    assert batches == [["short"], ["long " * 200], ["short again"]]
+
+
+def test_max_notes_per_batch_and_note_objects():
+    batcher = TokenBudgetBatcher(10_000, max_notes_per_batch=3)
+    notes = [Note(raw_input=f"n{i}") for i in range(7)]
+    assert [len(b) for b in batcher.pack(notes)] == [3, 3, 1]
+
+
+def test_fixed_cost_must_fit_budget():
+    with pytest.raises(ValueError):
+        TokenBudgetBatcher.for_prompt("system prompt " * 100, 20)
+
+
+def test_iter_note_batches_with_batcher(tmp_path):
+    notes_csv, memory_md, class_yaml = make_inputs(tmp_path, 10)
+    batcher = TokenBudgetBatcher(100, fixed_tokens=0, per_note_overhead=0, output_tokens_per_note=0)
+    cost = batcher.note_cost("note 0")
+    batcher.max_prompt_tokens = cost * 4
+    batches = list(InputHandler.iter_note_batches(notes_csv, memory_md, class_yaml, batcher=batcher))
+    assert [len(b.notes) for b in batches] == [4, 4, 2]
+
+
+def test_pipeline_runner_uses_batcher(tmp_path):
+    notes_csv, memory_md, class_yaml = make_inputs(tmp_path, 9)
+    output_csv = str(tmp_path / "out.csv")
+    runner = PipelineRunner(executor="serial", batcher=TokenBudgetBatcher(10_000, max_notes_per_batch=4))
+    stats = runner.run(notes_csv, memory_md, class_yaml, output_csv)
+    assert stats.batches == 3
+    assert [r["raw_input"] for r in read_rows(output_csv)] == [f"note {i}" for i in range(9)]
+
+
+def test_single_agent_run_batched_merges_outputs(agent_resources):
+    notes = [f"buy item {i}" for i in range(7)]
+    agent = SingleAgent(notes, ["* memory"], llm=DeterministicFakeChatModel(), tool_provider=FakeToolProvider(),
+                        **agent_resources)
+    fixed = agent.make_batcher(100_000).fixed_tokens
+    output = agent.run_batched(fixed + 1000, max_notes_per_batch=3)
+    assert [e.raw_text for e in output.entries] == notes
+    assert agent.notes == notes
+
+
+def test_agent_batches_fit_budget_with_context_dependent_sections(agent_resources, tmp_path):
+    prompt_config = tmp_path / "full_prompt_config.yaml"
+    prompt_config.write_text(yaml.dump({"sections": [
+        {"name": "goals"}, {"name": "classification"}, {"name": "parameter_explanations"}, {"name": "input_context"}
+    ]}), encoding="utf-8")
+    classification = {"entity_types": [f"entity type {i}" for i in range(100)], "intents": [f"@INTENT_{i}" for i in range(100)]}
+    notes = [f"buy item {i} " + "word " * (i % 7) for i in range(40)]
+    agent = SingleAgent(notes, ["* memory"], classification_config=classification, llm=DeterministicFakeChatModel(),
+                        tool_provider=FakeToolProvider(), **{**agent_resources, "prompt_config_path": str(prompt_config)})
+    agent.notes = []
+    budget = estimate_tokens(agent.build_system_prompt()) + 150
+    batches = list(agent.make_batcher(budget).pack(notes))
+    assert len(batches) > 1
+    for batch in batches:
+        agent.notes = batch
+        assert estimate_tokens(agent.build_system_prompt()) <= budget
+
+
+def test_clarify_agent_run_batched_numbers_fallback_ids_globally(monkeypatch):
+    # The agent echoes its batch's notes without ids, so every id comes from the fallback
+    monkeypatch.setattr(AgentCore, "handle_user_message",
+                        lambda self, message: {"notes": [{"raw_text": n} for n in self.shared_context.notes]})
+    agent = ClarifyAndScoreAgent(prompt="sys", llm=DeterministicFakeChatModel(), tool_provider=FakeToolProvider())
+    notes = [f"note {i}" for i in range(7)]
+    output = agent.run_batched(notes, [], 100_000, max_notes_per_batch=3)
+    assert [o["raw_text"] for o in output] == notes
+    assert [o["id"] for o in output] == [f"note_{i}" for i in range(1, 8)]
@@ -0,0 +1,142 @@
+import pickle
+
+import pytest
+
+from note_interpreter.agent_core import AgentCore
+from note_interpreter.clarification import (ClarificationPending, ConsoleClarificationBroker,
+                                            InMemoryClarificationBroker, PendingClarification,
+                                            SQLiteClarificationBroker)
+from note_interpreter.fake_llm import DeterministicFakeChatModel, FakeToolProvider, interpret_note
+from note_interpreter.llm_agent import ClarificationManager, SingleAgent
+from note_interpreter.models import LLMOutput
+from note_interpreter.pipeline import PipelineRunner
+from note_interpreter.run_state import RunStateStore
+
+from tests.conftest import NOTES, RecordingFakeModel, make_inputs, read_rows
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_broker_request_lifecycle(tmp_path, kind):
+    broker = InMemoryClarificationBroker() if kind == "memory" else SQLiteClarificationBroker(str(tmp_path / "c.db"))
+    first = broker.submit(["Which John?"], state={"round": 0}, batch_id="a")
+    broker.submit(["Which demo?"], batch_id="b")
+    assert [p.questions for p in broker.pending("a")] == [["Which John?"]]
+    assert len(broker.pending()) == 2
+    broker.answer(first.request_id, "John Smith")
+    assert broker.get_answer(first.request_id) == "John Smith"
+    assert broker.get(first.request_id).state == {"round": 0}
+    assert [p.batch_id for p in broker.pending()] == ["b"]
+    broker.resolve(first.request_id)
+    with pytest.raises(ValueError):
+        broker.get(first.request_id)
+
+
+def test_sqlite_broker_survives_restart_and_pickling(tmp_path):
+    path = str(tmp_path / "c.db")
+    pending = SQLiteClarificationBroker(path).submit(["q"], state={"notes": ["n"]})
+    reopened = pickle.loads(pickle.dumps(SQLiteClarificationBroker(path)))
+    assert reopened.get(pending.request_id).state == {"notes": ["n"]}
+
+
+def test_single_agent_suspends_and_resumes(tmp_path, make_agent, agent_resources):
+    broker = SQLiteClarificationBroker(str(tmp_path / "c.db"))
+    # The fake model counts its ask_user rounds per instance, so the resumed agent shares it
+    llm = DeterministicFakeChatModel(ask_user_rounds=1, ask_user_threshold=90)
+    pending = make_agent(llm=llm, clarification_broker=broker, batch_id="batch-1").run()
+    assert isinstance(pending, PendingClarification)
+    assert pending.batch_id == "batch-1"
+    assert pending.questions == [f"What do you mean by '{n}'?" for n in NOTES if interpret_note(n)["clarity_score"] < 90]
+    assert pending.state["notes"] == NOTES
+
+    with pytest.raises(ValueError):
+        make_agent(clarification_broker=broker).resume(pending.request_id)
+    broker.answer(pending.request_id, "they are all about the demo")
+    # A fresh agent (e.g. another process) resumes from the stored state
+    fresh = SingleAgent([], [], llm=llm, tool_provider=FakeToolProvider(), clarification_broker=broker, **agent_resources)
+    output = fresh.resume(pending.request_id)
+    assert isinstance(output, LLMOutput)
+    assert [e.raw_text for e in output.entries] == NOTES
+    assert broker.pending() == []
+
+
+def test_other_batches_keep_running_while_one_is_pending(make_agent):
+    broker = InMemoryClarificationBroker()
+    waiting = make_agent(clarification_broker=broker, batch_id="slow").run()
+    # A batch without unclear notes finishes although the other one still waits for its user
+    clear = make_agent(["email John re demo"], llm=DeterministicFakeChatModel(), clarification_broker=broker).run()
+    assert isinstance(waiting, PendingClarification)
+    assert isinstance(clear, LLMOutput)
+    assert [p.batch_id for p in broker.pending()] == ["slow"]
+
+
+def suspend_second_batch(batch):
+    if batch.notes[0].raw_input == "note 4":
+        raise ClarificationPending(PendingClarification(request_id="r1", batch_id="second", questions=["Which note?"]))
+    for note in batch.notes:
+        note.interpreted_text = note.raw_input.upper()
+    return batch
+
+
+def test_pipeline_keeps_running_while_a_batch_is_pending(tmp_path):
+    notes_csv, memory_md, class_yaml = make_inputs(tmp_path, 12)
+    stats = PipelineRunner(suspend_second_batch, workers=2, batch_size=4, executor="process").run(
+        notes_csv, memory_md, class_yaml, str(tmp_path / "out.csv"))
+    assert [(p.request_id, p.batch_id, p.questions) for p in stats.pending] == [("r1", "second", ["Which note?"])]
+    assert stats.committed == 12
+    # The suspended batch is written unresolved, the others are interpreted
+    assert [r["interpreted_text"] for r in read_rows(str(tmp_path / "out.csv"))] == \
+        [f"NOTE {i}" for i in range(4)] + [""] * 4 + [f"NOTE {i}" for i in range(8, 12)]
+
+
+def test_console_broker_keeps_inline_answers(make_agent, monkeypatch):
+    prompts = []
+    monkeypatch.setattr("builtins.input", lambda prompt="": prompts.append(prompt) or "the demo")
+    output = make_agent().run()
+    assert isinstance(output, LLMOutput)
+    assert prompts == ["Your clarification response: "]
+
+
+def test_plain_text_answer_keeps_input_context_in_next_prompt(tmp_path, make_agent):
+    llm = RecordingFakeModel(script=[{"content": "Which John do you mean?"},
+                                     {"tool": "finalize_notes", "args": {"entries": [], "new_memory_points": []}}])
+    store = RunStateStore(str(tmp_path / "runs"))
+    make_agent(["email John re demo"], llm=llm, clarification_broker=ConsoleClarificationBroker(ask=lambda p: "John Smith"),
+               batch_id="b", run_state_store=store).run()
+    second = llm.prompts[1]
+    assert "[ERROR" not in second
+    assert "email John re demo" in second and "* memory" in second
+    assert "Q1: Which John do you mean?\n  User response: John Smith" in second
+    assert store.load("b").clarification_qas == [{"questions": ["Which John do you mean?"], "response": "John Smith"}]
+
+
+def test_clarification_manager_suspends_per_question():
+    broker = InMemoryClarificationBroker()
+    with pytest.raises(ClarificationPending) as exc:
+        ClarificationManager.update_clarification_qas([("q0", "a0")], ["q1", "q2"], broker)
+    first = exc.value.pending
+    assert first.questions == ["q1"]
+    broker.answer(first.request_id, "a1")
+    with pytest.raises(ClarificationPending) as exc:
+        ClarificationManager.resume_clarification_qas(broker, first.request_id)
+    second = exc.value.pending
+    broker.answer(second.request_id, "a2")
+    qas = ClarificationManager.resume_clarification_qas(broker, second.request_id)
+    assert qas == [("q0", "a0"), ("q1", "a1"), ("q2", "a2")]
+
+    console = ConsoleClarificationBroker(ask=lambda pending: pending.questions[0].upper())
+    assert ClarificationManager.update_clarification_qas([], ["q1"], console) == [("q1", "Q1")]
+
+
+def test_interactive_session_suspends_and_resumes():
+    llm = DeterministicFakeChatModel(script=[{"content": "hi, what should we do?"}, {"content": "done"}])
+    agent = AgentCore(llm=llm, tools=[], system_prompt="s", should_initiate=False)
+    broker = InMemoryClarificationBroker()
+    pending = agent.run_interactive_session(broker, session_id="s1")
+    broker.answer(pending.request_id, "hello")
+    pending = agent.resume_interactive_session(broker, pending.request_id)
+    assert pending.questions == ["hi, what should we do?"]
+
+    # Resume on a new core from the persisted state
+    broker.answer(pending.request_id, "exit")
+    history = AgentCore(llm=llm, tools=[], system_prompt="s", should_initiate=False).resume_interactive_session(broker, pending.request_id)
+    assert [m["content"] for m in history if m["role"] == "user"] == ["hello"]
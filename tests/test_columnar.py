@@ -0,0 +1,48 @@
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from note_interpreter.columnar import (
+    notes_to_table, read_entries_parquet, read_notes_parquet, write_entries_parquet, write_notes_parquet,
+)
+from note_interpreter.models import DataEntry, Note
+from note_interpreter.pipeline import run_streaming_pipeline
+from tests.conftest import make_inputs
+
+
+def sample_notes():
+    return [
+        Note(raw_input=f"n{i}", interpreted_text=f"i{i}", clarity_score=i,
+             metadata={"entity_type": "task" if i % 2 else "idea", "intent": "@DO"})
+        for i in range(4)
+    ]
+
+
+def test_notes_table_is_typed_and_dictionary_encoded():
+    table = notes_to_table(sample_notes())
+    assert table.schema.field("clarity_score").type == pa.int32()
+    assert pa.types.is_dictionary(table.schema.field("entity_type").type)
+    assert table.column("entity_type").chunk(0).dictionary.to_pylist() == ["idea", "task"]
+
+
+def test_notes_parquet_round_trip(tmp_path):
+    path = str(tmp_path / "notes.parquet")
+    write_notes_parquet(sample_notes(), path)
+    assert read_notes_parquet(path) == sample_notes()
+
+
+def test_entries_parquet_round_trip(tmp_path):
+    entries = [DataEntry(raw_text="r", interpreted_text="i", entity_type="task", intent="@DO", clarity_score=90)]
+    path = str(tmp_path / "entries.parquet")
+    write_entries_parquet(entries, path)
+    assert read_entries_parquet(path) == entries
+
+
+def test_pipeline_parquet_output(tmp_path):
+    notes_csv, memory_md, class_yaml = make_inputs(tmp_path, 5)
+    output = str(tmp_path / "out.parquet")
+    count = run_streaming_pipeline(notes_csv, memory_md, class_yaml, output, chunk_size=2, output_format="parquet")
+    assert count == 5
+    assert [n.raw_input for n in read_notes_parquet(output)] == [f"note {i}" for i in range(5)]
+    with pytest.raises(ValueError):
+        run_streaming_pipeline(notes_csv, memory_md, class_yaml, output, output_format="parquet", resume=True)
@@ -0,0 +1,96 @@
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from note_interpreter.agent_core import AgentCore, ToolDefinition
+from note_interpreter.history import HistoryManager, ToolResultStore, message_tokens
+
+from tests.conftest import PassThroughToolProvider
+
+
+class RecordingChatModel(BaseChatModel):
+    """Records how many messages each call received; answers with a big_tool call on 'tool'."""
+    temperature: float = 0.0
+    sent: list = []
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.sent.append(len(messages))
+        if "tool" in str(messages[-1].content):
+            message = AIMessage(content="", tool_calls=[{"name": "big_tool", "args": {}, "id": "call_1"}])
+        else:
+            message = AIMessage(content="ok")
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @property
+    def _llm_type(self) -> str:
+        return "recording"
+
+
+def make_history(turns):
+    history = [{"role": "system", "content": "system prompt"}]
+    for i in range(turns):
+        history.append({"role": "user", "content": f"question {i}"})
+        history.append({"role": "assistant", "content": f"answer {i}"})
+    return history
+
+
+def test_sliding_window_keeps_system_prompt():
+    view = HistoryManager(max_messages=3).view(make_history(5))
+    assert view[0]["content"] == "system prompt"
+    assert [m["content"] for m in view[1:]] == ["answer 3", "question 4", "answer 4"]
+
+
+def test_token_budget_truncation_keeps_system_and_last_message():
+    history = make_history(20)
+    budget = message_tokens(history[0]) + sum(message_tokens(m) for m in history[-4:])
+    view = HistoryManager(max_tokens=budget).view(history)
+    assert view[0] == history[0]
+    assert view[-1] == history[-1]
+    assert sum(message_tokens(m) for m in view) <= budget
+    assert len(view) < len(history)
+
+
+def test_summarizer_is_incremental():
+    calls = []
+
+    def summarize(previous, dropped):
+        calls.append(len(dropped))
+        return (previous or "") + "".join(m["content"][0] for m in dropped)
+
+    manager = HistoryManager(max_messages=2, summarizer=summarize)
+    history = make_history(2)
+    view = manager.view(history)
+    assert view[1]["role"] == "system" and view[1]["content"].endswith("qa")
+    history += make_history(1)[1:]
+    view = manager.view(history)
+    assert calls == [2, 2]
+    assert view[1]["content"].endswith("qaqa")
+    assert [m["content"] for m in view[2:]] == ["question 0", "answer 0"]
+
+
+def test_large_tool_results_are_stored_out_of_band(tmp_path):
+    manager = HistoryManager(tool_result_store=ToolResultStore(str(tmp_path)), max_inline_tool_result_chars=50)
+    payload = {"rows": list(range(100))}
+    entry = manager.prepare_entry({"role": "assistant", "content": "", "tool_result": payload})
+    assert "tool_result_ref" in entry
+    assert len(entry["tool_result"]) < 300
+    assert manager.resolve_tool_result(entry) == payload
+    small = {"role": "assistant", "content": "", "tool_result": {"ok": True}}
+    assert manager.prepare_entry(small) is small
+
+
+def test_agent_core_sends_bounded_history():
+    llm = RecordingChatModel(sent=[])
+    tool = ToolDefinition(name="big_tool", description="returns a lot", schema={"type": "object"},
+                          function=lambda shared_context=None: {"data": "x" * 5000})
+    agent = AgentCore(llm=llm, tools=[tool], system_prompt="system prompt", tool_provider=PassThroughToolProvider(),
+                      should_initiate=False, history_manager=HistoryManager(max_messages=4))
+    for i in range(6):
+        agent.handle_user_message(f"message {i}")
+    agent.handle_user_message("use the tool")
+    assert llm.sent == [2, 4, 5, 5, 5, 5, 5]
+    entry = agent.state.conversation_history[-1]
+    assert agent.history_manager.resolve_tool_result(entry) == {"data": "x" * 5000}
+    assert agent.state.tool_outputs[-1]["result"] == {"data": "x" * 5000}
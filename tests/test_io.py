@@ -1,7 +1,8 @@
 import os
 import tempfile
+import pytest
 import yaml
-from note_interpreter.io import InputHandler, OutputGenerator
+from note_interpreter.io import InputHandler, OutputGenerator, StreamingNoteWriter
 from note_interpreter.models import Note, NoteBatch
 
 def test_read_notes_csv():
@@ -80,4 +81,50 @@ def test_full_pipeline_integration():
     os.remove(notes_f.name)
     os.remove(mem_f.name)
     os.remove(yaml_f.name)
-    os.remove(out_f.name) 
\ No newline at end of file
+    os.remove(out_f.name) 
+
+def test_streaming_writer_drops_uncommitted_rows_on_resume(tmp_path):
+    path = str(tmp_path / "out.csv")
+    writer = StreamingNoteWriter(path, flush_every=2)
+    writer.write_batch([Note(raw_input='a'), Note(raw_input='b')])
+    writer.write_batch([Note(raw_input='c')])   # second batch -> flush + checkpoint
+    writer.write_batch([Note(raw_input='d')])   # not yet committed
+    writer._file.flush()                        # simulate a crash after a partial write
+    assert StreamingNoteWriter.read_checkpoint(path + '.checkpoint.json')['offset'] == 3
+
+    resumed = StreamingNoteWriter(path, resume=True)
+    assert resumed.committed_offset == 3
+    resumed.write_batch([Note(raw_input='d2')])
+    resumed.close()
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert lines[0].startswith('raw_input')
+    assert [line.split(',')[0] for line in lines[1:]] == ['a', 'b', 'c', 'd2']
+    writer._file.close()
+
+def test_streaming_writer_rewrites_suspended_rows(tmp_path, monkeypatch):
+    path = str(tmp_path / "out.csv")
+    writer = StreamingNoteWriter(path)
+    writer.write_batch([Note(raw_input='a')])
+    writer.write_batch([Note(raw_input='b'), Note(raw_input='c')], suspended={'request_id': 'r1'})
+    writer.write_batch([Note(raw_input='d')], suspended={'request_id': 'r2'})
+    writer.close()
+    resumed = StreamingNoteWriter(path, resume=True)
+    assert resumed.suspended == [{'request_id': 'r1', 'row': 1, 'count': 2}, {'request_id': 'r2', 'row': 3, 'count': 1}]
+    # Crash right after the checkpoint recorded the rewrite: the next resume finishes the swap
+    real_replace = os.replace
+    def crash_on_swap(src, dst):
+        if src.endswith(".rewrite"):
+            raise OSError("crash")
+        real_replace(src, dst)
+    monkeypatch.setattr(os, "replace", crash_on_swap)
+    with pytest.raises(OSError):
+        resumed.rewrite_suspended({'r1': [Note(raw_input='b', interpreted_text='B'), Note(raw_input='c', interpreted_text='C')]})
+    monkeypatch.undo()
+    again = StreamingNoteWriter(path, resume=True)
+    assert again.suspended == [{'request_id': 'r2', 'row': 3, 'count': 1}]
+    again.write_batch([Note(raw_input='e')])
+    again.close()
+    with open(path, encoding='utf-8') as f:
+        rows = [line.split(',')[:2] for line in f.read().splitlines()[1:]]
+    assert rows == [['a', ''], ['b', 'B'], ['c', 'C'], ['d', ''], ['e', '']]
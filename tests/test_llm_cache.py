@@ -0,0 +1,91 @@
+import time
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from note_interpreter.agent_core import AgentCore
+from note_interpreter.llm_cache import MemoryLRUCache, ResponseCache, SQLiteCache, make_cache_key
+
+from tests.conftest import PassThroughToolProvider
+
+
+class CountingChatModel(BaseChatModel):
+    temperature: float = 0.0
+    model_name: str = "counting"
+    calls: int = 0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"answer {self.calls}"))])
+
+    @property
+    def _llm_type(self) -> str:
+        return "counting"
+
+
+def test_cache_key_ignores_timestamps_but_not_content():
+    a = [{"role": "user", "content": "hi", "timestamp": "2025-01-01"}]
+    b = [{"role": "user", "content": "hi", "timestamp": "2025-06-01"}]
+    c = [{"role": "user", "content": "hello"}]
+    assert make_cache_key(a, "m", 0.0) == make_cache_key(b, "m", 0.0)
+    assert make_cache_key(a, "m", 0.0) != make_cache_key(c, "m", 0.0)
+    assert make_cache_key(a, "m", 0.0) != make_cache_key(a, "other", 0.0)
+    assert make_cache_key(a, "m", 0.0) != make_cache_key(a, "m", 0.0, [{"name": "ask_user"}])
+
+
+def test_memory_lru_evicts_least_recently_used():
+    cache = MemoryLRUCache(max_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.get("a")
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+
+
+def test_sqlite_cache_ttl_and_size_eviction(tmp_path):
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), ttl_seconds=0.05, max_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.set("c", {"v": 3})
+    assert len(cache) == 2
+    assert cache.get("c") == {"v": 3}
+    time.sleep(0.1)
+    assert cache.get("c") is None
+    cache.close()
+
+
+def test_disk_tier_survives_new_memory_tier(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ResponseCache(disk=SQLiteCache(path)).set("k", {"message": "x"})
+    cache = ResponseCache(disk=SQLiteCache(path))
+    assert cache.get("k") == {"message": "x"}
+    assert cache.get("k") == {"message": "x"}
+    assert cache.stats() == {"hits": 2, "memory_hits": 1, "disk_hits": 1, "misses": 0}
+
+
+def test_agent_core_serves_repeated_calls_from_cache():
+    llm = CountingChatModel()
+    cache = ResponseCache()
+    core = AgentCore(llm=llm, tools=[], system_prompt="sys", tool_provider=PassThroughToolProvider(),
+                     should_initiate=False, response_cache=cache)
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "Proceed"}]
+    first = core.invoke_with_message_list(messages)
+    second = core.invoke_with_message_list(messages)
+    assert first == second
+    assert llm.calls == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_agent_core_skips_cache_for_nonzero_temperature():
+    llm = CountingChatModel(temperature=0.7)
+    cache = ResponseCache()
+    core = AgentCore(llm=llm, tools=[], system_prompt="sys", tool_provider=PassThroughToolProvider(),
+                     should_initiate=False, response_cache=cache)
+    messages = [{"role": "user", "content": "Proceed"}]
+    core.invoke_with_message_list(messages)
+    core.invoke_with_message_list(messages)
+    assert llm.calls == 2
@@ -5,11 +5,12 @@ import logging
 import sys
 import io
 import pytest
-from note_interpreter.log import Log, log
+from note_interpreter.log import Log, lazy_json, log
 
 @pytest.fixture(autouse=True)
-def reset_log_singleton():
-    # Reset singleton for each test
+def reset_log_singleton(tmp_path, monkeypatch):
+    # Reset singleton for each test; debug logs without a log_file go to tmp_path/logs
+    monkeypatch.chdir(tmp_path)
     log.reset()
     yield
     log.reset()
@@ -84,4 +85,98 @@ def test_log_color_demo():
     log.info("This is an INFO message (should be green)")
     log.warning("This is a WARNING message (should be yellow)")
     log.error("This is an ERROR message (should be red)")
-    log.print("This is a PRINT message (should be default terminal color)") 
\ No newline at end of file
+    log.print("This is a PRINT message (should be default terminal color)") 
+
+def test_lazy_message_not_built_when_level_disabled(caplog):
+    l = Log(level="basic")
+    calls = []
+    def expensive():
+        calls.append(1)
+        return "expensive debug"
+    with caplog.at_level(logging.INFO, logger="note_interpreter"):
+        l.debug(expensive)
+        l.debug("history: %s", lazy_json({"a": expensive}))
+        assert not l.isEnabledFor("debug")
+        assert l.isEnabledFor(logging.INFO)
+        l.info(expensive)
+    assert calls == [1]
+    assert "expensive debug" in caplog.text
+
+def test_structured_fields_and_lazy_json(caplog):
+    l = Log(level="debug", log_file=os.devnull)
+    with caplog.at_level(logging.DEBUG, logger="note_interpreter"):
+        l.info("tool invoked", tool="ask_user", args={"questions": ["why?"]})
+        l.debug("payload:\n%s", lazy_json({"x": 1}))
+    record = caplog.records[0]
+    assert record.fields == {"tool": "ask_user", "args": {"questions": ["why?"]}}
+    assert 'tool invoked | tool=ask_user args={"questions": ["why?"]}' in caplog.text
+    assert '"x": 1' in caplog.text
+
+def test_queue_mode_writes_in_background_and_flushes(tmp_path):
+    log_file = tmp_path / "queued.log"
+    l = Log(level="debug", log_file=str(log_file), use_queue=True)
+    assert l.listener is not None
+    for i in range(200):
+        l.debug(f"queued line {i}")
+    l.flush()
+    content = log_file.read_text(encoding="utf-8")
+    assert "queued line 0" in content and "queued line 199" in content
+
+def test_queue_mode_size_rotation(tmp_path):
+    log_file = tmp_path / "rotated.log"
+    l = Log(level="debug", log_file=str(log_file), use_queue=True, rotation="size", max_bytes=2000, backup_count=2)
+    for i in range(200):
+        l.debug(f"rotating line {i}")
+    l.flush()
+    assert (tmp_path / "rotated.log.1").exists()
+    assert not (tmp_path / "rotated.log.3").exists()
+
+def test_queue_overflow_drop_policy():
+    import queue as _queue
+    from note_interpreter.log import BoundedQueueHandler
+    handler = BoundedQueueHandler(_queue.Queue(maxsize=2), overflow="drop")
+    for i in range(5):
+        handler.emit(logging.LogRecord("x", logging.INFO, __file__, 1, f"m{i}", None, None))
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    with pytest.raises(ValueError):
+        BoundedQueueHandler(_queue.Queue(), overflow="explode")
+
+def test_queue_handler_does_not_format_on_caller_thread():
+    import queue as _queue
+    from note_interpreter.log import BoundedQueueHandler
+    calls = []
+
+    class Expensive:
+        def __str__(self):
+            calls.append(1)
+            return "expensive"
+
+    handler = BoundedQueueHandler(_queue.Queue())
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    arg = Expensive()
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "value: %s", (arg,), None)
+    handler.emit(record)
+    queued = handler.queue.get_nowait()
+    # The record is passed through as is: formatting happens in the writer thread
+    assert calls == []
+    assert queued.msg == "value: %s" and queued.args == (arg,)
+    assert logging.Formatter("%(message)s").format(queued) == "value: expensive"
+
+
+def test_queue_handler_snapshots_mutable_args():
+    import queue as _queue
+    from note_interpreter.log import BoundedQueueHandler, LazyMessage
+    handler = BoundedQueueHandler(_queue.Queue())
+    history = [{"role": "user", "content": "hi"}]
+    record = logging.LogRecord("x", logging.DEBUG, __file__, 1, "history: %s", (history,), None)
+    handler.emit(record)
+    fields = {"items": [1]}
+    handler.emit(logging.LogRecord("x", logging.INFO, __file__, 1, LazyMessage("event", fields), None, None))
+    # Later changes must not show up in the already logged messages
+    history.append({"role": "assistant", "content": "later"})
+    fields["items"].append(2)
+    first, second = handler.queue.get_nowait(), handler.queue.get_nowait()
+    assert first.getMessage() == "history: [{'role': 'user', 'content': 'hi'}]"
+    assert "later" not in first.getMessage()
+    assert "[1]" in second.getMessage() and "2" not in second.getMessage()
@@ -0,0 +1,160 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from note_interpreter.fake_llm import DeterministicFakeChatModel, FakeToolProvider
+from note_interpreter.llm_agent import SingleAgent
+from note_interpreter.memory_store import MemoryStore, MemoryWriter
+from note_interpreter.pipeline import AgentBatchProcessor, PipelineRunner
+
+from tests.conftest import make_inputs
+
+MEMORY = """# User memory
+* User is working on NoteInterpreter, a Python note tool.
+* User's manager is John Smith.
+* User prefers concise answers.
+* User plays tennis on Saturdays.
+"""
+
+
+def write_memory(tmp_path, text=MEMORY):
+    path = tmp_path / "memory.md"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_add_skips_exact_and_near_duplicates(tmp_path):
+    path = write_memory(tmp_path)
+    store = MemoryStore(path)
+    assert len(store) == 4
+    added = store.add([
+        "user prefers concise answers",                                # exact (normalized)
+        "* User is working on NoteInterpreter, a Python note tool!",   # exact (punctuation)
+        "User is working on NoteInterpreter, the Python note tool.",  # near duplicate
+        "User's sister is called Anna.",
+        "User's sister is called Anna.",                               # within the same call
+    ])
+    assert added == ["* User's sister is called Anna."]
+    with open(path, encoding="utf-8") as f:
+        assert f.read().endswith("* User plays tennis on Saturdays.\n* User's sister is called Anna.\n")
+
+
+def test_retrieve_returns_relevant_points_in_file_order(tmp_path):
+    store = MemoryStore(write_memory(tmp_path))
+    assert store.retrieve(["email John re demo"], k=1) == ["* User's manager is John Smith."]
+    assert store.retrieve(["tennis with John"], k=2, pad_recent=False) == [
+        "* User's manager is John Smith.", "* User plays tennis on Saturdays."
+    ]
+    # Few matches are topped up with the most recent points, so the size stays constant
+    assert len(store.retrieve(["tennis"], k=3)) == 3
+    assert store.retrieve(["nothing relevant"], k=2, pad_recent=False) == []
+
+
+def test_index_is_reused_and_rebuilt_after_external_edit(tmp_path):
+    path = write_memory(tmp_path)
+    store = MemoryStore(path)
+    store.add(["User drinks green tea."])
+    index_mtime = os.path.getmtime(store.index_path)
+    reopened = MemoryStore(path)
+    assert reopened.points == store.points
+    assert os.path.getmtime(store.index_path) == index_mtime
+    # Edited outside the store: the index no longer matches and is rebuilt from the Markdown file
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("* User lives in Budapest.\n")
+    assert MemoryStore(path).retrieve(["Budapest trip"], k=1) == ["* User lives in Budapest."]
+
+
+def test_external_edit_of_the_same_size_is_detected(tmp_path):
+    path = write_memory(tmp_path)
+    store = MemoryStore(path)
+    stat = os.stat(path)
+    write_memory(tmp_path, MEMORY.replace("tennis", "squash"))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert os.path.getsize(path) == stat.st_size
+    assert store.retrieve(["squash"], k=1) == ["* User plays squash on Saturdays."]
+
+
+def test_retrieve_sees_points_added_by_another_store(tmp_path):
+    path = write_memory(tmp_path)
+    reader, writer = MemoryStore(path), MemoryStore(path)
+    assert "* User lives in Budapest." not in reader.retrieve(["Budapest"], k=10)
+    writer.add(["User lives in Budapest."])
+    assert reader.retrieve(["Budapest trip"], k=1) == ["* User lives in Budapest."]
+
+
+def test_concurrent_stores_keep_the_index_complete(tmp_path):
+    path = write_memory(tmp_path)
+    first, second = MemoryStore(path), MemoryStore(path)
+    first.add(["User drinks green tea."])
+    # The second store catches up under the lock before appending: dedup sees the other store's point
+    assert second.add(["User drinks green tea!", "User lives in Budapest."]) == ["* User lives in Budapest."]
+    index_mtime = os.path.getmtime(second.index_path)
+    reopened = MemoryStore(path)
+    assert os.path.getmtime(reopened.index_path) == index_mtime  # the index is trusted, not rebuilt
+    assert reopened.points == [line for line in read_lines(path) if line.startswith("* ")]
+    assert reopened.retrieve(["green tea"], k=1) == ["* User drinks green tea."]
+
+
+def test_single_agent_prompt_gets_top_k_memory(tmp_path, agent_resources):
+    store = MemoryStore(write_memory(tmp_path, MEMORY + "".join(f"* Unrelated fact number {i}.\n" for i in range(200))))
+    agent = SingleAgent(["email John re demo"], store.points, llm=DeterministicFakeChatModel(),
+                        tool_provider=FakeToolProvider(), memory_store=store, memory_top_k=5,
+                        **agent_resources)
+    prompt = agent.build_system_prompt()
+    assert "John Smith" in prompt
+    assert prompt.count("Unrelated fact") == 4
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_memory_writer_buffers_and_deduplicates(tmp_path):
+    path = write_memory(tmp_path, MEMORY.rstrip("\n"))  # no trailing newline
+    writer = MemoryWriter(path, flush_every=3)
+    # Duplicates within the buffer are dropped on add, duplicates of the file's lines on flush
+    assert writer.add(["User prefers concise answers!", "User drinks tea.", "* user drinks tea"]) == 2
+    assert read_lines(path)[-1] == "* User plays tennis on Saturdays."
+    # Reaching flush_every writes the buffer in one append
+    writer.add(["User lives in Budapest.", "User has a dog."])
+    assert read_lines(path)[-4:] == [
+        "* User plays tennis on Saturdays.", "* User drinks tea.", "* User lives in Budapest.", "* User has a dog."
+    ]
+    assert read_lines(path).count("* User prefers concise answers.") == 1
+    assert writer.flush() == []
+
+
+def test_memory_writer_sees_points_appended_by_other_writers(tmp_path):
+    path = write_memory(tmp_path)
+    first, second = MemoryWriter(path), MemoryWriter(path)
+    second.add(["User drinks tea."])
+    first.add(["User drinks tea.", "User has a dog."])
+    assert first.flush() == ["* User drinks tea.", "* User has a dog."]
+    assert second.flush() == []
+    assert read_lines(path).count("* User drinks tea.") == 1
+
+
+def write_points(path, worker):
+    with MemoryWriter(path, flush_every=5) as writer:
+        for i in range(20):
+            # Worker names are letters: "worker 0 fact 3" and "worker 3 fact 0" would be near duplicates
+            writer.add([f"Shared fact {i}.", f"Worker {'abcd'[worker]} fact {i}."])
+
+
+def test_memory_writer_is_safe_across_processes(tmp_path):
+    path = write_memory(tmp_path)
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(write_points, [path] * 4, range(4)))
+    lines = read_lines(path)
+    points = [line for line in lines if line.startswith("* ")]
+    assert len(points) == len(set(points)) == 4 + 20 + 4 * 20
+
+
+def test_pipeline_appends_new_memory_points(tmp_path, agent_resources):
+    notes_csv, memory_md, class_yaml = make_inputs(tmp_path, 12)
+    script = [{"tool": "finalize_notes", "args": {"entries": [], "new_memory_points": ["* User likes tea.", "memory one"]}}]
+    processor = AgentBatchProcessor(backend="fake", backend_options={"script": script}, memory_path=memory_md,
+                                    **agent_resources)
+    PipelineRunner(processor, workers=3, batch_size=4, executor="process").run(
+        notes_csv, memory_md, class_yaml, str(tmp_path / "out.csv"))
+    assert read_lines(memory_md) == ["* memory one", "* User likes tea."]
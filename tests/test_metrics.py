@@ -0,0 +1,50 @@
+import json
+
+from langchain_core.messages import AIMessage
+
+from note_interpreter.fake_llm import DeterministicFakeChatModel, FakeToolProvider
+from note_interpreter.llm_agent import SingleAgent
+from note_interpreter.metrics import MetricsRegistry, metrics, quantile, usage_counts
+
+
+def test_quantiles_and_summary():
+    registry = MetricsRegistry()
+    for i in range(1, 101):
+        registry.observe("stage", i / 100, prompt_tokens=10)
+    registry.increment("stage", "retries")
+    stats = registry.summary()["stage"]
+    assert stats["count"] == 100
+    assert stats["p50_s"] == 0.5
+    assert stats["p95_s"] == 0.95
+    assert stats["prompt_tokens"] == 1000
+    assert stats["retries"] == 1
+    assert quantile([], 0.5) == 0.0
+
+
+def test_timer_and_exports():
+    registry = MetricsRegistry()
+    with registry.timer("llm_invoke") as m:
+        m.update(usage_counts(AIMessage(content="x", usage_metadata={"input_tokens": 7, "output_tokens": 3, "total_tokens": 10})))
+    text = registry.to_prometheus()
+    assert 'note_interpreter_stage_seconds{stage="llm_invoke",quantile="0.95"}' in text
+    assert 'note_interpreter_stage_seconds_count{stage="llm_invoke"} 1' in text
+    assert 'note_interpreter_prompt_tokens_total{stage="llm_invoke"} 7' in text
+    rows = [json.loads(line) for line in registry.to_json_lines(timestamp=0).splitlines()]
+    assert rows == [{"timestamp": 0, "stage": "llm_invoke", **registry.summary()["llm_invoke"]}]
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    with registry.timer("x"):
+        pass
+    assert registry.summary() == {}
+
+
+def test_agent_stages_are_instrumented(agent_resources):
+    metrics.reset()
+    agent = SingleAgent(["buy milk"], [], llm=DeterministicFakeChatModel(), tool_provider=FakeToolProvider(),
+                        **agent_resources)
+    agent.run()
+    summary = metrics.summary()
+    for stage in ("prompt_render", "llm_invoke", "output_format"):
+        assert summary[stage]["count"] >= 1
@@ -0,0 +1,131 @@
+from note_interpreter.clarification import SQLiteClarificationBroker
+from note_interpreter.fake_llm import DeterministicFakeChatModel, FakeToolProvider, interpret_note
+from note_interpreter.io import InputHandler, StreamingNoteWriter
+from note_interpreter.llm_agent import SingleAgent
+from note_interpreter.models import LLMOutput
+from note_interpreter.pipeline import AgentBatchProcessor, PipelineRunner, run_streaming_pipeline
+
+from tests.conftest import make_inputs, read_rows
+
+
+def test_iter_note_batches_yields_fixed_size_chunks(tmp_path):
+    notes_csv, memory_md, class_yaml = make_inputs(tmp_path, 7)
+    batches = list(InputHandler.iter_note_batches(notes_csv, memory_md, class_yaml, chunk_size=3))
+    assert [len(b.notes) for b in batches] == [3, 3, 1]
+    assert batches[2].notes[0].raw_input == "note 6"
+    assert batches[0].user_memory == ["* memory one"]
+
+
+def test_streaming_pipeline_writes_each_chunk_before_reading_next(tmp_path):
+    notes_csv, memory_md, class_yaml = make_inputs(tmp_path, 5)
+    output_csv = str(tmp_path / "out.csv")
+    rows_seen_by_batch = []
+
+    def process(batch):
+        rows_seen_by_batch.append(len(read_rows(output_csv)))
+        for note in batch.notes:
+            note.metadata = {"entity_type": "task", "intent": "@DO"}
+        return batch
+
+    count = run_streaming_pipeline(notes_csv, memory_md, class_yaml, output_csv, chunk_size=2, process_batch=process)
+    assert count == 5
+    assert rows_seen_by_batch == [0, 2, 4]
+    rows = read_rows(output_csv)
+    assert [r["raw_input"] for r in rows] == [f"note {i}" for i in range(5)]
+    assert rows[0]["entity_type"] == "task"
+
+
+def test_streaming_pipeline_resumes_from_checkpoint(tmp_path):
+    notes_csv, memory_md, class_yaml = make_inputs(tmp_path, 6)
+    output_csv = str(tmp_path / "out.csv")
+
+    def crash_on_third_batch(batch):
+        if batch.notes[0].raw_input == "note 4":
+            raise RuntimeError("worker died")
+        return batch
+
+    try:
+        run_streaming_pipeline(notes_csv, memory_md, class_yaml, output_csv, chunk_size=2, process_batch=crash_on_third_batch)
+    except RuntimeError:
+        pass
+    assert len(read_rows(output_csv)) == 4
+
+    processed = []
+
+    def record(batch):
+        processed.extend(n.raw_input for n in batch.notes)
+        return batch
+
+    count = run_streaming_pipeline(notes_csv, memory_md, class_yaml, output_csv, chunk_size=2, process_batch=record, resume=True)
+    assert processed == ["note 4", "note 5"]
+    assert count == 6
+    assert [r["raw_input"] for r in read_rows(output_csv)] == [f"note {i}" for i in range(6)]
+
+
+def test_pipeline_runner_with_fake_llm_keeps_input_order(tmp_path, agent_resources):
+    notes_csv, memory_md, class_yaml = make_inputs(tmp_path, 23)
+    output_csv = str(tmp_path / "out.csv")
+    processor = AgentBatchProcessor(backend="fake", **agent_resources)
+    progress = []
+    runner = PipelineRunner(processor, workers=3, batch_size=4, executor="process", progress=lambda s: progress.append(s.notes))
+    stats = runner.run(notes_csv, memory_md, class_yaml, output_csv)
+    assert stats.notes == 23
+    assert stats.batches == 6
+    assert progress[-1] == 23
+    rows = read_rows(output_csv)
+    assert [r["raw_input"] for r in rows] == [f"note {i}" for i in range(23)]
+    assert all(r["entity_type"] == "note" and r["interpreted_text"].startswith("Note") for r in rows)
+    assert all(50 <= int(r["clarity_score"]) <= 100 for r in rows)
+
+
+def test_agent_processor_suspends_batches_instead_of_prompting(tmp_path, agent_resources):
+    notes_csv, memory_md, class_yaml = make_inputs(tmp_path, 12)
+    broker = SQLiteClarificationBroker(str(tmp_path / "clarifications.db"))
+    processor = AgentBatchProcessor(backend="fake", backend_options={"ask_user_rounds": 1, "ask_user_threshold": 90},
+                                    clarification_broker=broker, **agent_resources)
+    stats = PipelineRunner(processor, workers=3, batch_size=4, executor="process").run(
+        notes_csv, memory_md, class_yaml, str(tmp_path / "out.csv"))
+    # Workers never call input(): every batch with an unclear note is suspended, the rest are interpreted
+    unclear = {i // 4 for i in range(12) if interpret_note(f"note {i}")["clarity_score"] < 90}
+    assert unclear and len(stats.pending) == len(unclear)
+    assert stats.committed == 12
+    assert {p.request_id for p in broker.pending()} == {p.request_id for p in stats.pending}
+    rows = read_rows(str(tmp_path / "out.csv"))
+    assert [i for i in range(12) if not rows[i]["interpreted_text"]] == [i for i in range(12) if i // 4 in unclear]
+
+    # The answer can come later, from another process
+    pending = stats.pending[0]
+    broker.answer(pending.request_id, "they are about the demo")
+    output = SingleAgent([], [], llm=DeterministicFakeChatModel(), tool_provider=FakeToolProvider(),
+                         clarification_broker=broker, **agent_resources).resume(pending.request_id)
+    assert isinstance(output, LLMOutput)
+    assert [e.raw_text for e in output.entries] == pending.state["notes"]
+
+
+def test_resume_rewrites_rows_of_answered_suspended_batches(tmp_path, agent_resources):
+    notes_csv, memory_md, class_yaml = make_inputs(tmp_path, 12)
+    output_csv = str(tmp_path / "out.csv")
+    broker = SQLiteClarificationBroker(str(tmp_path / "clarifications.db"))
+    processor = AgentBatchProcessor(backend="fake", backend_options={"ask_user_rounds": 1, "ask_user_threshold": 90},
+                                    clarification_broker=broker, **agent_resources)
+    runner = PipelineRunner(processor, workers=3, batch_size=4, executor="process")
+    first = runner.run(notes_csv, memory_md, class_yaml, output_csv)
+    assert len(first.pending) >= 2
+    checkpoint = StreamingNoteWriter.read_checkpoint(output_csv + ".checkpoint.json")
+    assert sorted(e["request_id"] for e in checkpoint["suspended"]) == sorted(p.request_id for p in first.pending)
+
+    # Only the first suspended batch is answered: it is rewritten, the others keep waiting
+    answered, *waiting = sorted(checkpoint["suspended"], key=lambda e: e["row"])
+    broker.answer(answered["request_id"], "they are about the demo")
+    # Resumed by another process, whose model does not ask again
+    resumer = AgentBatchProcessor(backend="fake", clarification_broker=broker, **agent_resources)
+    second = PipelineRunner(resumer, executor="serial").run(notes_csv, memory_md, class_yaml, output_csv, resume=True)
+    assert second.resumed == 1 and second.notes == 0
+    assert sorted(p.request_id for p in second.pending) == sorted(e["request_id"] for e in waiting)
+    rows = read_rows(output_csv)
+    assert [r["raw_input"] for r in rows] == [f"note {i}" for i in range(12)]
+    rewritten = range(answered["row"], answered["row"] + answered["count"])
+    assert all(rows[i]["interpreted_text"] for i in rewritten)
+    assert [i for i in range(12) if not rows[i]["interpreted_text"]] == [
+        e["row"] + k for e in waiting for k in range(e["count"])]
+    assert StreamingNoteWriter.read_checkpoint(output_csv + ".checkpoint.json")["suspended"] == waiting
@@ -1,3 +1,4 @@
+import os
 import unittest
 from note_interpreter.prompt_builder import PromptBuilder
 
@@ -12,7 +13,13 @@ class TestPromptBuilder(unittest.TestCase):
                 {"name": "missing_section", "enabled": True}
             ]
         }
-        # Register a dynamic section for testing
+        # Register a dynamic section for testing (the real one is restored afterwards)
+        self.addCleanup(PromptBuilder.section_registry.__setitem__, 'output_schema_and_meanings',
+                        PromptBuilder.section_registry['output_schema_and_meanings'])
+        self.addCleanup(PromptBuilder.section_static.__setitem__, 'output_schema_and_meanings',
+                        PromptBuilder.section_static['output_schema_and_meanings'])
+        self.addCleanup(PromptBuilder.section_files.__setitem__, 'output_schema_and_meanings',
+                        PromptBuilder.section_files['output_schema_and_meanings'])
         @PromptBuilder.register_section('output_schema_and_meanings')
         def output_schema_and_meanings_section(params, context):
             return f"Fields: {', '.join(context.get('fields', []))}"
@@ -48,5 +55,105 @@ class TestPromptBuilder(unittest.TestCase):
         self.assertEqual(PromptBuilder.serialize_value(None), "(none)")
         self.assertEqual(PromptBuilder.serialize_value("x"), "x")
 
+
+class TestCompiledPrompt(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        import yaml
+        self.tmpdir = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.tmpdir, "prompt_config.yaml")
+        self.config = {
+            "sections": [
+                {"name": "intro", "custom_text": "# Agent: {agent_name} / {agent_name}\n{unknown} stays"},
+                {"name": "notes_block", "custom_text": "Notes:\n{notes}"},
+                {"name": "disabled", "enabled": False, "custom_text": "never"},
+                {"name": "context_usage"},
+            ]
+        }
+        with open(self.config_path, "w", encoding="utf-8") as f:
+            yaml.dump(self.config, f)
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmpdir)
+
+    def test_render_matches_build(self):
+        context = {"agent_name": "TestAgent", "notes": ["a", "b"]}
+        compiled = PromptBuilder.compile(self.config_path)
+        self.assertEqual(compiled.render(context), PromptBuilder.build(context, self.config_path))
+        self.assertIn("# Agent: TestAgent / TestAgent", compiled.render(context))
+        self.assertIn("{unknown} stays", compiled.render(context))
+        self.assertNotIn("never", compiled.render(context))
+
+    def test_compile_is_cached_until_file_changes(self):
+        import yaml
+        first = PromptBuilder.compile(self.config_path)
+        self.assertIs(first, PromptBuilder.compile(self.config_path))
+        self.config["sections"][0]["custom_text"] = "changed {agent_name}"
+        with open(self.config_path, "w", encoding="utf-8") as f:
+            yaml.dump(self.config, f)
+        stat = os.stat(self.config_path)
+        os.utime(self.config_path, (stat.st_atime, stat.st_mtime + 10))
+        second = PromptBuilder.compile(self.config_path)
+        self.assertIsNot(first, second)
+        self.assertIn("changed X", second.render({"agent_name": "X"}))
+
+    def test_literal_json_in_custom_text_stays_static(self):
+        import yaml
+        self.config["sections"].insert(0, {"name": "json_example", "custom_text": 'Example: {"id": 1} or {"tags": {}}'})
+        with open(self.config_path, "w", encoding="utf-8") as f:
+            yaml.dump(self.config, f)
+        compiled = PromptBuilder.compile(self.config_path)
+        rendered = compiled.render({"agent_name": "A", "notes": ["n1"]}, static_first=True)
+        self.assertIn('Example: {"id": 1} or {"tags": {}}', compiled.static_prefix)
+        self.assertTrue(rendered.startswith(compiled.static_prefix))
+
+    def test_static_sections_are_emitted_first_and_memoized(self):
+        calls = []
+        for registry in (PromptBuilder.section_registry, PromptBuilder.section_static, PromptBuilder.section_files):
+            self.addCleanup(registry.pop, 'counted_static', None)
+
+        @PromptBuilder.register_section('counted_static', static=True)
+        def counted_static(params, context):
+            calls.append(1)
+            return "STATIC BODY"
+
+        import yaml
+        self.config["sections"].insert(0, {"name": "counted_static"})
+        with open(self.config_path, "w", encoding="utf-8") as f:
+            yaml.dump(self.config, f)
+        compiled = PromptBuilder.compile(self.config_path)
+        first = compiled.render({"agent_name": "A", "notes": ["n1"]}, static_first=True)
+        second = compiled.render({"agent_name": "B", "notes": ["n2"]}, static_first=True)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(first.startswith(compiled.static_prefix))
+        self.assertTrue(second.startswith(compiled.static_prefix))
+        self.assertIn("STATIC BODY", compiled.static_prefix)
+        self.assertIn("CONTEXT USAGE", compiled.static_prefix)
+        self.assertNotIn("{agent_name}", compiled.static_prefix)
+        # Context-dependent sections come after the prefix
+        self.assertLess(second.index("CONTEXT USAGE"), second.index("# Agent: B"))
+
+    def test_compile_is_recompiled_when_schema_file_changes(self):
+        import yaml
+        schema_path = os.path.join(self.tmpdir, "schema.yaml")
+        with open(schema_path, "w", encoding="utf-8") as f:
+            yaml.dump({"DataEntry": {"raw_text": {"type": "string", "description": "note"}}}, f)
+        self.config["sections"].append({"name": "output_schema_and_meanings", "params": {"schema_file": schema_path}})
+        with open(self.config_path, "w", encoding="utf-8") as f:
+            yaml.dump(self.config, f)
+        first = PromptBuilder.compile(self.config_path)
+        self.assertIn("`raw_text`", first.static_prefix)
+        self.assertIs(first, PromptBuilder.compile(self.config_path))
+        # Only the schema file changes: the static prefix must follow it
+        with open(schema_path, "w", encoding="utf-8") as f:
+            yaml.dump({"DataEntry": {"entity_type": {"type": "string", "description": "type"}}}, f)
+        stat = os.stat(schema_path)
+        os.utime(schema_path, (stat.st_atime, stat.st_mtime + 10))
+        second = PromptBuilder.compile(self.config_path)
+        self.assertIsNot(first, second)
+        self.assertIn("`entity_type`", second.static_prefix)
+        self.assertNotIn("`raw_text`", second.static_prefix)
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,58 @@
+import copy
+import os
+import pickle
+
+import pytest
+import yaml
+
+from note_interpreter.io import InputHandler
+from note_interpreter.llm_agent import load_classification_from_yaml
+from note_interpreter.resources import ResourceLoader, FrozenDict, thaw
+
+
+def write_yaml(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.dump(data, f)
+
+
+def test_loader_parses_once_and_shares_result(tmp_path):
+    path = tmp_path / "schema.yaml"
+    write_yaml(path, {"DataEntry": {"raw_text": {"type": "string"}}})
+    loader = ResourceLoader()
+    first = loader.load(str(path))
+    assert first is loader.load(str(path))
+    assert first == {"DataEntry": {"raw_text": {"type": "string"}}}
+
+
+def test_loader_reloads_after_file_change(tmp_path):
+    path = tmp_path / "params.yaml"
+    write_yaml(path, {"temperature": {"value": 0.0}})
+    loader = ResourceLoader()
+    first = loader.load(str(path))
+    write_yaml(path, {"temperature": {"value": 0.5}})
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+    second = loader.load(str(path))
+    assert second is not first
+    assert second["temperature"]["value"] == 0.5
+
+
+def test_loaded_resources_are_read_only(tmp_path):
+    path = tmp_path / "classification.yaml"
+    write_yaml(path, {"entity_types": ["task"], "intents": ["@DO"]})
+    config = ResourceLoader().load(str(path))
+    assert isinstance(config, FrozenDict)
+    with pytest.raises(TypeError):
+        config["entity_types"] = []
+    with pytest.raises(TypeError):
+        config["intents"].append("@PLAN")
+    mutable = thaw(config)
+    mutable["intents"].append("@PLAN")
+    assert copy.deepcopy(config) == {"entity_types": ["task"], "intents": ["@DO"]}
+    assert pickle.loads(pickle.dumps(config)) == config
+
+
+def test_all_classification_loaders_share_the_cache(tmp_path):
+    path = tmp_path / "classification.yaml"
+    write_yaml(path, {"entity_types": ["task"], "intents": ["@DO"]})
+    assert InputHandler.read_classification_yaml(str(path)) is load_classification_from_yaml(str(path))
@@ -0,0 +1,64 @@
+import functools
+
+from note_interpreter.clarification import ConsoleClarificationBroker, InMemoryClarificationBroker, PendingClarification
+from note_interpreter.fake_llm import DeterministicFakeChatModel
+from note_interpreter.models import LLMOutput
+from note_interpreter.run_state import RunStateStore
+
+from tests.conftest import NOTES
+
+
+def test_store_replays_last_completed_round(tmp_path):
+    store = RunStateStore(str(tmp_path / "runs"))
+    assert store.load("b/1") is None
+    store.start("b/1", "v1", ["a"])
+    store.record_round("b/1", 0, "ask_user", {"questions": ["q?"]}, ["q?"], "ask_user")
+    state = store.load("b/1")
+    assert state.round == 0 and state.awaiting_answer
+    store.record_answer("b/1", 0, "yes")
+    store.record_round("b/1", 1, "finalize_notes", {"entries": []}, final=True)
+    with open(store.path("b/1"), "a", encoding="utf-8") as f:
+        f.write('{"type": "answ')  # torn write at crash time
+    state = store.load("b/1")
+    assert state.finished and state.round == 1 and state.last_tool == "finalize_notes"
+    assert state.clarification_qas == [{"questions": ["q?"], "response": "yes"}]
+    assert state.matches("v1", ["a"]) and not state.matches("v2", ["a"]) and not state.matches("v1", ["b"])
+    # A new start supersedes the earlier records
+    store.start("b/1", "v2", ["a"])
+    assert store.load("b/1").round == -1
+
+
+def test_restarted_run_continues_without_repeating_llm_rounds(tmp_path, make_agent):
+    store = RunStateStore(str(tmp_path / "runs"))
+    batch_agent = functools.partial(make_agent, batch_id="batch-1", run_state_store=store)
+    first_llm = DeterministicFakeChatModel(ask_user_rounds=1, ask_user_threshold=90)
+    pending = batch_agent(llm=first_llm, clarification_broker=InMemoryClarificationBroker()).run()
+    assert isinstance(pending, PendingClarification)
+    assert first_llm._calls == 1
+
+    # The process dies: broker and llm are gone, only the run-state log survives
+    llm = DeterministicFakeChatModel()
+    answers = []
+    broker = ConsoleClarificationBroker(ask=lambda p: answers.append(p.questions) or "about the demo")
+    output = batch_agent(llm=llm, clarification_broker=broker).run()
+    assert isinstance(output, LLMOutput)
+    # The stored questions are asked again without an LLM call; only the finalize round is paid for
+    assert answers == [pending.questions]
+    assert llm._calls == 1
+    assert store.load("batch-1").clarification_qas == [{"questions": pending.questions, "response": "about the demo"}]
+
+    # A finished batch is rebuilt from the stored payload
+    again = DeterministicFakeChatModel()
+    rerun = batch_agent(llm=again, clarification_broker=broker).run()
+    assert again._calls == 0
+    assert rerun.entries == output.entries
+
+
+def test_changed_notes_or_prompt_start_a_new_run(tmp_path, make_agent):
+    store = RunStateStore(str(tmp_path / "runs"))
+    batch_agent = functools.partial(make_agent, batch_id="batch-1", run_state_store=store)
+    batch_agent(llm=DeterministicFakeChatModel(), clarification_broker=ConsoleClarificationBroker(ask=lambda p: "x")).run()
+    llm = DeterministicFakeChatModel()
+    output = batch_agent(notes=NOTES[:3], llm=llm).run()
+    assert llm._calls == 1
+    assert [e.raw_text for e in output.entries] == NOTES[:3]
@@ -0,0 +1,74 @@
+import functools
+
+import pytest
+
+from note_interpreter.clarification import ConsoleClarificationBroker, InMemoryClarificationBroker, PendingClarification
+from note_interpreter.fake_llm import extract_notes_from_prompt, interpret_note
+from note_interpreter.models import LLMOutput
+
+from tests.conftest import NOTES, RecordingFakeModel
+
+UNRESOLVED = [n for n in NOTES if interpret_note(n)["clarity_score"] < 90]
+
+
+@pytest.fixture
+def selective_agent(make_agent):
+    return functools.partial(make_agent, max_clarification_rounds=3, selective=True, clarity_threshold=90)
+
+
+def test_later_rounds_resend_only_unresolved_notes(selective_agent):
+    assert 0 < len(UNRESOLVED) < len(NOTES)
+    llm = RecordingFakeModel(ask_user_rounds=1, ask_user_threshold=90)
+    agent = selective_agent(llm=llm, clarification_broker=ConsoleClarificationBroker(ask=lambda p: "about the demo"))
+    output = agent.run()
+
+    # ask (all) -> finalize (all, freeze) -> ask (unresolved) -> final round (unresolved)
+    assert [extract_notes_from_prompt(p) for p in llm.prompts] == [NOTES, NOTES, UNRESOLVED, UNRESOLVED]
+    assert len(llm.prompts[2]) < len(llm.prompts[1])
+    # Reassembled in the original order; frozen notes keep their first-pass entries
+    assert [e.raw_text for e in output.entries] == NOTES
+    assert [e.clarity_score for e in output.entries] == [interpret_note(n)["clarity_score"] for n in NOTES]
+    assert agent.notes == NOTES
+
+
+def test_default_mode_resends_every_note(selective_agent):
+    llm = RecordingFakeModel(ask_user_rounds=1, ask_user_threshold=90)
+    selective_agent(llm=llm, clarification_broker=ConsoleClarificationBroker(ask=lambda p: "x"), selective=False).run()
+    assert [extract_notes_from_prompt(p) for p in llm.prompts] == [NOTES, NOTES]
+
+
+def test_selective_run_suspends_and_resumes_with_frozen_notes(selective_agent):
+    llm = RecordingFakeModel(ask_user_rounds=1, ask_user_threshold=90)
+    broker = InMemoryClarificationBroker()
+    agent = selective_agent(llm=llm, clarification_broker=broker)
+    first = agent.run()
+    broker.answer(first.request_id, "about the demo")
+    second = selective_agent(llm=llm, clarification_broker=broker).resume(first.request_id)
+    assert isinstance(second, PendingClarification)
+    assert second.state["notes"] == UNRESOLVED
+    broker.answer(second.request_id, "still the demo")
+    output = selective_agent(llm=llm, clarification_broker=broker).resume(second.request_id)
+    assert isinstance(output, LLMOutput)
+    assert [e.raw_text for e in output.entries] == NOTES
+
+
+def test_paraphrased_clarification_stays_with_its_unresolved_note(selective_agent):
+    notes = ["email John re demo", "buy milk", "call Anna about the plan"]
+    def entries(email_score):
+        return [{"raw_text": n, "interpreted_text": n, "entity_type": "task", "intent": "@DO",
+                 "clarity_score": email_score if n.startswith("email") else 95} for n in notes]
+    llm = RecordingFakeModel(script=[
+        {"tool": "ask_user", "args": {"questions": ["Who is Anna?"]}},
+        {"tool": "ask_user", "args": {"questions": ["Which John should get the message?"]}},
+        {"tool": "finalize_notes", "args": {"entries": entries(40), "new_memory_points": []}},
+        {"tool": "finalize_notes", "args": {"entries": entries(90)[:1], "new_memory_points": []}},
+    ])
+    answers = {"Who is Anna?": "my sister", "Which John should get the message?": "my manager, mail him about the demo"}
+    broker = ConsoleClarificationBroker(ask=lambda p: answers[p.questions[0]])
+    output = selective_agent(notes, llm=llm, clarification_broker=broker, max_clarification_rounds=5).run()
+
+    # Round 4 resends only the email note: its paraphrased Q&A is kept, the Q&A about the frozen Anna note is not
+    assert extract_notes_from_prompt(llm.prompts[3]) == ["email John re demo"]
+    assert "Which John should get the message?" in llm.prompts[3]
+    assert "Who is Anna?" not in llm.prompts[3]
+    assert [e.clarity_score for e in output.entries] == [90, 95, 95]
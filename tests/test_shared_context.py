@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+
+from note_interpreter.agent_core import BaseSharedContext
+
+
+def test_snapshot_is_immutable_and_versioned():
+    ctx = BaseSharedContext(notes=["a", "b"])
+    first = ctx.snapshot()
+    assert first.version == 0
+    assert first["notes"] == ["a", "b"]
+    with pytest.raises(TypeError):
+        first["notes"].append("c")
+    ctx.update_fields(notes=["a", "b", "c"], scores={"a": 80})
+    assert first["notes"] == ["a", "b"]
+    assert ctx.snapshot().version == 1
+    assert ctx.notes == ["a", "b", "c"]
+    assert ctx.snapshot().to_dict()["scores"] == {"a": 80}
+
+
+def test_attributes_stay_mutable_while_snapshots_are_frozen():
+    ctx = BaseSharedContext(notes=["a"], state={})
+    ctx.notes.append("b")
+    ctx.state["x"] = 1
+    # In-place changes are not published until the field is written back
+    assert ctx.snapshot()["notes"] == ["a"]
+    ctx.update_fields(notes=ctx.notes, state=ctx.state)
+    assert ctx.snapshot()["notes"] == ["a", "b"]
+    assert ctx.snapshot()["state"] == {"x": 1}
+    ctx.notes.append("c")
+    assert ctx.snapshot()["notes"] == ["a", "b"]
+
+
+def test_compare_and_swap_detects_conflicts():
+    ctx = BaseSharedContext()
+    version = ctx.version
+    assert ctx.compare_and_swap(version, counter=1)
+    assert not ctx.compare_and_swap(version, counter=2)
+    assert ctx.snapshot()["counter"] == 1
+
+
+def test_concurrent_updates_are_not_lost():
+    ctx = BaseSharedContext(counter=0, seen=[])
+
+    def worker(n):
+        for i in range(100):
+            ctx.update(lambda snap: {"counter": snap["counter"] + 1, "seen": [*snap["seen"], (n, i)]})
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    snapshot = ctx.snapshot()
+    assert snapshot["counter"] == 800
+    assert len(snapshot["seen"]) == 800
+    assert snapshot.version == 800
+
+
+@pytest.mark.parametrize("filename", ["context.json", "context.msgpack"])
+def test_snapshot_and_delta_roundtrip(tmp_path, filename):
+    if filename.endswith(".msgpack"):
+        pytest.importorskip("msgpack")
+    path = str(tmp_path / filename)
+    ctx = BaseSharedContext(notes=[f"note {i}" for i in range(1000)], clarification_history=[])
+    ctx.save_snapshot(path)
+    assert ctx.save_delta(path) == 0
+    ctx.update_fields(clarification_history=[{"q": "why?", "a": "because"}])
+    ctx.update_fields(scores={"note 1": 80})
+    assert ctx.save_delta(path) == 2
+    ctx.update_fields(scores={"note 1": 90})
+    assert ctx.save_delta(path) == 1
+
+    loaded = BaseSharedContext.load_snapshot(path)
+    assert loaded.version == ctx.version == 3
+    assert loaded.snapshot().to_dict() == ctx.snapshot().to_dict()
+    assert loaded.scores == {"note 1": 90}
+
+    # A new full snapshot starts a fresh delta log
+    ctx.save_snapshot(path)
+    assert not (tmp_path / (filename + ".delta")).exists()
+
+
+def test_snapshot_schema_version_is_checked(tmp_path):
+    path = tmp_path / "context.json"
+    path.write_text('{"schema_version":99,"version":0,"metadata":{},"content":{}}\n', encoding="utf-8")
+    with pytest.raises(ValueError):
+        BaseSharedContext.load_snapshot(str(path))
+
+
+def test_truncated_delta_record_is_ignored(tmp_path):
+    path = str(tmp_path / "context.json")
+    ctx = BaseSharedContext(counter=0)
+    ctx.save_snapshot(path)
+    ctx.update_fields(counter=1)
+    ctx.save_delta(path)
+    with open(path + ".delta", "a", encoding="utf-8") as f:
+        f.write('{"schema_version":1,"version":2,"chan')
+    assert BaseSharedContext.load_snapshot(path).counter == 1
+
+
+@pytest.mark.parametrize("filename", ["context.json", "context.msgpack"])
+def test_delta_appended_after_torn_record_is_replayed(tmp_path, filename):
+    if filename.endswith(".msgpack"):
+        pytest.importorskip("msgpack")
+    path = str(tmp_path / filename)
+    ctx = BaseSharedContext(counter=0)
+    ctx.save_snapshot(path)
+    ctx.update_fields(counter=1)
+    ctx.save_delta(path)
+    with open(path + ".delta", "rb") as f:
+        record = f.read()
+    # Leállás a második delta írása közben: csonka rekord a fájl végén
+    with open(path + ".delta", "ab") as f:
+        f.write(record[:len(record) // 2])
+    ctx.update_fields(counter=2)
+    ctx.save_delta(path)
+    loaded = BaseSharedContext.load_snapshot(path)
+    assert loaded.counter == 2
+    assert loaded.version == ctx.version
+    with open(path + ".delta", "rb") as f:
+        assert len(f.read()) == 2 * len(record)